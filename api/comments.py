@@ -0,0 +1,68 @@
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sites.shortcuts import get_current_site
+from django.db.models import Count, Q
+from django.utils import timezone
+from django_comments.models import CommentFlag
+from django_comments_xtd.models import XtdComment, LIKEDIT_FLAG, DISLIKEDIT_FLAG
+
+
+def get_public_comments(request):
+    return XtdComment.objects.filter(site__pk=get_current_site(request).pk, is_public=True, is_removed=False)
+
+
+def get_replies_filter(comment_ids):
+    """
+    The replies of a comment are either threaded under it (their `parent_id` points at it) or posted
+    to the comment itself.
+    """
+    ctype = ContentType.objects.get_for_model(XtdComment)
+    return Q(parent_id__in=comment_ids, level__gt=0) | \
+        Q(content_type=ctype, object_pk__in=[str(comment_id) for comment_id in comment_ids])
+
+
+def load_comment_stats(comments, request):
+    """
+    Sets the `reply_count`, `like_count` and `liked` (by the viewer) of a page of comments, with one
+    grouped query for the replies and one for the likes however many comments there are.
+    """
+    comment_ids = {comment.pk for comment in comments}
+    if not comment_ids:
+        return
+
+    reply_counts = {}
+    replies = get_public_comments(request).filter(get_replies_filter(comment_ids)) \
+        .order_by().values('parent_id', 'level', 'object_pk').annotate(count=Count('pk'))
+    for reply in replies:
+        is_threaded = reply['level'] > 0 and reply['parent_id'] in comment_ids
+        comment_id = reply['parent_id'] if is_threaded else int(reply['object_pk'])
+        reply_counts[comment_id] = reply_counts.get(comment_id, 0) + reply['count']
+
+    likes = CommentFlag.objects.filter(comment_id__in=comment_ids, flag=LIKEDIT_FLAG) \
+        .order_by().values('comment_id') \
+        .annotate(count=Count('pk'), liked=Count('pk', filter=Q(user_id=request.user.pk)))
+    likes = {like['comment_id']: like for like in likes}
+
+    for comment in comments:
+        like = likes.get(comment.pk, {'count': 0, 'liked': 0})
+        comment.reply_count = reply_counts.get(comment.pk, 0)
+        comment.like_count = like['count']
+        comment.liked = like['liked'] > 0
+
+
+def toggle_like(user, comment):
+    """
+    Likes the comment, or takes the like back if the user already liked it. Returns whether it's liked now.
+
+    Taking the like back is a single DELETE, and liking is an insert that is ignored if a concurrent
+    request already liked it.
+    """
+    deleted, _ = CommentFlag.objects.filter(comment=comment, user=user, flag=LIKEDIT_FLAG).delete()
+    if deleted:
+        return False
+
+    # bulk_create skips `CommentFlag.save`, which is where the flag date is set otherwise.
+    CommentFlag.objects.bulk_create([CommentFlag(comment=comment, user=user, flag=LIKEDIT_FLAG,
+                                                 flag_date=timezone.now())],
+                                    ignore_conflicts=True)
+    CommentFlag.objects.filter(comment=comment, user=user, flag=DISLIKEDIT_FLAG).delete()
+    return True
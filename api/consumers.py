@@ -0,0 +1,138 @@
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.exceptions import StopConsumer
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from chat import presence
+from meda.utils import get_user_group_name, parse_group_name, with_stream, USER_STREAM, MOOGT_STREAM, \
+    CONVERSATION_STREAM
+from .enums import STREAM_EVENT
+
+
+class StreamConsumer(AsyncJsonWebsocketConsumer):
+    """
+    A single multiplexed connection per client.
+
+    The client is always subscribed to its own user stream (e.g. 'user.42'), and can
+    subscribe to and unsubscribe from moogt and conversation streams (e.g. 'moogt.7',
+    'conversation.3') by sending {"type": "subscribe", "stream": "moogt.7"}. Every event
+    sent to the client carries the stream it belongs to.
+    """
+
+    # The maximum number of streams a single connection can be subscribed to.
+    MAX_STREAMS = 50
+
+    async def connect(self):
+        """
+        Called when the websocket is handshaking as part of initial connection.
+        """
+        user = self.scope['user']
+        # Are they logged in?
+        if user.is_anonymous:
+            # Reject the connection
+            await self.close()
+        else:
+            self.streams = set()
+            await self.subscribe(get_user_group_name(user.id))
+            # Accept the connection
+            await self.accept()
+            await sync_to_async(presence.user_connected)(user.id)
+
+    async def disconnect(self, close_code):
+        if hasattr(self, 'streams'):
+            for stream in self.streams:
+                await self.channel_layer.group_discard(
+                    group=stream,
+                    channel=self.channel_name
+                )
+            await sync_to_async(presence.user_disconnected)(self.scope['user'].id)
+        raise StopConsumer()
+
+    async def receive_json(self, content, **kwargs):
+        event_type = content.get('type')
+        stream = content.get('stream')
+
+        if event_type == STREAM_EVENT.subscribe:
+            if len(self.streams) >= self.MAX_STREAMS:
+                await self.send_error(stream, 'Too many subscriptions.')
+            elif not await self.can_subscribe(stream):
+                await self.send_error(stream, 'You cannot subscribe to this stream.')
+            else:
+                await self.subscribe(stream)
+                await self.send_json({'event_type': STREAM_EVENT.subscribed, 'stream': stream})
+
+        elif event_type == STREAM_EVENT.unsubscribe:
+            # The user stream lives as long as the connection.
+            if stream in self.streams and stream != get_user_group_name(self.scope['user'].id):
+                await self.unsubscribe(stream)
+                await self.send_json({'event_type': STREAM_EVENT.unsubscribed, 'stream': stream})
+
+        elif event_type == STREAM_EVENT.heartbeat:
+            await sync_to_async(presence.user_heartbeat)(self.scope['user'].id)
+
+        elif event_type == STREAM_EVENT.start_is_typing:
+            if stream in self.streams and await self.can_type(stream):
+                await self.channel_layer.group_send(stream, with_stream(stream, {
+                    'type': 'receive_group_message',
+                    'user_id': self.scope['user'].id,
+                    'event_type': STREAM_EVENT.user_is_typing
+                }))
+
+    async def receive_group_message(self, event):
+        # Remove the type key
+        event.pop('type', None)
+
+        # Conversation events are sent to the user stream and to the conversation stream, a connection
+        # subscribed to both gets them once, on the conversation stream.
+        conversation_stream = event.pop('conversation_stream', None)
+        if conversation_stream in self.streams and event.get('stream') != conversation_stream:
+            return
+
+        # Send message to WebSocket
+        await self.send_json(content=event)
+
+    async def subscribe(self, stream):
+        await self.channel_layer.group_add(
+            group=stream,
+            channel=self.channel_name
+        )
+        self.streams.add(stream)
+
+    async def unsubscribe(self, stream):
+        await self.channel_layer.group_discard(
+            group=stream,
+            channel=self.channel_name
+        )
+        self.streams.discard(stream)
+
+    async def send_error(self, stream, detail):
+        await self.send_json({'event_type': STREAM_EVENT.error, 'stream': stream, 'detail': detail})
+
+    @database_sync_to_async
+    def can_subscribe(self, stream):
+        from chat.models import Participant
+        from moogts.models import Moogt
+
+        kind, object_id = parse_group_name(stream)
+        user = self.scope['user']
+
+        if kind == USER_STREAM:
+            return object_id == user.id
+        elif kind == MOOGT_STREAM:
+            return Moogt.objects.filter(pk=object_id).exists()
+        elif kind == CONVERSATION_STREAM:
+            return Participant.objects.filter(conversation_id=object_id, user=user).exists()
+        return False
+
+    @database_sync_to_async
+    def can_type(self, stream):
+        from moogts.models import Moogt
+
+        kind, object_id = parse_group_name(stream)
+        user = self.scope['user']
+
+        if kind == MOOGT_STREAM:
+            moogt = Moogt.objects.filter(pk=object_id).first()
+            return moogt is not None and moogt.func_is_participant(user) and moogt.func_is_current_turn(user)
+        # Only participants can subscribe to a conversation stream.
+        return kind == CONVERSATION_STREAM
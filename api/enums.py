@@ -1,5 +1,7 @@
 from enum import Enum
 
+from model_utils import Choices
+
 
 class Visibility(Enum):
     PUBLIC = 'To the public'
@@ -28,4 +30,20 @@ class InvitationType(Enum):
 
 
 class ShareProvider(Enum):
-    FACEBOOK = 'facebook'
\ No newline at end of file
+    FACEBOOK = 'facebook'
+
+# Events of the multiplexed websocket connection.
+STREAM_EVENT = Choices('subscribe', 'unsubscribe', 'subscribed', 'unsubscribed', 'heartbeat', 'start_is_typing',
+                       'user_is_typing', 'error')
+
+# Types of content that show up on the home feed.
+FEED_ITEM_TYPE = Choices('moogt', 'view', 'poll')
+
+# Types of content that are ranked by the trending snapshots.
+TRENDING_ITEM_TYPE = Choices('moogt', 'view', 'poll')
+
+# The ways content is ranked as trending, see api.trending.
+TRENDING_FACTOR = Choices('score_change', 'overall_score')
+
+# Types of content whose score is recomputed by the scoring worker.
+SCORE_ITEM_TYPE = Choices('moogt', 'view', 'poll', 'argument')
@@ -0,0 +1,240 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from moogts.managers import MoogtQuerySet
+from moogts.models import Moogt
+from polls.managers import PollQuerySet
+from polls.models import Poll
+from users.blocking import get_hidden_users_filter
+from users.models import MoogtMedaUser
+from views.managers import ViewQuerySet
+from views.models import View
+from .enums import FEED_ITEM_TYPE
+from .models import FeedItem
+
+# Content of authors with more followers than this is fanned out by the `fan_out_feed` command rather
+# than while it's published.
+FEED_FANOUT_MAX_FOLLOWERS = getattr(settings, 'FEED_FANOUT_MAX_FOLLOWERS', 5000)
+
+# The number of recent items of an author that are copied to the inbox of a new follower.
+FEED_BACKFILL_SIZE = getattr(settings, 'FEED_BACKFILL_SIZE', 50)
+
+FEED_BATCH_SIZE = 1000
+
+# The number of queued outbox rows that are fanned out per batch of `fan_out_pending_items`.
+FEED_FANOUT_BATCH_SIZE = getattr(settings, 'FEED_FANOUT_BATCH_SIZE', 100)
+
+# The models that show up on the feed and the fields holding their authors.
+FEED_MODELS = {
+    FEED_ITEM_TYPE.moogt: (Moogt, ('proposition', 'opposition', 'moderator')),
+    FEED_ITEM_TYPE.view: (View, ('user',)),
+    FEED_ITEM_TYPE.poll: (Poll, ('user',)),
+}
+
+# The fields, besides the authors, that decide whether the content can be on the feed, see `get_visible_queryset`.
+FEED_VISIBILITY_FIELDS = {
+    FEED_ITEM_TYPE.moogt: ('is_removed', 'started_at', 'is_premiering', 'premiering_date'),
+    FEED_ITEM_TYPE.view: ('is_removed', 'is_draft', 'parent_view_id', 'parent_argument_id'),
+    FEED_ITEM_TYPE.poll: ('is_removed',),
+}
+
+
+def get_feed_item_type(instance):
+    for item_type, (model, _) in FEED_MODELS.items():
+        if isinstance(instance, model):
+            return item_type
+
+
+def get_visible_queryset(item_type):
+    """
+    Returns the content of the given type that can be on the feed.
+
+    The plain querysets are used rather than the default managers, so the checks don't
+    pay for the annotations and eager loading the managers do for serialization.
+    """
+    if item_type == FEED_ITEM_TYPE.moogt:
+        return MoogtQuerySet(Moogt).filter(is_removed=False).get_all_moogts()
+    if item_type == FEED_ITEM_TYPE.view:
+        return ViewQuerySet(View).filter(is_removed=False).get_feed_visible_views()
+    return PollQuerySet(Poll).filter(is_removed=False)
+
+
+def get_author_ids(instance, item_type):
+    _, author_fields = FEED_MODELS[item_type]
+    author_ids = {getattr(instance, f'{field}_id') for field in author_fields}
+    author_ids.discard(None)
+    return author_ids
+
+
+def get_follower_ids(author_id):
+    return MoogtMedaUser.objects.get_follower_ids(author_id).values_list('from_user', flat=True)
+
+
+def get_following_ids(user_id):
+    return MoogtMedaUser.objects.get_following_ids(user_id)
+
+
+def is_feed_item_changed(instance):
+    """
+    Returns whether a save changed the authors of the content or whether it can be on the feed.
+    """
+    item_type = get_feed_item_type(instance)
+    _, author_fields = FEED_MODELS[item_type]
+    if instance.has_changed([f'{field}_id' for field in author_fields] + list(FEED_VISIBILITY_FIELDS[item_type])):
+        return True
+
+    # Reactions without a statement are left out, so it matters whether a view has content but not what it is.
+    return item_type == FEED_ITEM_TYPE.view and instance.has_changed(['content']) and \
+        (instance.content is None) != (instance.get_loaded_value('content') is None)
+
+
+def publish(item_type, item_id, author_id, rank_at):
+    """
+    Writes the outbox row of the author and copies it to the inbox of the author and of their followers.
+    """
+    item = dict(author_id=author_id, item_type=item_type, item_id=item_id, rank_at=rank_at)
+    FeedItem.objects.bulk_create([FeedItem(user_id=None, **item), FeedItem(user_id=author_id, **item)],
+                                 ignore_conflicts=True)
+    fan_out_or_queue(FeedItem(**item))
+
+
+def copy_to_followers(item):
+    follower_ids = get_follower_ids(item.author_id)
+    FeedItem.objects.bulk_create((FeedItem(user_id=user_id,
+                                           author_id=item.author_id,
+                                           item_type=item.item_type,
+                                           item_id=item.item_id,
+                                           rank_at=item.rank_at)
+                                  for user_id in follower_ids.iterator(chunk_size=FEED_BATCH_SIZE)),
+                                 batch_size=FEED_BATCH_SIZE,
+                                 ignore_conflicts=True)
+
+
+def fan_out_or_queue(item):
+    """
+    Copies an outbox row to the inboxes of the followers of the author right away, unless the author
+    has too many followers, in which case it's queued for `fan_out_pending_items`.
+    """
+    if get_follower_ids(item.author_id).count() > FEED_FANOUT_MAX_FOLLOWERS:
+        FeedItem.objects.filter(user=None, author_id=item.author_id, item_type=item.item_type,
+                                item_id=item.item_id).update(is_fanned_out=False, is_pending=True)
+    else:
+        copy_to_followers(item)
+
+
+@transaction.atomic
+def sync_feed_item(instance):
+    """
+    Brings the feed in line with a published, edited or removed piece of content.
+    """
+    item_type = get_feed_item_type(instance)
+    items = FeedItem.objects.filter(item_type=item_type, item_id=instance.pk)
+
+    if not get_visible_queryset(item_type).filter(pk=instance.pk).exists():
+        items.delete()
+        return
+
+    author_ids = get_author_ids(instance, item_type)
+    published_author_ids = set(items.filter(user=None).values_list('author_id', flat=True))
+
+    removed_author_ids = published_author_ids - author_ids
+    if removed_author_ids:
+        # e.g. the moderator of a moogt has left, the rows they brought in are dropped and
+        # the remaining authors are fanned out again to cover followers they have in common.
+        items.filter(author__in=removed_author_ids).delete()
+        for item in items.filter(user=None):
+            fan_out_or_queue(item)
+
+    for author_id in author_ids - published_author_ids:
+        publish(item_type, instance.pk, author_id, instance.created_at)
+
+
+@transaction.atomic
+def fan_out(item_id):
+    """
+    Copies a queued outbox row to the inboxes of the followers of the author and takes it off the queue.
+    Returns whether the row was fanned out, i.e. it was still queued and not taken by another run.
+    """
+    # The lock keeps the content from being taken off the feed while it's copied.
+    item = FeedItem.objects.select_for_update(skip_locked=True).filter(pk=item_id, is_pending=True).first()
+    if item is None:
+        return False
+
+    copy_to_followers(item)
+    FeedItem.objects.filter(pk=item.pk).update(is_fanned_out=True, is_pending=False)
+    return True
+
+
+def fan_out_pending_items(batch_size=FEED_FANOUT_BATCH_SIZE):
+    """
+    Fans out a batch of the queued outbox rows and returns how many were processed.
+
+    A row stays queued until its fan out is committed, so a run that fails is picked up by the next one.
+    """
+    item_ids = list(FeedItem.objects.filter(is_pending=True).order_by('pk').values_list('pk', flat=True)[:batch_size])
+    return sum(fan_out(item_id) for item_id in item_ids)
+
+
+def fan_out_all_pending_items(batch_size=FEED_FANOUT_BATCH_SIZE):
+    count = 0
+    while True:
+        processed = fan_out_pending_items(batch_size)
+        count += processed
+        if processed < batch_size:
+            return count
+
+
+def remove_feed_item(instance):
+    FeedItem.objects.filter(item_type=get_feed_item_type(instance), item_id=instance.pk).delete()
+
+
+def backfill_feed(user_id, author_ids):
+    """
+    Copies the recent content of the newly followed authors to the inbox of the user.
+    """
+    new_items = []
+    for author_id in author_ids:
+        outbox = FeedItem.objects.filter(user=None, author_id=author_id, is_fanned_out=True) \
+            .order_by('-rank_at', '-id')[:FEED_BACKFILL_SIZE]
+        new_items.extend(FeedItem(user_id=user_id,
+                                  author_id=author_id,
+                                  item_type=item.item_type,
+                                  item_id=item.item_id,
+                                  rank_at=item.rank_at) for item in outbox)
+
+    FeedItem.objects.bulk_create(new_items, batch_size=FEED_BATCH_SIZE, ignore_conflicts=True)
+
+
+@transaction.atomic
+def unfollow_feed(user_id, author_ids):
+    """
+    Removes the content of the unfollowed authors from the inbox of the user.
+    """
+    items = FeedItem.objects.filter(user_id=user_id, author__in=author_ids)
+    moogt_ids = list(items.filter(item_type=FEED_ITEM_TYPE.moogt).values_list('item_id', flat=True))
+    items.delete()
+
+    if not moogt_ids:
+        return
+
+    # A moogt stays on the feed if another one of its participants is still followed.
+    remaining = FeedItem.objects.filter(Q(author__in=get_following_ids(user_id)) | Q(author=user_id),
+                                        user=None,
+                                        is_fanned_out=True,
+                                        item_type=FEED_ITEM_TYPE.moogt,
+                                        item_id__in=moogt_ids)
+    FeedItem.objects.bulk_create([FeedItem(user_id=user_id,
+                                           author_id=item.author_id,
+                                           item_type=item.item_type,
+                                           item_id=item.item_id,
+                                           rank_at=item.rank_at) for item in remaining],
+                                 ignore_conflicts=True)
+
+
+def get_feed_queryset(user):
+    """
+    Returns the feed of the user, i.e. their inbox, without the content of users they have blocked
+    or are blocked by.
+    """
+    return FeedItem.objects.filter(user=user).exclude(get_hidden_users_filter(user, 'author'))
@@ -0,0 +1,18 @@
+from rest_framework import filters
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    A search filter that goes through the `filter_using_search_term` of the queryset rather than
+    `icontains` lookups on the view's `search_fields`, so it's backed by the full text indexes on postgres.
+
+    Views can pass extra arguments to `filter_using_search_term` through `search_term_kwargs`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        if not search_terms:
+            return queryset
+
+        return queryset.filter_using_search_term(' '.join(search_terms),
+                                                 **getattr(view, 'search_term_kwargs', {}))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.feed import FEED_FANOUT_BATCH_SIZE, fan_out_all_pending_items
+
+
+class Command(BaseCommand):
+    help = 'Copies the newly published content to the feed inboxes of the followers of its authors. ' \
+           'Meant to run every minute or so.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=FEED_FANOUT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Fanned out {fan_out_all_pending_items(options["batch_size"])} feed items.')
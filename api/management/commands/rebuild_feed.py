@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from api.enums import FEED_ITEM_TYPE
+from api.feed import FEED_BATCH_SIZE, fan_out_all_pending_items, get_visible_queryset, sync_feed_item
+from api.models import FeedItem
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the materialized home feed from the existing moogts, views and polls.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help='Delete the existing feed items first.')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            FeedItem.objects.all().delete()
+
+        for item_type, _ in FEED_ITEM_TYPE:
+            count = 0
+            for instance in get_visible_queryset(item_type).iterator(chunk_size=FEED_BATCH_SIZE):
+                sync_feed_item(instance)
+                count += 1
+            self.stdout.write(f'Synced {count} {item_type} feed items.')
+
+        self.stdout.write(f'Fanned out {fan_out_all_pending_items()} feed items.')
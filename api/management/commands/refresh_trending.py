@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.trending import refresh_trending_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the trending ranks of moogts, views and polls. Meant to run every few minutes.'
+
+    def handle(self, *args, **options):
+        for (factor_type, item_type), count in refresh_trending_snapshots().items():
+            self.stdout.write(f'Ranked {count} {item_type} items by {factor_type}.')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from api.scoring import SCORE_UPDATE_BATCH_SIZE, update_all_dirty_scores
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the scores of the content that got reactions since the last run. ' \
+           'Meant to run every minute or so.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=SCORE_UPDATE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        for item_type, count in update_all_dirty_scores(options['batch_size']).items():
+            self.stdout.write(f'Rescored {count} {item_type} items.')
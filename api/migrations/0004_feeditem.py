@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0003_alter_sharestats_id_alter_tag_id_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_type', models.CharField(choices=[('moogt', 'moogt'), ('view', 'view'), ('poll', 'poll')], max_length=10)),
+                ('item_id', models.PositiveIntegerField()),
+                ('rank_at', models.DateTimeField()),
+                ('is_fanned_out', models.BooleanField(default=True)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='feed_items', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-rank_at', '-id'], name='feed_item_inbox_idx'), models.Index(fields=['author', '-rank_at', '-id'], name='feed_item_outbox_idx'), models.Index(fields=['item_type', 'item_id'], name='feed_item_content_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='feeditem',
+            constraint=models.UniqueConstraint(fields=('user', 'item_type', 'item_id'), name='feed_item_unique_inbox_item'),
+        ),
+        migrations.AddConstraint(
+            model_name='feeditem',
+            constraint=models.UniqueConstraint(condition=models.Q(('user__isnull', True)), fields=('author', 'item_type', 'item_id'), name='feed_item_unique_outbox_item'),
+        ),
+    ]
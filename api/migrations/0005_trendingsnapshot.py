@@ -0,0 +1,33 @@
+# Generated by Django 4.2.5 on 2026-10-19 06:11
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_feeditem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_type', models.CharField(choices=[('moogt', 'moogt'), ('view', 'view'), ('poll', 'poll')], max_length=10)),
+                ('item_id', models.PositiveIntegerField()),
+                ('factor_type', models.CharField(choices=[('score_change', 'score_change'), ('overall_score', 'overall_score')], max_length=15)),
+                ('rank', models.PositiveIntegerField()),
+                ('factor', models.FloatField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['factor_type', 'item_type', 'rank'], name='trending_snapshot_rank_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='trendingsnapshot',
+            constraint=models.UniqueConstraint(fields=('factor_type', 'item_type', 'item_id'), name='trending_snapshot_unique_item'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.5 on 2026-10-19 06:18
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_trendingsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirtyScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_type', models.CharField(choices=[('moogt', 'moogt'), ('view', 'view'), ('poll', 'poll'), ('argument', 'argument')], max_length=10)),
+                ('item_id', models.PositiveIntegerField()),
+                ('marked_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='dirtyscore',
+            constraint=models.UniqueConstraint(fields=('item_type', 'item_id'), name='dirty_score_unique_item'),
+        ),
+    ]
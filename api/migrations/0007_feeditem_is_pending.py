@@ -0,0 +1,22 @@
+# Generated by Django 4.2.5 on 2026-10-19 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_dirtyscore'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feeditem',
+            name='is_pending',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='feeditem',
+            index=models.Index(condition=models.Q(('is_pending', True)), fields=['id'], name='feed_item_pending_idx'),
+        ),
+    ]
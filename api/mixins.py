@@ -4,33 +4,32 @@ import rest_framework
 from django.core.mail import mail_admins
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
-from django.contrib.sites.shortcuts import get_current_site
-from django.db import transaction
-from django.db.models import ExpressionWrapper, F, FloatField, Count, Exists, \
-    OuterRef, Q, DecimalField, DateTimeField
-from django.db.models.functions import Cast
+from django.db import IntegrityError, transaction
+from django.db.models import F, Count, Exists, Max, OuterRef, Q, Prefetch
 from django.shortcuts import get_object_or_404
-from django.utils import timezone
 from django_comments_xtd.forms import XtdCommentForm
 from django_comments_xtd.models import XtdComment
-from django_comments_xtd.views import perform_like, perform_dislike
+from django_comments.models import CommentFlag
+from django_comments_xtd.views import perform_dislike
 from django.template.loader import render_to_string
 from open_facebook import OpenFacebook
 from rest_framework.exceptions import ValidationError
 
 from api.signals import reaction_was_made
-from api.utils import get_admin_url
-from arguments.models import Argument, ArgumentImage, ArgumentReactionType
+from api.utils import get_admin_url, toggle_relation
+from arguments.models import Argument, ArgumentImage, ArgumentReactionType, ArgumentStats
 from meda.enums import ActivityStatus
-from meda.models import BaseReport, Score
+from meda.models import BaseReport
 from polls.models import Poll
 from moogts.models import Moogt, MoogtActivity, MoogtActivityBundle, MoogtActivityType
 from notifications.models import Notification, NOTIFICATION_TYPES
 from notifications.signals import notify
-from users.models import MoogtMedaUser
+from users.models import MoogtMedaUser, Follow
+from views.managers import ViewQuerySet
 from views.models import View, ViewImage
-from .enums import ReactionType, ViewType, Visibility
-from .expressions import Epoch
+from .comments import get_public_comments, get_replies_filter, toggle_like
+from .enums import ReactionType, ViewType, Visibility, TRENDING_FACTOR
+from .trending import annotate_trending_rank
 
 
 class CreateImageMixin(object):
@@ -54,16 +53,11 @@ class CreateImageMixin(object):
 class ApplaudMixin(object):
     @staticmethod
     def maybe_applaud(obj, user):
-        obj_stats = obj.stats
-        has_applauded = False
-        if not obj_stats.applauds.filter(id=user.id).exists():
-            obj_stats.applauds.add(user)
-            has_applauded = True
-        else:
-            obj_stats.applauds.remove(user)
+        has_applauded, changed = toggle_relation(obj.stats.applauds, user, 'applaud_count')
 
-        reaction_was_made.send(sender=__class__, obj=obj,
-                               type=ReactionType.APPLAUD.name)
+        if changed:
+            reaction_was_made.send(sender=__class__, obj=obj,
+                                   type=ReactionType.APPLAUD.name)
         return has_applauded
 
 
@@ -89,7 +83,6 @@ class ViewArgumentReactionMixin(CreateImageMixin, object):
     def get_reacting_users(self, request, obj):
         reaction_type = request.query_params.get('type')
         moogter_reactions = None
-        user_query = MoogtMedaUser.objects.none()
         if reaction_type and reaction_type not in [ReactionType.ENDORSE.name,
                                                    ReactionType.DISAGREE.name,
                                                    ReactionType.APPLAUD.name]:
@@ -104,25 +97,37 @@ class ViewArgumentReactionMixin(CreateImageMixin, object):
                 reactions = obj.view_reactions
 
             user_ids = reactions.filter(
-                reaction_type=reaction_type).values_list('user', flat=True)
+                reaction_type=reaction_type).values('user')
+            reacting_users = Q(id__in=user_ids)
 
             if moogter_reactions:
                 rxn_type = ArgumentReactionType.ENDORSEMENT.name if reaction_type == ReactionType.ENDORSE.name else ArgumentReactionType.DISAGREEMENT.name
                 moogter_ids = moogter_reactions.filter(
-                    reaction_type=rxn_type).values_list('user', flat=True)
-                user_query = MoogtMedaUser.objects.filter(id__in=moogter_ids)
+                    reaction_type=rxn_type).values('user')
+                reacting_users |= Q(id__in=moogter_ids)
 
-            queryset = MoogtMedaUser.objects.filter(
-                id__in=user_ids) | user_query
+            queryset = MoogtMedaUser.objects.filter(reacting_users)
 
         else:
             queryset = obj.stats.applauds.all()
 
-        queryset = self.sort_by_follower_count_and_following_status(
-            request, queryset)
+        # The users are paged by their stored follower count, see `ReactingUserPagination`.
+        return queryset.order_by('-follower_count', '-id')
 
-        return queryset
+    @staticmethod
+    def load_following_status(request, users):
+        """
+        Sets the follower count and whether the viewer is following them on a page of users,
+        with one query for the page.
+        """
+        following = set(Follow.objects.filter(from_user_id=request.user.id, to_user_id__in=[user.pk for user in users])
+                        .values_list('to_user_id', flat=True))
+        for user in users:
+            user.followers_count = user.follower_count
+            user.is_following = user.pk in following
+        return users
 
+    @transaction.atomic
     def react(self, request, obj, view_type):
         data = {
             'type': view_type,
@@ -139,21 +144,24 @@ class ViewArgumentReactionMixin(CreateImageMixin, object):
             data['parent_argument'] = obj
 
         reaction_view = None
+        reaction_type = request.data['type']
+        opposing_reaction_type = self.get_opposing_reaction_type(reaction_type)
+        # The user's existing reactions to the object, the guards below are checked against them.
+        reactions = self.get_user_reactions(obj, reaction_type, view_type, request.user)
 
         # Make sure the object has no opposing reactions.
-        if not self.has_opposing_reactions(obj, request.data['type'], view_type, request.user):
+        if not reactions['opposing_count']:
             # If reaction without statements exists, try update it or remove it.
-            if self.has_reaction_without_statement(obj, request.data['type'], view_type, request.user):
-                reaction_without_statement = self.get_reaction_without_statement(obj,
-                                                                                 request.data['type'],
-                                                                                 view_type,
-                                                                                 request.user)
+            if reactions['without_statement_id']:
+                reaction_without_statement = self.get_reaction_by_id(reactions['without_statement_id'])
                 # This means the reaction is to toggle your already existing reactions, i.e., remove it.
                 if not request.data.get('content', None):
                     # remove the created notification
                     self.remove_notification(reaction_without_statement)
                     # remove the toggled reaction without statement
                     reaction_without_statement.delete()
+                    if reactions['count'] == 1:
+                        self.update_reaction_count(obj, reaction_type, -1)
                     if view_type == ViewType.ARGUMENT_REACTION.name and obj.moogt.get_opponent(
                             request.user) == obj.user:
                         # delete the status argument object if moogter is un-reacting to an argument of an opponent
@@ -168,16 +176,16 @@ class ViewArgumentReactionMixin(CreateImageMixin, object):
                     reaction_view = self.update_a_view(
                         reaction_without_statement, data)
 
-            elif self.has_reaction_with_statement(obj, request.data['type'], view_type, request.user) \
-                    and not request.data.get('content', None):
+            elif reactions['with_statement_count'] and not request.data.get('content', None):
                 raise ValidationError(
                     "You can not react with out statement on a view that already has reaction with statements.")
 
             else:
                 # If the reaction has no opposing reaction and no reaction without a statement,
                 # Just create a new reaction view.
-                reaction_view = self.create_a_view(data, request.user)
-                if view_type == ViewType.ARGUMENT_REACTION.name and obj.moogt.get_opponent(request.user) == obj.user:
+                reaction_view, created = self.create_reaction(data, request.user)
+                if created and view_type == ViewType.ARGUMENT_REACTION.name and \
+                        obj.moogt.get_opponent(request.user) == obj.user:
                     # create an activity object if moogter is reacting to an argument of an opponent
                     activity = MoogtActivity.objects.create(moogt=obj.moogt,
                                                             user=request.user,
@@ -190,25 +198,22 @@ class ViewArgumentReactionMixin(CreateImageMixin, object):
 
         # The view has opposing reaction.
         else:
-            opposing_reaction_type = self.get_opposing_reaction_type(
-                request.data['type'])
             # Check if the object has an opposing reaction without a statement.
-            if self.has_reaction_without_statement(obj, opposing_reaction_type, view_type, request.user):
+            if reactions['opposing_without_statement_id']:
                 if request.data.get('content', None) is not None:
                     raise ValidationError(
                         f"There is an existing {request.data.get('type')} without statement reaction that \
                             has to be toggled first to make this request.")
 
-                opp_rxn_without_statement = self.get_reaction_without_statement(obj,
-                                                                                opposing_reaction_type,
-                                                                                view_type,
-                                                                                request.user)
+                opp_rxn_without_statement = self.get_reaction_by_id(reactions['opposing_without_statement_id'])
 
                 # delete notification for opposing reaction with statement
                 self.remove_notification(
                     opp_rxn_without_statement, opposite=True)
                 # Toggle the opposing reaction without statement and create one with opposing type
                 opp_rxn_without_statement.delete()
+                if reactions['opposing_count'] == 1:
+                    self.update_reaction_count(obj, opposing_reaction_type, -1)
 
                 # if user is a moogter toggle the MoogtActivity creation
                 if view_type == ViewType.ARGUMENT_REACTION.name and obj.moogt.get_opponent(request.user) == obj.user:
@@ -235,10 +240,7 @@ class ViewArgumentReactionMixin(CreateImageMixin, object):
                     f"You must provide a statement to your {request.data.get('type')} reaction.")
 
             # Create a new reaction view as well.
-            reaction_view = self.create_a_view(data, request.user)
-
-        if isinstance(obj, Argument):
-            self.update_argument(obj)
+            reaction_view, _ = self.create_reaction(data, request.user)
 
         reaction_was_made.send(__class__, obj=obj, type=request.data['type'])
 
@@ -249,40 +251,76 @@ class ViewArgumentReactionMixin(CreateImageMixin, object):
         return ReactionType.DISAGREE.name if reaction_type == ReactionType.ENDORSE.name else ReactionType.ENDORSE.name
 
     @staticmethod
-    def has_opposing_reactions(obj, reaction_type, view_type, user):
-        opposing_reaction_type = ViewArgumentReactionMixin.get_opposing_reaction_type(
-            reaction_type)
-        if view_type == ViewType.VIEW_REACTION.name:
-            return obj.view_reactions.filter(reaction_type=opposing_reaction_type, user=user).count() > 0
-        elif view_type == ViewType.ARGUMENT_REACTION.name:
-            return obj.argument_reactions.filter(reaction_type=opposing_reaction_type, user=user).count() > 0
+    def get_parent_field(view_type):
+        return 'parent_view' if view_type == ViewType.VIEW_REACTION.name else 'parent_argument'
 
     @staticmethod
-    def has_reaction_without_statement(obj, reaction_type, view_type, user):
-        return ViewArgumentReactionMixin.reaction_without_statement_query(obj, reaction_type,
-                                                                          view_type,
-                                                                          user).count() > 0
+    def get_user_reactions(obj, reaction_type, view_type, user):
+        """
+        Counts the user's reactions to the object that the reaction guards look at, in a single query.
+        The ids of the reactions without a statement are included so they are only fetched when toggled.
+        """
+        opposing_reaction_type = ViewArgumentReactionMixin.get_opposing_reaction_type(reaction_type)
+        parent_field = ViewArgumentReactionMixin.get_parent_field(view_type)
+        with_statement = Q(type=view_type, content__isnull=False)
+        without_statement = Q(type=view_type, content__isnull=True)
+
+        return ViewQuerySet(View).filter(is_removed=False, user=user, **{parent_field: obj}).aggregate(
+            count=Count('pk', filter=Q(reaction_type=reaction_type)),
+            opposing_count=Count('pk', filter=Q(reaction_type=opposing_reaction_type)),
+            with_statement_count=Count('pk', filter=with_statement & Q(reaction_type=reaction_type)),
+            without_statement_id=Max('pk', filter=without_statement & Q(reaction_type=reaction_type)),
+            opposing_without_statement_id=Max('pk', filter=without_statement & Q(
+                reaction_type=opposing_reaction_type)))
 
     @staticmethod
-    def has_reaction_with_statement(obj, reaction_type, view_type, user):
-        return ViewArgumentReactionMixin.reaction_with_statement_query(obj, reaction_type, view_type, user).count() > 0
+    def get_reaction_by_id(reaction_id):
+        return ViewQuerySet(View).select_related('user', 'parent_view', 'parent_argument').get(pk=reaction_id)
 
-    @staticmethod
-    def get_reaction_without_statement(obj, reaction_type, view_type, user):
-        return ViewArgumentReactionMixin.reaction_without_statement_query(obj, reaction_type, view_type, user).first()
+    def create_reaction(self, data, user):
+        """
+        Creates the reaction, or returns the user's existing one if a concurrent request already made
+        the same reaction without a statement. Returns the reaction and whether it was created.
 
-    @staticmethod
-    def reaction_without_statement_query(obj, reaction_type, view_type, user):
-        if view_type == ViewType.VIEW_REACTION.name:
-            return obj.view_reactions.filter(type=view_type,
+        The user is added to the reaction count of an argument only if it's their first reaction of the
+        type. The stats of the argument are locked first, so concurrent reactions of a user wait for
+        each other and only the first one of them counts the user.
+        """
+        parent_field = self.get_parent_field(data['type'])
+        if parent_field == 'parent_argument':
+            ArgumentStats.objects.select_for_update().filter(argument=data[parent_field]).first()
+
+        try:
+            reaction_view = self.create_a_view(data, user)
+        except IntegrityError:
+            return ViewQuerySet(View).filter(is_removed=False,
+                                             user=user,
+                                             type=data['type'],
+                                             reaction_type=data['reaction_type'],
                                              content__isnull=True,
-                                             reaction_type=reaction_type,
-                                             user=user)
-        elif view_type == ViewType.ARGUMENT_REACTION.name:
-            return obj.argument_reactions.filter(type=view_type,
-                                                 content__isnull=True,
-                                                 reaction_type=reaction_type,
-                                                 user=user)
+                                             **{parent_field: data[parent_field]}).first(), False
+
+        if parent_field == 'parent_argument' and not ViewQuerySet(View).filter(
+                is_removed=False,
+                user=user,
+                reaction_type=data['reaction_type'],
+                parent_argument=data[parent_field]).exclude(pk=reaction_view.pk).exists():
+            self.update_reaction_count(reaction_view.parent, data['reaction_type'], 1)
+        return reaction_view, True
+
+    @staticmethod
+    def update_reaction_count(obj, reaction_type, delta):
+        """
+        Adds delta to the number of users with a reaction of the given type to an argument.
+        """
+        if not isinstance(obj, Argument):
+            return
+
+        field = 'endorsement_count' if reaction_type == ReactionType.ENDORSE.name else 'disagreement_count'
+        updated = ArgumentStats.objects.filter(argument=obj).update(**{field: F(field) + delta})
+        if not updated:
+            # The stats are created on first access, so there is nothing to add to yet.
+            ViewArgumentReactionMixin.update_argument(obj)
 
     @staticmethod
     def get_notification_types(rxn_without_statement):
@@ -311,19 +349,6 @@ class ViewArgumentReactionMixin(CreateImageMixin, object):
             return MoogtActivityType.ENDORSEMENT.name
         return MoogtActivityType.DISAGREEMENT.name
 
-    @staticmethod
-    def reaction_with_statement_query(obj, reaction_type, view_type, user):
-        if view_type == ViewType.VIEW_REACTION.name:
-            return obj.view_reactions.filter(type=view_type,
-                                             content__isnull=False,
-                                             reaction_type=reaction_type,
-                                             user=user)
-        elif view_type == ViewType.ARGUMENT_REACTION.name:
-            return obj.argument_reactions.filter(type=view_type,
-                                                 content__isnull=False,
-                                                 reaction_type=reaction_type,
-                                                 user=user)
-
     @transaction.atomic
     def create_a_view(self, data, user):
         data['user'] = user
@@ -434,57 +459,23 @@ class ViewArgumentReactionMixin(CreateImageMixin, object):
         argument.stats.disagreement_count = argument.dis_count
         argument.stats.save()
 
-    @ staticmethod
-    def sort_by_follower_count_and_following_status(request, queryset):
-
-        subquery = request.user.followings.filter(id=OuterRef('pk'))
-
-        queryset = queryset.annotate(
-            # The number of followers for each individual user.
-            followers_count=Count('follower'),
-            followed=Exists(subquery)
-        ).order_by('-followers_count', '-followed')
-
-        return queryset
-
 
 class TrendingMixin(object):
     # This is to limit the trending items.
     TRENDING_LIMIT = 100
 
     def get_trending_factor_queryset(self, queryset):
-        # This is used for getting the score of the item and the result will be a FloatField type.
-        score_expression = ExpressionWrapper(F('score__score_now') - F('score__score_before'),
-                                             output_field=FloatField())
-
-        # Annotate each view with a trending_factor field and use that to sort the views in reverse order.
-        # The trending_factor is the rate of change of score over a certain period of time.
-        # A higher trending_score means a view is trending.
-        trending_queryset = queryset.annotate(
-            trending_factor=ExpressionWrapper(
-                score_expression * 1.0 / Score.TRENDING_DURATION_HOURS,
-                output_field=FloatField()
-            )
-        ).filter(
-            score__score_now__gte=Score.TRENDING_MINIMUM_SCORE
-        ).order_by('-trending_factor')
-
-        return trending_queryset[:self.TRENDING_LIMIT]
+        # The items are ranked by the rate of change of their score over the trending period,
+        # see api.trending for how the snapshot is computed.
+        return annotate_trending_rank(queryset, TRENDING_FACTOR.score_change).filter(
+            trending_rank__isnull=False
+        ).order_by('trending_rank')[:self.TRENDING_LIMIT]
 
     def get_overall_score_trending_factor_queryset(self, queryset):
-        duration = Epoch((F('now') - F('created_at')))
-
-        queryset = queryset.annotate(
-            now=Cast(timezone.now(), DateTimeField()),
-            duration=duration,
-            trending_factor=ExpressionWrapper(
-                # the 10 ^ 6 * 3600 * 24 * 30 multiplication is to convert micro second duration to months
-                (F('score__overall_score') * 1_000_000 * \
-                 3600 * 24 * 30) / F('duration'),
-                output_field=DecimalField()
-            )).order_by(F('trending_factor').desc(nulls_last=True))
-
-        return queryset
+        # The items are ranked by their overall score per month of their age. Items that are not in
+        # the snapshot, e.g. created since it was taken, come last.
+        return annotate_trending_rank(queryset, TRENDING_FACTOR.overall_score).order_by(
+            F('trending_rank').asc(nulls_last=True), '-created_at')
 
     def sort_queryset_by_popularity(self, queryset):
         return queryset.order_by(F('score__overall_score').desc(nulls_last=True))
@@ -541,22 +532,28 @@ class CommentMixin(object):
         return serializer.data
 
     def get_comments(self, request, obj):
+        """
+        The top level comments of the object. Their replies are loaded per thread with `get_replies`.
+        """
         content_type = ContentType.objects.get_for_model(obj)
 
-        return XtdComment \
-            .objects \
-            .filter(
-                content_type=content_type,
-                object_pk=obj.pk,
-                site__pk=get_current_site(request).pk,
-                is_public=True,
-                is_removed=False
-            ).order_by('-submit_date').select_related('user', 'user__profile')
+        return get_public_comments(request) \
+            .filter(content_type=content_type, object_pk=obj.pk, level=0) \
+            .order_by('-submit_date') \
+            .select_related('user', 'user__profile') \
+            .prefetch_related(Prefetch('flags', queryset=CommentFlag.objects.select_related('user')))
+
+    def get_replies(self, request, comment):
+        return get_public_comments(request) \
+            .filter(get_replies_filter([comment.pk])) \
+            .order_by('-submit_date') \
+            .select_related('user', 'user__profile') \
+            .prefetch_related(Prefetch('flags', queryset=CommentFlag.objects.select_related('user')))
 
     def like_comment(self, request, comment):
         from .serializers import CommentNotificationSerializer
 
-        liked = perform_like(request, comment)
+        liked = toggle_like(request.user, comment)
 
         if isinstance(comment.content_object, XtdComment):
             data = {
@@ -808,6 +805,8 @@ class SortCategorizeFilterMixin(TrendingMixin):
             queryset = queryset.order_by('-created_at')
         elif sort_by == 'popularity':
             queryset = self.sort_queryset_by_popularity(queryset)
+        elif sort_by == 'relevance' and search_term:
+            queryset = queryset.order_by('-search_rank', '-created_at')
 
         return queryset
 
@@ -827,6 +826,8 @@ class SortCategorizeFilterMixin(TrendingMixin):
 
         if sort_by == "date":
             queryset = queryset.order_by('-created_at')
+        elif sort_by == 'relevance' and search_term:
+            queryset = queryset.order_by('-search_rank', '-created_at')
         else:
             queryset = self.get_trending_factor_queryset(queryset)
 
@@ -857,6 +858,8 @@ class SortCategorizeFilterMixin(TrendingMixin):
             queryset = queryset.order_by("-created_at")
         elif sort_by == 'popularity':
             queryset = queryset.order_by('-followers_count')
+        elif sort_by == 'relevance' and search_term:
+            queryset = queryset.order_by('-search_rank', '-created_at')
 
         return queryset
 
@@ -883,6 +886,8 @@ class SortCategorizeFilterMixin(TrendingMixin):
             return self.get_trending_factor_queryset(queryset)
         elif sort_by == 'popularity':
             return self.sort_queryset_by_popularity(queryset)
+        elif sort_by == 'relevance' and search_term:
+            return queryset.order_by('-search_rank', '-created_at')
 
         return queryset
 
@@ -895,7 +900,7 @@ class SortCategorizeFilterMixin(TrendingMixin):
             queryset = queryset.filter_using_search_term(search_term)
 
         if self.request.user:
-            subquery = self.request.user.followings.filter(id=OuterRef('pk'))
+            subquery = Follow.objects.filter(from_user=self.request.user, to_user=OuterRef('pk'))
             queryset = queryset.annotate(follows_user=Exists(subquery))
             if category == 'subscribed':
                 queryset = queryset.filter(follows_user=True)
@@ -906,6 +911,8 @@ class SortCategorizeFilterMixin(TrendingMixin):
             queryset = queryset.order_by('-date_joined')
         elif sort_by == 'popularity':
             queryset = queryset.order_by('-followers_count')
+        elif sort_by == 'relevance' and search_term:
+            queryset = queryset.order_by('-search_rank', '-date_joined')
 
         return queryset
 
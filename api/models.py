@@ -1,8 +1,9 @@
 from django.contrib.contenttypes.fields import (GenericForeignKey)
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.utils import timezone
 
-from .enums import ShareProvider
+from .enums import ShareProvider, FEED_ITEM_TYPE, TRENDING_ITEM_TYPE, TRENDING_FACTOR, SCORE_ITEM_TYPE
 
 
 class Tag(models.Model):
@@ -37,3 +38,104 @@ class TelegramChatToUser(models.Model):
 
     class Meta:
         unique_together = ('chat_id', 'user')
+
+
+class FeedItem(models.Model):
+    """
+    An entry of the materialized home feed.
+
+    When content is published a row is written to the inbox of the author and of each of the author's
+    followers, so reading the feed is a single range scan over (user, rank_at). Every author also gets an
+    outbox row (user is NULL) per item, which is used to backfill the inbox of new followers.
+
+    The content of authors with too many followers is queued instead, and copied to the inboxes of the
+    followers by the `fan_out_feed` command.
+    """
+    # The owner of the inbox. NULL for outbox rows of the author.
+    user = models.ForeignKey('users.MoogtMedaUser',
+                             related_name='feed_items',
+                             null=True,
+                             on_delete=models.CASCADE)
+
+    # The user whose content this is, i.e. the one the owner of the inbox is following.
+    author = models.ForeignKey('users.MoogtMedaUser',
+                               related_name='+',
+                               on_delete=models.CASCADE)
+
+    item_type = models.CharField(max_length=10, choices=FEED_ITEM_TYPE)
+    item_id = models.PositiveIntegerField()
+
+    # The time used to order the feed, which is the creation time of the content.
+    rank_at = models.DateTimeField()
+
+    # Whether or not this outbox row has been copied to the inboxes of the followers.
+    is_fanned_out = models.BooleanField(default=True)
+
+    # Whether or not this outbox row is queued to be fanned out.
+    is_pending = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'item_type', 'item_id'],
+                                    name='feed_item_unique_inbox_item'),
+            models.UniqueConstraint(fields=['author', 'item_type', 'item_id'],
+                                    condition=models.Q(user__isnull=True),
+                                    name='feed_item_unique_outbox_item'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-rank_at', '-id'], name='feed_item_inbox_idx'),
+            models.Index(fields=['author', '-rank_at', '-id'], name='feed_item_outbox_idx'),
+            models.Index(fields=['item_type', 'item_id'], name='feed_item_content_idx'),
+            models.Index(fields=['id'], condition=models.Q(is_pending=True), name='feed_item_pending_idx'),
+        ]
+
+
+class TrendingSnapshot(models.Model):
+    """
+    The precomputed trending rank of a piece of content, written every few minutes by the
+    `refresh_trending` command.
+
+    The trending endpoints order by `rank` instead of computing the trending factor of every scored
+    item on each request.
+    """
+    item_type = models.CharField(max_length=10, choices=TRENDING_ITEM_TYPE)
+    item_id = models.PositiveIntegerField()
+
+    # How the items are ranked.
+    factor_type = models.CharField(max_length=15, choices=TRENDING_FACTOR)
+
+    # The position of the item among the items of the same type, starting at 1.
+    rank = models.PositiveIntegerField()
+
+    factor = models.FloatField()
+
+    # When the snapshot was taken.
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['factor_type', 'item_type', 'item_id'],
+                                    name='trending_snapshot_unique_item'),
+        ]
+        indexes = [
+            models.Index(fields=['factor_type', 'item_type', 'rank'], name='trending_snapshot_rank_idx'),
+        ]
+
+
+class DirtyScore(models.Model):
+    """
+    A piece of content whose score needs to be recomputed, see api.scoring.
+
+    Reactions only insert a row here, which is a no-op if the item is already marked, so an item is
+    rescored at most once per run of the `update_scores` command no matter how many reactions it gets.
+    """
+    item_type = models.CharField(max_length=10, choices=SCORE_ITEM_TYPE)
+    item_id = models.PositiveIntegerField()
+
+    # When the item was first marked since its last rescoring.
+    marked_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['item_type', 'item_id'], name='dirty_score_unique_item'),
+        ]
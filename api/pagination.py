@@ -1,5 +1,14 @@
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
 from drf_multiple_model.pagination import MultipleModelLimitOffsetPagination
-from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class LargeResultsSetPagination(LimitOffsetPagination):
@@ -16,3 +25,149 @@ class SmallResultsSetPagination(LimitOffsetPagination):
 
 class MultiModelLimitOffsetPagination(MultipleModelLimitOffsetPagination):
     default_limit = 3
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginates a queryset by seeking past the last item of the previous page
+    instead of using an offset, so every page costs the same no matter how
+    deep the client has scrolled.
+
+    `ordering` must be a list of non-nullable model fields that uniquely
+    identify a row, e.g. ('-created_at', '-id').
+    """
+    ordering = ('-created_at', '-id')
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    default_limit = 10
+    max_limit = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.limit = self.get_limit(request)
+        self.model = queryset.model
+
+        queryset = queryset.order_by(*self.ordering)
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(position))
+
+        # Fetch an extra item to find out whether there is a following page.
+        results = list(queryset[:self.limit + 1])
+        self.page = results[:self.limit]
+        self.has_next = len(results) > self.limit
+
+        return self.page
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+
+        if limit <= 0:
+            return self.default_limit
+        return min(limit, self.max_limit)
+
+    def get_keyset_filter(self, position, ordering=None):
+        """
+        Builds `(a < x) OR (a = x AND b < y) OR ...` for the ordering fields.
+        """
+        keyset_filter = Q()
+        equal_to_previous = {}
+        for field, value in zip(ordering or self.ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            keyset_filter |= Q(**equal_to_previous, **{f'{name}__{lookup}': value})
+            equal_to_previous[name] = value
+
+        return keyset_filter
+
+    def get_position(self, instance):
+        return [getattr(instance, field.lstrip('-')) for field in self.ordering]
+
+    def encode_cursor(self, instance):
+        position = [value.isoformat() if hasattr(value, 'isoformat') else value
+                    for value in self.get_position(instance)]
+
+        return b64encode(json.dumps(position).encode('ascii')).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            position = json.loads(b64decode(encoded.encode('ascii')).decode('ascii'))
+            if len(position) != len(self.ordering):
+                raise ValueError
+            return [self.model._meta.get_field(field.lstrip('-')).to_python(value)
+                    for field, value in zip(self.ordering, position)]
+        except (TypeError, ValueError, UnicodeError, DjangoValidationError):
+            raise NotFound('Invalid cursor.')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        url = replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+        return replace_query_param(url, self.limit_query_param, self.limit)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data)
+        ]))
+
+
+class FeedPagination(KeysetPagination):
+    ordering = ('-rank_at', '-id')
+
+
+class CountedKeysetPagination(KeysetPagination):
+    """
+    Keeps the `count` and `previous` of the limit/offset pagination a list used to have.
+
+    They are deprecated: the count costs a query over all the items and the previous link one
+    over the items of the previous page, clients should only follow `next`.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.queryset = queryset.order_by(*self.ordering)
+        self.count = queryset.count()
+        self.is_first_page = self.cursor_query_param not in request.query_params
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_previous_link(self):
+        if self.is_first_page or not self.page:
+            return None
+
+        # Walk back from the first item of the page, the previous page starts after the item
+        # before the ones it holds.
+        reverse_ordering = [field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering]
+        before = list(self.queryset.order_by(*reverse_ordering)
+                      .filter(self.get_keyset_filter(self.get_position(self.page[0]), reverse_ordering))
+                      [:self.limit + 1])
+
+        url = replace_query_param(self.base_url, self.limit_query_param, self.limit)
+        if len(before) <= self.limit:
+            return remove_query_param(url, self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(before[-1]))
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+
+class CommentPagination(CountedKeysetPagination):
+    ordering = ('-submit_date', '-id')
+
+
+class ReactingUserPagination(CountedKeysetPagination):
+    ordering = ('-follower_count', '-id')
@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.db import transaction
+
+from arguments.models import Argument
+from moogts.models import Moogt
+from polls.models import Poll
+from views.models import View
+from .enums import SCORE_ITEM_TYPE
+from .models import DirtyScore
+
+# The number of dirty items that are rescored per transaction.
+SCORE_UPDATE_BATCH_SIZE = getattr(settings, 'SCORE_UPDATE_BATCH_SIZE', 500)
+
+SCORE_MODELS = {
+    SCORE_ITEM_TYPE.moogt: Moogt,
+    SCORE_ITEM_TYPE.view: View,
+    SCORE_ITEM_TYPE.poll: Poll,
+    SCORE_ITEM_TYPE.argument: Argument,
+}
+
+
+def get_score_item_type(instance):
+    for item_type, model in SCORE_MODELS.items():
+        if isinstance(instance, model):
+            return item_type
+
+
+def mark_score_dirty(instance):
+    """
+    Queues the item for rescoring. It's a single insert that is ignored if the item is already queued.
+    """
+    DirtyScore.objects.bulk_create([DirtyScore(item_type=get_score_item_type(instance), item_id=instance.pk)],
+                                   ignore_conflicts=True)
+
+
+@transaction.atomic
+def claim_dirty_items(item_type, batch_size=SCORE_UPDATE_BATCH_SIZE):
+    """
+    Deletes a batch of the marks of the given type and returns the ids of their items.
+
+    It's a transaction of its own that commits before the items are rescored, so a reaction marking
+    one of them again only waits for the delete, and the item is queued for the next run.
+    """
+    dirty = DirtyScore.objects.select_for_update(skip_locked=True) \
+        .filter(item_type=item_type).order_by('marked_at')[:batch_size]
+    marks = {mark.pk: mark.item_id for mark in dirty}
+    DirtyScore.objects.filter(pk__in=marks.keys()).delete()
+    return list(marks.values())
+
+
+def update_dirty_scores(item_type, batch_size=SCORE_UPDATE_BATCH_SIZE):
+    """
+    Rescores a batch of the dirty items of the given type and returns how many were rescored.
+    """
+    item_ids = claim_dirty_items(item_type, batch_size)
+    if not item_ids:
+        return 0
+
+    model = SCORE_MODELS[item_type]
+    for instance in model._base_manager.filter(pk__in=item_ids).select_related('score'):
+        instance.score.maybe_update_score()
+
+    return len(item_ids)
+
+
+def update_all_dirty_scores(batch_size=SCORE_UPDATE_BATCH_SIZE):
+    counts = {}
+    for item_type, _ in SCORE_ITEM_TYPE:
+        counts[item_type] = 0
+        while True:
+            count = update_dirty_scores(item_type, batch_size)
+            counts[item_type] += count
+            if count < batch_size:
+                break
+    return counts
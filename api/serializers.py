@@ -5,8 +5,7 @@ from avatar.conf import settings as avatar_settings
 from avatar.models import Avatar
 from avatar.utils import get_default_avatar_url
 from django.conf import settings
-from django.contrib.contenttypes.models import ContentType
-from django.contrib.sites.shortcuts import get_current_site
+from django.db.models.manager import BaseManager
 from django_comments_xtd.api.serializers import ReadCommentSerializer, WriteCommentSerializer
 from django_comments_xtd.models import XtdComment
 from dj_rest_auth.serializers import PasswordResetSerializer
@@ -25,7 +24,9 @@ from users.models import Activity, MoogtMedaUser, PhoneNumber
 from users.serializers import MoogtMedaUserSerializer
 from users.utils import verify_firebase_user
 from .mixins import TrendingMixin
+from .comments import load_comment_stats
 from .models import (Tag)
+from .viewer import get_viewer_context
 
 
 class TagSerializer(SerializerExtensionsMixin, serializers.ModelSerializer):
@@ -182,34 +183,43 @@ class CommentNotificationSerializer(ReadCommentSerializer):
         return obj.content_type.model
 
 
+class CommentListSerializer(serializers.ListSerializer):
+    """
+    Loads the reply counts and likes of the whole page of comments before they are serialized.
+    """
+
+    def to_representation(self, data):
+        comments = list(data.all() if isinstance(data, BaseManager) else data)
+        load_comment_stats(comments, self.context['request'])
+
+        return super().to_representation(comments)
+
+
 class CommentSerializer(ReadCommentSerializer):
     user = MoogtMedaUserSerializer()
     created_at = serializers.SerializerMethodField()
+    reply_count = serializers.SerializerMethodField()
+    like_count = serializers.SerializerMethodField()
+    liked = serializers.SerializerMethodField()
 
     class Meta(ReadCommentSerializer.Meta):
         fields = ReadCommentSerializer.Meta.fields + \
-            ('user', 'created_at', 'user_id', 'thread_id')
-        
+            ('user', 'created_at', 'user_id', 'thread_id', 'reply_count', 'like_count', 'liked')
+        list_serializer_class = CommentListSerializer
 
-    def get_flags(self, obj):
-        flags = super().get_flags(obj)
-        flags['like']['count'] = len(
-            flags['like']['users']) if flags['like']['users'] else 0
-        flags['reply'] = {
-            'count': self.get_replies_count(obj, self.context['request'])
-        }
-        return flags
+    def get_stat(self, obj, name):
+        if not hasattr(obj, name):
+            load_comment_stats([obj], self.context['request'])
+        return getattr(obj, name)
 
-    @staticmethod
-    def get_replies_count(obj, request):
-        content_type = ContentType.objects.get_for_model(obj)
+    def get_reply_count(self, obj):
+        return self.get_stat(obj, 'reply_count')
+
+    def get_like_count(self, obj):
+        return self.get_stat(obj, 'like_count')
 
-        return XtdComment.objects.filter(
-            content_type=content_type,
-            object_pk=obj.pk,
-            site__pk=get_current_site(request).pk,
-            is_public=True
-        ).count()
+    def get_liked(self, obj):
+        return self.get_stat(obj, 'liked')
 
     def get_created_at(self, obj):
         return obj.submit_date
@@ -261,6 +271,19 @@ class BaseViewArgumentSerializer(serializers.Serializer):
             return 50
 
 
+class ViewerContextListSerializer(serializers.ListSerializer):
+    """
+    Loads the viewer's interactions with the whole page before its items are serialized, see `ViewerContext`.
+    """
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, BaseManager) else data)
+        if 'request' in self.context:
+            get_viewer_context(self.context).load(items)
+
+        return super().to_representation(items)
+
+
 class CustomPasswordResetSerializer(PasswordResetSerializer):
     def get_email_options(self):
         return {
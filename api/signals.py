@@ -1,9 +1,15 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import Signal, receiver
 
 from arguments.models import Argument
 from moogts.models import Moogt
 from polls.models import Poll
+from users.models import MoogtMedaUser
 from views.models import View
+from .feed import (sync_feed_item, remove_feed_item, backfill_feed, unfollow_feed, get_follower_ids,
+                   get_following_ids, is_feed_item_changed)
+from .scoring import mark_score_dirty
+from .utils import update_comment_count
 
 reaction_was_made = Signal()
 
@@ -17,7 +23,51 @@ def reaction_was_made_handler(sender, **kwargs):
             isinstance(obj, Argument) or \
             isinstance(obj, Poll) or isinstance(obj, Moogt):
 
-        obj.score.maybe_update_score()
-        if sender == CommentMixin:
-            obj.comment_count = obj.comment_count + 1
-            obj.save()
+        # The score is recomputed by the `update_scores` command, so a burst of reactions costs one rescoring.
+        mark_score_dirty(obj)
+        if sender == CommentMixin and not isinstance(obj, Moogt):
+            update_comment_count(obj, 1)
+
+
+@receiver(post_save, sender=Moogt)
+@receiver(post_save, sender=View)
+@receiver(post_save, sender=Poll)
+def feed_content_saved_receiver(sender, instance, created, **kwargs):
+    # Plain edits, e.g. of the content of a view, leave the feed as it is.
+    if created or is_feed_item_changed(instance):
+        sync_feed_item(instance)
+
+
+@receiver(post_delete, sender=Moogt)
+@receiver(post_delete, sender=View)
+@receiver(post_delete, sender=Poll)
+def feed_content_deleted_receiver(sender, instance, **kwargs):
+    remove_feed_item(instance)
+
+
+@receiver(m2m_changed, sender=MoogtMedaUser.followings.through)
+def followings_receiver(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keeps the feed inboxes in line with who the users are following.
+
+    `reverse` tells whether the instance is the one being followed (`user.followers`) or the
+    follower (`user.followings`).
+    """
+    if action == 'pre_clear':
+        # The ids are gone after the clear, so we keep them around for post_clear.
+        ids = get_follower_ids(instance.pk) if reverse else \
+            get_following_ids(instance.pk).values_list('to_user', flat=True)
+        instance._cleared_feed_ids = set(ids)
+        return
+
+    if action == 'post_clear':
+        action, pk_set = 'post_remove', getattr(instance, '_cleared_feed_ids', set())
+    elif action not in ('post_add', 'post_remove'):
+        return
+
+    update_feed = backfill_feed if action == 'post_add' else unfollow_feed
+    if reverse:
+        for user_id in pk_set:
+            update_feed(user_id, [instance.pk])
+    else:
+        update_feed(instance.pk, pk_set)
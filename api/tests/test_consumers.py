@@ -0,0 +1,110 @@
+import pytest
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+
+from api.enums import STREAM_EVENT
+from api.tests.utility import create_moogt_with_user
+from chat.enums import WebSocketMessageType
+from chat.tests.test_consumers import create_user, create_conversation
+from chat.utils import notify_ws_clients
+from meda.utils import get_conversation_group_name, get_moogt_group_name, get_user_group_name
+from moogtmeda.routing import application
+from moogts.utils import notify_ws_clients as notify_moogt_ws_clients
+
+
+async def connect(access):
+    communicator = WebsocketCommunicator(
+        application=application,
+        path=f'/ws/stream/?token={access}'
+    )
+    connected, _ = await communicator.connect()
+    return communicator, connected
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+class TestStreamConsumer:
+    async def test_anonymous_user_should_not_connect(self):
+        communicator = WebsocketCommunicator(
+            application=application,
+            path='/ws/stream/'
+        )
+        connected, _ = await communicator.connect()
+        assert connected is False
+        await communicator.disconnect()
+
+    async def test_receives_events_of_the_user_stream(self):
+        user, access = await create_user('test.user@example.com', 'pAssw0rd')
+        communicator, connected = await connect(access)
+        assert connected is True
+
+        conversation = await database_sync_to_async(create_conversation)(user)
+        await sync_to_async(notify_ws_clients)(conversation=conversation, message=None,
+                                               message_type=WebSocketMessageType.CONVERSATION_UPDATED.value)
+        response = await communicator.receive_json_from(timeout=1)
+
+        assert response['stream'] == get_user_group_name(user.id)
+        assert response['conversation']['id'] == conversation.id
+        await communicator.disconnect()
+
+    async def test_receives_events_of_a_subscribed_conversation_stream(self):
+        user, access = await create_user('test.user@example.com', 'pAssw0rd')
+        conversation = await database_sync_to_async(create_conversation)(user)
+        communicator, _ = await connect(access)
+
+        stream = get_conversation_group_name(conversation.id)
+        await communicator.send_json_to({'type': STREAM_EVENT.subscribe, 'stream': stream})
+        response = await communicator.receive_json_from(timeout=1)
+        assert response['event_type'] == STREAM_EVENT.subscribed
+
+        await sync_to_async(notify_ws_clients)(conversation=conversation, message=None,
+                                               message_type=WebSocketMessageType.CONVERSATION_UPDATED.value)
+        response = await communicator.receive_json_from(timeout=1)
+
+        assert response['stream'] == stream
+        assert 'conversation_stream' not in response
+        # The copy sent to the user stream is skipped.
+        assert await communicator.receive_nothing(timeout=0.5)
+        await communicator.disconnect()
+
+    async def test_subscribes_to_a_moogt_stream(self):
+        user, access = await create_user('test.user@example.com', 'pAssw0rd')
+        moogt = await database_sync_to_async(create_moogt_with_user)(proposition_user=user)
+        communicator, _ = await connect(access)
+
+        await communicator.send_json_to({'type': STREAM_EVENT.subscribe, 'stream': get_moogt_group_name(moogt.id)})
+        response = await communicator.receive_json_from(timeout=1)
+        assert response['event_type'] == STREAM_EVENT.subscribed
+
+        await notify_moogt_ws_clients(moogt)
+        response = await communicator.receive_json_from(timeout=1)
+        assert response['stream'] == get_moogt_group_name(moogt.id)
+        assert response['moogt_id'] == moogt.id
+
+        await communicator.send_json_to({'type': STREAM_EVENT.unsubscribe, 'stream': get_moogt_group_name(moogt.id)})
+        response = await communicator.receive_json_from(timeout=1)
+        assert response['event_type'] == STREAM_EVENT.unsubscribed
+
+        await notify_moogt_ws_clients(moogt)
+        assert await communicator.receive_nothing() is True
+        await communicator.disconnect()
+
+    async def test_cannot_subscribe_to_the_stream_of_another_user(self):
+        user, access = await create_user('test.user@example.com', 'pAssw0rd')
+        other_user, _ = await create_user('other.user@example.com', 'pAssw0rd')
+        communicator, _ = await connect(access)
+
+        await communicator.send_json_to({'type': STREAM_EVENT.subscribe, 'stream': get_user_group_name(other_user.id)})
+        response = await communicator.receive_json_from(timeout=1)
+        assert response['event_type'] == STREAM_EVENT.error
+        await communicator.disconnect()
+
+    async def test_moogt_events_are_not_sent_without_a_subscription(self):
+        user, access = await create_user('test.user@example.com', 'pAssw0rd')
+        moogt = await database_sync_to_async(create_moogt_with_user)(proposition_user=user)
+        communicator, _ = await connect(access)
+
+        await notify_moogt_ws_clients(moogt)
+        assert await communicator.receive_nothing() is True
+        await communicator.disconnect()
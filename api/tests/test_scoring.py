@@ -0,0 +1,47 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from api.models import DirtyScore
+from api.scoring import mark_score_dirty, update_all_dirty_scores
+from api.tests.utility import create_user, create_view
+
+
+class DirtyScoreTests(TestCase):
+    def setUp(self) -> None:
+        self.user = create_user('test_username', 'test_password')
+        self.view = create_view(self.user, 'test view')
+
+    def test_marking_an_item_twice_queues_it_once(self):
+        """An item should be queued for rescoring once no matter how many times it's marked."""
+        mark_score_dirty(self.view)
+        mark_score_dirty(self.view)
+
+        self.assertEqual(DirtyScore.objects.count(), 1)
+
+    def test_update_dirty_scores(self):
+        """Updating the dirty scores should rescore the queued items and clear the queue."""
+        self.view.stats.applauds.add(self.user)
+        mark_score_dirty(self.view)
+
+        counts = update_all_dirty_scores()
+
+        self.view.score.refresh_from_db()
+        self.assertEqual(counts['view'], 1)
+        self.assertEqual(self.view.score.overall_score, 1)
+        self.assertEqual(DirtyScore.objects.count(), 0)
+
+    def test_marks_are_claimed_before_rescoring(self):
+        """An item marked again while it's being rescored should stay queued for the next run."""
+        original = type(self.view.score).maybe_update_score
+
+        def mark_again(score):
+            self.assertEqual(DirtyScore.objects.count(), 0)
+            mark_score_dirty(self.view)
+            original(score)
+
+        mark_score_dirty(self.view)
+        with patch.object(type(self.view.score), 'maybe_update_score', mark_again):
+            update_all_dirty_scores()
+
+        self.assertEqual(DirtyScore.objects.count(), 1)
@@ -0,0 +1,19 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from api.enums import TRENDING_FACTOR, TRENDING_ITEM_TYPE
+from api.models import TrendingSnapshot
+from api.trending import write_trending_snapshot
+
+
+class TrendingSnapshotTests(TestCase):
+    def test_only_the_top_items_are_ranked(self):
+        """The snapshot should keep the highest factors, with ties going to the newer item."""
+        factors = iter([(1, 1.0), (2, 3.0), (3, 3.0), (4, 2.0)])
+
+        with patch('api.trending.TRENDING_SNAPSHOT_SIZE', 3):
+            count = write_trending_snapshot(TRENDING_FACTOR.overall_score, TRENDING_ITEM_TYPE.view, factors)
+
+        self.assertEqual(count, 3)
+        self.assertEqual(list(TrendingSnapshot.objects.order_by('rank').values_list('item_id', flat=True)), [3, 2, 4])
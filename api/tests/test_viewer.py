@@ -0,0 +1,97 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from api.enums import Visibility
+from api.tests.utility import create_user, create_view, create_comment, create_poll, create_argument
+from arguments.models import Argument
+from arguments.serializers import ArgumentSerializer
+from polls.models import Poll
+from polls.serializers import PollSerializer
+from users.models import MoogtMedaUser
+from views.models import View
+from views.serializers import ViewSerializer
+
+
+class ViewerContextTests(TestCase):
+    def setUp(self) -> None:
+        self.user = create_user('test_username', 'test_password')
+        self.author = create_user('test_author', 'test_password')
+        request = APIRequestFactory().get('/')
+        request.user = self.user
+        self.request = request
+
+    def serialize(self, serializer_class, objects):
+        return serializer_class(objects, many=True, context={'request': self.request}).data
+
+    def count_queries(self, serializer_class, objects):
+        # Warm up the caches (e.g. content types) so only the page is counted.
+        self.serialize(serializer_class, objects)
+        with CaptureQueriesContext(connection) as queries:
+            self.serialize(serializer_class, objects)
+        # The auto created one to one relations (e.g. stats) wrap their access in a savepoint.
+        return len([query for query in queries if 'SAVEPOINT' not in query['sql']])
+
+    def test_views_are_serialized_in_a_fixed_number_of_queries(self):
+        """Serializing a page of views should cost the same number of queries whatever its size."""
+        for i in range(5):
+            view = create_view(self.author, f'test view {i}')
+            create_comment(view, self.user, 'test comment')
+
+        views = list(View.objects.all())
+        self.assertEqual(self.count_queries(ViewSerializer, views[:2]),
+                         self.count_queries(ViewSerializer, views))
+
+    def test_polls_are_serialized_in_a_fixed_number_of_queries(self):
+        """Serializing a page of polls should cost the same number of queries whatever its size."""
+        for i in range(5):
+            create_poll(self.author, f'test poll {i}')
+
+        polls = list(Poll.objects.all())
+        self.assertEqual(self.count_queries(PollSerializer, polls[:2]),
+                         self.count_queries(PollSerializer, polls))
+
+    def test_arguments_are_serialized_in_a_fixed_number_of_queries(self):
+        """Serializing a page of arguments should cost the same number of queries whatever its size."""
+        argument = create_argument(self.author, 'test argument')
+        for i in range(4):
+            create_argument(self.author, f'test argument {i}', moogt=argument.moogt)
+
+        arguments = list(Argument.objects.all())
+        self.assertEqual(self.count_queries(ArgumentSerializer, arguments[:2]),
+                         self.count_queries(ArgumentSerializer, arguments))
+
+    def test_viewer_flags(self):
+        """The batched flags should tell which items the viewer commented on and voted on."""
+        commented_view = create_view(self.author, 'commented view')
+        create_comment(commented_view, self.user, 'test comment')
+        create_comment(commented_view, self.author, 'test comment')
+        create_view(self.author, 'other view')
+
+        poll = create_poll(self.author, 'test poll')
+        option = poll.options.first()
+        option.votes.add(self.user)
+
+        data = self.serialize(ViewSerializer, View.objects.order_by('pk'))
+        self.assertTrue(data[0]['stats']['comment']['selected'])
+        self.assertFalse(data[1]['stats']['comment']['selected'])
+
+        data = self.serialize(PollSerializer, Poll.objects.all())
+        votes = {option_data['id']: option_data['has_voted'] for option_data in data[0]['options']}
+        self.assertTrue(votes[option.pk])
+        self.assertEqual(list(votes.values()).count(True), 1)
+
+    def test_parent_visibility_of_a_followers_only_parent(self):
+        """A followers only parent should be visible to the followers of its author only."""
+        parent = create_view(self.author, 'parent view', visibility=Visibility.FOLLOWERS_ONLY.name)
+        view = create_view(self.author, 'child view')
+        view.parent_view = parent
+        view.save()
+
+        data = self.serialize(ViewSerializer, View.objects.filter(pk=view.pk))
+        self.assertFalse(data[0]['is_parent_visible'])
+
+        MoogtMedaUser.objects.get(pk=self.user.pk).followings.add(self.author)
+        data = self.serialize(ViewSerializer, View.objects.filter(pk=view.pk))
+        self.assertTrue(data[0]['is_parent_visible'])
@@ -1,7 +1,12 @@
 from datetime import timedelta
+from io import StringIO
 from unittest.mock import patch
 
 from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django_comments.models import CommentFlag
 from django_comments_xtd.models import XtdComment, LIKEDIT_FLAG, DISLIKEDIT_FLAG
@@ -10,13 +15,13 @@ from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 
 from api.enums import Visibility, ReactionType, ViewType
-from api.models import TelegramChatToUser
+from api.models import TelegramChatToUser, FeedItem
 from invitations.models import ModeratorInvitation
 from meda.enums import InvitationStatus
 from meda.tests.test_models import create_moogt
 from moogts.models import Donation, DonationLevel, ReadBy
 from notifications.models import NOTIFICATION_TYPES
-from users.models import MoogtMedaUser
+from users.models import Blocking, MoogtMedaUser
 from views.models import ViewImage, View
 from .utility import (create_invitation, create_moogt_with_user, create_poll,
                       create_user, create_reaction_view, create_argument,
@@ -52,6 +57,23 @@ class SideBarAPIViewTests(APITestCase):
         self.assertEqual(response.data.get('subscribed_count'), 1)
         self.assertEqual(response.data['open_invitation_count'], 1)
 
+    def test_counts_are_fetched_in_a_single_query(self):
+        """
+        The sidebar should cost a single query, on top of the ones authenticating the request.
+        """
+        user = create_user_and_login(self)
+        create_moogt_with_user(user, resolution="test resolution")
+        self.get()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len([query for query in queries if 'users_wallet' in query['sql']]), 1)
+        self.assertEqual(response.data['moogt_count'], 1)
+        self.assertEqual(response.data['donations_amount'], 0)
+        self.assertEqual(response.data['wallet_amount'], 5000)
+
     def test_no_subscribers(self):
         """
         test if there are no subscribers response should return 0 for subscriber_count
@@ -661,6 +683,186 @@ class FeedContentApiViewTests(APITestCase):
         self.assertEqual(response.data['results'][0]['item_type'], 'moogt')
 
 
+class HomeFeedApiViewTests(APITestCase):
+    def get(self, limit=3, cursor=None):
+        url = reverse('api:home_feed', kwargs={'version': 'v1'}) + f'?limit={limit}'
+        if cursor:
+            url += f'&cursor={cursor}'
+        return self.client.get(url)
+
+    def setUp(self) -> None:
+        self.user = create_user("followee user", "password")
+        self.follower = create_user_and_login(self)
+        self.follower.followings.add(self.user)
+
+    def test_content_of_followed_users_is_returned_newest_first(self):
+        """
+        Published content of the users you are following should be in the feed, newest first.
+        """
+        view = create_view(self.user, "view content", Visibility.PUBLIC.name)
+        poll = create_poll(self.user, "poll title")
+        moogt = create_moogt_with_user(self.user, resolution="moogt resolution", started_at_days_ago=1)
+
+        response = self.get(5)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(item['item_type'], item['id']) for item in response.data['results']],
+                         [('moogt', moogt.id), ('poll', poll.id), ('view', view.id)])
+        self.assertIsNone(response.data['next'])
+
+    def test_content_of_other_users_is_not_returned(self):
+        """
+        Content of users you are not following shouldn't be in the feed.
+        """
+        create_view(create_user("stranger", "password"), "view content", Visibility.PUBLIC.name)
+
+        response = self.get()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 0)
+
+    def test_pagination(self):
+        """
+        The next page should continue after the last item of the previous page.
+        """
+        views = [create_view(self.user, f"view {i}", Visibility.PUBLIC.name) for i in range(3)]
+
+        response = self.get(2)
+        self.assertEqual([item['id'] for item in response.data['results']], [views[2].id, views[1].id])
+        self.assertIsNotNone(response.data['next'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([item['id'] for item in response.data['results']], [views[0].id])
+        self.assertIsNone(response.data['next'])
+
+    def test_removed_and_draft_content_is_not_returned(self):
+        """
+        Content that is removed or turned into a draft should be taken out of the feed.
+        """
+        view = create_view(self.user, "view content", Visibility.PUBLIC.name)
+        view.is_draft = True
+        view.save()
+        poll = create_poll(self.user, "poll title")
+        poll.delete()
+
+        response = self.get()
+
+        self.assertEqual(len(response.data['results']), 0)
+
+    def test_non_started_moogt_is_added_when_it_starts(self):
+        """
+        A moogt should be in the feed only after it has started.
+        """
+        moogt = create_moogt_with_user(self.user, resolution="moogt resolution")
+        self.assertEqual(len(self.get().data['results']), 0)
+
+        moogt.started_at = timezone.now()
+        moogt.save()
+
+        response = self.get()
+        self.assertEqual(response.data['results'][0]['id'], moogt.id)
+
+    def test_follow_backfills_and_unfollow_removes_content(self):
+        """
+        Following a user should add their recent content to the feed, unfollowing should remove it.
+        """
+        other_user = create_user("other user", "password")
+        view = create_view(other_user, "view content", Visibility.PUBLIC.name)
+
+        self.follower.followings.add(other_user)
+        response = self.get()
+        self.assertEqual(response.data['results'][0]['id'], view.id)
+
+        self.follower.followings.remove(other_user)
+        response = self.get()
+        self.assertEqual(len(response.data['results']), 0)
+
+    def test_moogt_stays_when_another_participant_is_followed(self):
+        """
+        Unfollowing one participant of a moogt shouldn't remove it if you follow the other participant.
+        """
+        opposition = create_user("opposition", "password")
+        self.follower.followings.add(opposition)
+        moogt = create_moogt_with_user(self.user, opposition=opposition, resolution="moogt resolution",
+                                       started_at_days_ago=1)
+
+        self.follower.followings.remove(self.user)
+
+        response = self.get()
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['id'], moogt.id)
+
+    def test_content_is_fanned_out_when_published(self):
+        """
+        New content should be copied to the inboxes of the followers right away.
+        """
+        view = create_view(self.user, "view content", Visibility.PUBLIC.name)
+
+        self.assertTrue(FeedItem.objects.filter(user=self.follower, item_id=view.id).exists())
+        self.assertFalse(FeedItem.objects.filter(is_pending=True).exists())
+
+    @patch('api.feed.FEED_FANOUT_MAX_FOLLOWERS', 0)
+    def test_content_of_users_with_many_followers_is_fanned_out_by_the_command(self):
+        """
+        Content of users with too many followers should be queued and copied to the inboxes of
+        the followers by the command.
+        """
+        view = create_view(self.user, "view content", Visibility.PUBLIC.name)
+        self.assertEqual(len(self.get().data['results']), 0)
+
+        call_command('fan_out_feed', stdout=StringIO())
+
+        self.assertFalse(FeedItem.objects.filter(is_pending=True).exists())
+        self.assertEqual([item['id'] for item in self.get().data['results']], [view.id])
+
+    def test_content_of_blocked_users_is_not_returned(self):
+        """
+        Content of users you have blocked, or who have blocked you, shouldn't be in the feed.
+        """
+        other_user = create_user("other user", "password")
+        self.follower.followings.add(other_user)
+        create_view(self.user, "view content", Visibility.PUBLIC.name)
+        create_poll(other_user, "poll title")
+
+        Blocking.objects.create(user=self.follower, blocked_user=self.user)
+        Blocking.objects.create(user=other_user, blocked_user=self.follower)
+
+        response = self.get()
+        self.assertEqual(len(response.data['results']), 0)
+
+    def test_an_item_of_two_followed_users_is_returned_once(self):
+        """
+        A moogt between two followed users should be in the feed once, also across pages.
+        """
+        opposition = create_user("opposition", "password")
+        self.follower.followings.add(opposition)
+        view = create_view(self.user, "view content", Visibility.PUBLIC.name)
+        moogt = create_moogt_with_user(self.user, opposition=opposition, resolution="moogt resolution",
+                                       started_at_days_ago=1)
+
+        response = self.get(1)
+        self.assertEqual([item['id'] for item in response.data['results']], [moogt.id])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([item['id'] for item in response.data['results']], [view.id])
+        self.assertIsNone(response.data['next'])
+
+    def test_plain_edits_do_not_sync_the_feed(self):
+        """
+        Only changes that can take content on or off the feed should sync it.
+        """
+        view = create_view(self.user, "view content", Visibility.PUBLIC.name)
+        view = View.objects.get(pk=view.pk)
+
+        with patch('api.signals.sync_feed_item') as sync_feed_item:
+            view.content = "edited content"
+            view.save()
+            sync_feed_item.assert_not_called()
+
+            view.is_draft = True
+            view.save()
+            sync_feed_item.assert_called_once_with(view)
+
+
 class ReplyCommentApiViewTests(APITestCase):
 
     def setUp(self) -> None:
@@ -873,7 +1075,7 @@ class BrowseCommentReplyApiViewTests(APITestCase):
             self.comment, self.user, 'test reply comment')
         response = self.get(self.comment.id)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(len(response.data['results']), 1)
         self.assertEqual(response.data['results'][0]['id'], reply_comment.id)
 
     def test_browse_comment_with_replies_for_multiple_comments(self):
@@ -887,19 +1089,32 @@ class BrowseCommentReplyApiViewTests(APITestCase):
             comment_2, self.user, 'test reply comment 2')
 
         response = self.get(self.comment.id)
-        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(len(response.data['results']), 1)
         self.assertEqual(response.data['results'][0]['id'], reply_comment.id)
 
         response = self.get(comment_2.id)
-        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(len(response.data['results']), 1)
         self.assertEqual(response.data['results'][0]['id'], reply_comment_2.id)
 
+    def test_browse_threaded_replies(self):
+        """
+        Replies threaded under the comment should be returned too.
+        """
+        reply_comment = create_comment(self.view, self.user, 'test reply comment')
+        reply_comment.parent_id = self.comment.id
+        reply_comment.level = 1
+        reply_comment.save()
+
+        response = self.get(self.comment.id)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['id'], reply_comment.id)
+
 
 class RemoveCommentApiView(APITestCase):
     def setUp(self) -> None:
         self.user = create_user_and_login(self)
-        view = create_view(self.user, 'test content')
-        self.comment = create_comment(view, self.user, 'test comment')
+        self.view = create_view(self.user, 'test content')
+        self.comment = create_comment(self.view, self.user, 'test comment')
 
     def post(self, comment_id):
         url = reverse('api:remove_comment', kwargs={
@@ -939,6 +1154,16 @@ class RemoveCommentApiView(APITestCase):
         xtd_comment = XtdComment.objects.get(pk=self.comment.id)
         self.assertFalse(xtd_comment.is_public)
 
+    def test_removing_a_comment_decrements_the_comment_count(self):
+        """
+        Removing a comment should decrement the comment count of the item once, even if it's removed again.
+        """
+        self.post(self.comment.id)
+        self.post(self.comment.id)
+
+        self.view.refresh_from_db()
+        self.assertEqual(self.view.comment_count, 0)
+
 
 class CommentDetailApiViewTests(APITestCase):
 
@@ -1112,7 +1337,7 @@ class SearchResultsApiViewTests(APITestCase):
         user2 = create_user('yodi1', 'pass123')
 
         user2.followers.add(self.user1)
-        self.user1.followings.add(self.user1)
+        self.user1.followings.add(user2)
 
         response = self.get('yodi', 'user', 'popularity')
 
@@ -1175,6 +1400,26 @@ class SearchResultsApiViewTests(APITestCase):
         self.assertEqual(response.data['results'][0]['id'], argument1.id)
         self.assertEqual(response.data['results'][1]['id'], self.argument.id)
 
+    def test_search_polls_by_option(self):
+        """Search polls whose options match the search term, each poll is listed once."""
+        self.poll.create_options([{'content': 'first option'}, {'content': 'second option'}])
+
+        response = self.get('option', 'poll')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['id'], self.poll.id)
+
+    def test_search_arguments_sort_by_relevance(self):
+        """Sorting by relevance should fall back to the newest first when there is no ranking."""
+        argument1 = create_argument(self.user, "great argument 2", moogt=self.moogt1)
+
+        response = self.get('argument', item_type='argument', sort_by='relevance')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['results'][0]['id'], argument1.id)
+        self.assertEqual(response.data['results'][1]['id'], self.argument.id)
+
     def test_draft_post_should_be_excluded(self):
         """
         If a post is a draft post then it should not be included in the search result
@@ -1189,13 +1434,16 @@ class SearchResultsApiViewTests(APITestCase):
 
 
 class SearchResultsCountApiViewTests(APITestCase):
-    def get(self, q=None):
+    def get(self, q=None, approximate=None):
         url = reverse('api:search_results_count', kwargs={'version': 'v1'})
         if q:
             url += f'?q={q}'
+        if approximate:
+            url += f'&approximate={approximate}'
         return self.client.get(url)
 
     def setUp(self) -> None:
+        cache.clear()
         self.user = create_user_and_login(self)
 
     def test_without_providing_a_search_query_param(self):
@@ -1265,6 +1513,50 @@ class SearchResultsCountApiViewTests(APITestCase):
         response = self.get(q='mgtr')
         self.assertEqual(response.data['accounts_count'], 1)
 
+    def test_counts_are_cached_by_normalized_search_term(self):
+        """The counts should be cached for search terms that only differ by case and whitespace."""
+        create_view(user=self.user, content='test view')
+        response = self.get(q='test view')
+        self.assertEqual(response.data['views_count'], 1)
+
+        create_view(user=self.user, content='test view 2')
+        response = self.get(q=' Test  VIEW ')
+        self.assertEqual(response.data['views_count'], 1)
+
+        cache.clear()
+        response = self.get(q='test view')
+        self.assertEqual(response.data['views_count'], 2)
+
+    @patch('api.views.SEARCH_COUNT_LIMIT', 1)
+    def test_approximate_counts(self):
+        """Approximate counts should stop at the limit."""
+        create_view(user=self.user, content='test view')
+        response = self.get(q='test', approximate='true')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['views_count'], 1)
+        self.assertEqual(response.data['polls_count'], 0)
+
+        cache.clear()
+        create_view(user=self.user, content='test view 2')
+        response = self.get(q='test', approximate='true')
+        self.assertEqual(response.data['views_count'], '1+')
+
+        response = self.get(q='test')
+        self.assertEqual(response.data['views_count'], 2)
+
+    @patch('api.views.SEARCH_COUNT_LIMIT', 1)
+    def test_approximate_is_parsed_as_a_boolean(self):
+        """Any spelling of a boolean should be accepted, anything else is a bad request."""
+        create_view(user=self.user, content='test view')
+        create_view(user=self.user, content='test view 2')
+
+        response = self.get(q='test', approximate='True')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['views_count'], '1+')
+
+        response = self.get(q='test', approximate='maybe')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class TelegramOptInApiViewTests(APITestCase):
     def post(self, chat_id=None):
@@ -12,6 +12,7 @@ from django_comments_xtd.models import XtdComment
 
 from api.enums import Visibility, ReactionType, ViewType
 from api.mixins import ViewArgumentReactionMixin
+from api.utils import update_comment_count
 from arguments.models import Argument, ArgumentStats, ArgumentActivity, ArgumentType
 from chat.models import Conversation, Participant, RegularMessage
 from invitations.models import Invitation
@@ -272,8 +273,7 @@ def create_comment(obj, user, comment):
                          site_id=settings.SITE_ID)
     comment.save()
     if isinstance(obj, View) or isinstance(obj, Argument) or isinstance(obj, Poll):
-        obj.comment_count = obj.comment_count + 1
-        obj.save()
+        update_comment_count(obj, 1)
     return comment
 
 
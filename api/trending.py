@@ -0,0 +1,103 @@
+import heapq
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from meda.models import Score
+from moogts.models import Moogt, MoogtScore
+from polls.models import Poll, PollScore
+from views.models import View, ViewScore
+from .enums import TRENDING_ITEM_TYPE, TRENDING_FACTOR
+from .models import TrendingSnapshot
+
+# The number of items of each type that are ranked. Items past it are not trending.
+TRENDING_SNAPSHOT_SIZE = getattr(settings, 'TRENDING_SNAPSHOT_SIZE', 1000)
+
+TRENDING_BATCH_SIZE = 1000
+
+# The ranked models along with their score model and the field of the score pointing back at them.
+TRENDING_MODELS = {
+    TRENDING_ITEM_TYPE.moogt: (Moogt, MoogtScore, 'moogt'),
+    TRENDING_ITEM_TYPE.view: (View, ViewScore, 'view'),
+    TRENDING_ITEM_TYPE.poll: (Poll, PollScore, 'poll'),
+}
+
+SECONDS_PER_MONTH = 3600 * 24 * 30
+
+
+def get_trending_item_type(model):
+    for item_type, (trending_model, _, _) in TRENDING_MODELS.items():
+        if issubclass(model, trending_model):
+            return item_type
+
+
+def get_score_change_factors(item_type):
+    """
+    The rate of change of the score over the last trending period, for items with enough score.
+    """
+    _, score_model, field = TRENDING_MODELS[item_type]
+    scores = score_model.objects.filter(**{f'{field}__is_removed': False},
+                                        score_now__gte=Score.TRENDING_MINIMUM_SCORE) \
+        .values_list('pk', 'score_now', 'score_before')
+
+    for item_id, score_now, score_before in scores.iterator(chunk_size=TRENDING_BATCH_SIZE):
+        yield item_id, float(score_now - score_before) / Score.TRENDING_DURATION_HOURS
+
+
+def get_overall_score_factors(item_type):
+    """
+    The overall score of the items per month of their age.
+    """
+    _, score_model, field = TRENDING_MODELS[item_type]
+    scores = score_model.objects.filter(**{f'{field}__is_removed': False, f'{field}__created_at__isnull': False}) \
+        .values_list('pk', 'overall_score', f'{field}__created_at')
+
+    now = timezone.now()
+    for item_id, overall_score, created_at in scores.iterator(chunk_size=TRENDING_BATCH_SIZE):
+        age = max((now - created_at).total_seconds(), 1)
+        yield item_id, float(overall_score) * SECONDS_PER_MONTH / age
+
+
+TRENDING_FACTORS = {
+    TRENDING_FACTOR.score_change: get_score_change_factors,
+    TRENDING_FACTOR.overall_score: get_overall_score_factors,
+}
+
+
+@transaction.atomic
+def write_trending_snapshot(factor_type, item_type, factors):
+    # Only the top of the factors is kept in memory while they are streamed in. Ties go to the newer item.
+    ranked = heapq.nlargest(TRENDING_SNAPSHOT_SIZE, factors, key=lambda factor: (factor[1], factor[0]))
+
+    TrendingSnapshot.objects.filter(factor_type=factor_type, item_type=item_type).delete()
+    TrendingSnapshot.objects.bulk_create([
+        TrendingSnapshot(factor_type=factor_type, item_type=item_type, item_id=item_id, rank=rank, factor=factor)
+        for rank, (item_id, factor) in enumerate(ranked, start=1)
+    ], batch_size=TRENDING_BATCH_SIZE)
+
+    return len(ranked)
+
+
+def refresh_trending_snapshots():
+    """
+    Recomputes the trending ranks of every type of content. The factors are computed in python so
+    the ranking is the same on every database.
+    """
+    counts = {}
+    for factor_type, get_factors in TRENDING_FACTORS.items():
+        for item_type, _ in TRENDING_ITEM_TYPE:
+            counts[(factor_type, item_type)] = write_trending_snapshot(factor_type, item_type,
+                                                                       get_factors(item_type))
+    return counts
+
+
+def annotate_trending_rank(queryset, factor_type):
+    """
+    Annotates the items with their `trending_rank` in the latest snapshot, NULL if they are not trending.
+    """
+    snapshot = TrendingSnapshot.objects.filter(factor_type=factor_type,
+                                               item_type=get_trending_item_type(queryset.model),
+                                               item_id=OuterRef('pk'))
+    return queryset.annotate(trending_rank=Subquery(snapshot.values('rank')[:1]))
@@ -3,7 +3,7 @@ from fcm_django.api.rest_framework import FCMDeviceAuthorizedViewSet
 from rest_framework import routers
 from rest_framework_jwt.views import obtain_jwt_token, refresh_jwt_token
 
-from .views import (AddAvatarView, AvatarListView, ChangeAvatarView, DeleteAvatarView, FeedContentApiView,
+from .views import (AddAvatarView, AvatarListView, ChangeAvatarView, DeleteAvatarView, FeedContentApiView, HomeFeedApiView,
                     GetPublicityStatusView, PreferencesViewSet,
                     RenderPrimaryAvatarView, SideBarApiView,
                     ReplyCommentApiView,
@@ -62,6 +62,8 @@ urlpatterns = [
 
     re_path(r'^(?P<version>(v1))/feed/$',
             FeedContentApiView.as_view(), name='feed_content'),
+    re_path(r'^(?P<version>(v1))/feed/home/$',
+            HomeFeedApiView.as_view(), name='home_feed'),
 
     re_path(r'^(?P<version>(v1))/comment/reply/$',
             ReplyCommentApiView.as_view(), name='reply_comment'),
@@ -1,6 +1,16 @@
-from django.db.models import Value, CharField
+import heapq
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, router, transaction
+from django.db.models import Value, CharField, F
+from django.db.models.functions import Greatest
+from django.http import StreamingHttpResponse
 from django.urls import reverse
 
+# The number of rows fetched per round-trip from the server-side cursor when exporting.
+EXPORT_CHUNK_SIZE = 2000
+
 
 def get_union_queryset(*args, **kwargs):
     datetime_field = kwargs.pop('datetime_field', 'created')
@@ -49,5 +59,104 @@ def inflate_referenced_objects(union_qs, **kwargs):
     return records
 
 
+def update_comment_count(obj, delta):
+    """
+    Adds `delta` to the comment count of the object in a single UPDATE, so concurrent comments
+    don't overwrite each other's counts.
+    """
+    type(obj)._base_manager.filter(pk=obj.pk).update(comment_count=Greatest(F('comment_count') + delta, 0))
+    obj.refresh_from_db(fields=['comment_count'])
+
+
+def get_relation_table(relation):
+    """
+    The table of a many to many relation along with the columns of the pk, the instance and the related object.
+    """
+    through = relation.through._meta
+    return (through.db_table,
+            through.pk.column,
+            through.get_field(relation.source_field_name).column,
+            through.get_field(relation.target_field_name).column)
+
+
+def add_to_relation(relation, obj):
+    """
+    Adds the object to the many to many relation with an INSERT ... ON CONFLICT DO NOTHING, and
+    returns whether it was added, i.e. False if it was already there.
+    """
+    connection = connections[router.db_for_write(relation.through, instance=relation.instance)]
+    table, pk_column, source_column, target_column = map(connection.ops.quote_name, get_relation_table(relation))
+    with connection.cursor() as cursor:
+        cursor.execute(f'INSERT INTO {table} ({source_column}, {target_column}) VALUES (%s, %s) '
+                       f'ON CONFLICT DO NOTHING RETURNING {pk_column}', [relation.instance.pk, obj.pk])
+        return cursor.fetchone() is not None
+
+
+def remove_from_relation(relation, obj):
+    """
+    Removes the object from the many to many relation with a DELETE ... RETURNING, and returns
+    whether it was removed, i.e. False if it wasn't there.
+    """
+    connection = connections[router.db_for_write(relation.through, instance=relation.instance)]
+    table, pk_column, source_column, target_column = map(connection.ops.quote_name, get_relation_table(relation))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE {source_column} = %s AND {target_column} = %s '
+                       f'RETURNING {pk_column}', [relation.instance.pk, obj.pk])
+        return cursor.fetchone() is not None
+
+
+def update_relation_count(instance, count_field, delta):
+    type(instance)._base_manager.filter(pk=instance.pk).update(**{count_field: F(count_field) + delta})
+
+
+def recount_relation(relation, count_field):
+    """
+    Recounts the `count_field` of the relation's instance, for changes made through the relation's
+    manager rather than `toggle_relation`.
+    """
+    count = relation.count()
+    type(relation.instance)._base_manager.filter(pk=relation.instance.pk).update(**{count_field: count})
+    setattr(relation.instance, count_field, count)
+
+
+@transaction.atomic
+def toggle_relation(relation, obj, count_field):
+    """
+    Removes the object from the many to many relation if it's there and adds it otherwise, keeping
+    the `count_field` of the relation's instance in step. Returns whether the object is in the relation
+    now, and whether this call is the one that changed it.
+
+    If a concurrent request added the object in between, it's already there and nothing is changed
+    (or counted) here, so the caller shouldn't repeat the side effects of adding it either.
+    """
+    if remove_from_relation(relation, obj):
+        update_relation_count(relation.instance, count_field, -1)
+        return False, True
+
+    if add_to_relation(relation, obj):
+        update_relation_count(relation.instance, count_field, 1)
+        return True, True
+    return True, False
+
+
 def get_admin_url(instance):
     return reverse('admin:%s_%s_change' % (instance._meta.app_label, instance._meta.model_name), args=(instance.id,))
+
+
+def merge_querysets(*querysets, key, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Merges already ordered querysets into one ordered stream, reading each one
+    through a server-side cursor, so only `chunk_size` rows per queryset are in
+    memory at a time.
+    """
+    return heapq.merge(*[queryset.iterator(chunk_size=chunk_size) for queryset in querysets], key=key)
+
+
+def ndjson_response(rows, filename):
+    """
+    Streams the rows as newline delimited JSON, writing each row as soon as it is fetched.
+    """
+    lines = (json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in rows)
+    response = StreamingHttpResponse(lines, content_type='application/x-ndjson')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
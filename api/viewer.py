@@ -0,0 +1,127 @@
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+from django_comments_xtd.api.frontend import CommentBoxDriver
+from django_comments_xtd.models import XtdComment
+
+from polls.models import Poll, PollOption
+from users.models import Follow, MoogtMedaUser
+from views.models import View
+
+
+class PrecountedCommentBoxDriver(CommentBoxDriver):
+    """
+    Builds the comment box props of an object without counting its comments, the count is read from
+    its `comment_count` instead.
+    """
+
+    @classmethod
+    def get_queryset(cls, ctype, obj, request):
+        return XtdComment.objects.none()
+
+
+class ViewerContext:
+    """
+    The viewer's interactions with a page of content (whether they commented on it, voted on it or
+    follow its authors), fetched in one query per relation so serializing a page costs the same
+    number of queries whatever its size.
+
+    Objects that weren't loaded (e.g. the parent of a view) are looked up one by one.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.comments_loaded = set()
+        self.commented = set()
+        self.voted_polls = set()
+        self.voted_options = set()
+        self.following_loaded = set()
+        self.following = set()
+
+    @staticmethod
+    def get_comment_key(obj):
+        return ContentType.objects.get_for_model(obj).pk, str(obj.pk)
+
+    def load(self, objects):
+        objects = [obj for obj in objects if obj is not None]
+
+        object_pks = defaultdict(list)
+        for obj in objects:
+            ctype_id, object_pk = self.get_comment_key(obj)
+            object_pks[ctype_id].append(object_pk)
+        self.load_comments(object_pks)
+
+        self.load_votes([obj.pk for obj in objects if isinstance(obj, Poll)])
+
+        authors = {obj.user_id for obj in objects}
+        authors.update(obj.parent.user_id for obj in objects if isinstance(obj, View) and obj.parent is not None)
+        self.load_following(authors)
+
+    def load_comments(self, object_pks):
+        """
+        :param object_pks: A dict of content type id to the ids of the objects of that type.
+        """
+        if not object_pks:
+            return
+
+        self.comments_loaded.update((ctype_id, object_pk) for ctype_id, pks in object_pks.items() for object_pk in pks)
+        if self.user.is_authenticated:
+            condition = reduce(or_, [Q(content_type_id=ctype_id, object_pk__in=pks)
+                                     for ctype_id, pks in object_pks.items()])
+            self.commented.update(XtdComment.objects.filter(condition, user_id=self.user.id)
+                                  .values_list('content_type_id', 'object_pk').distinct())
+
+    def load_votes(self, poll_ids):
+        if not poll_ids:
+            return
+
+        self.voted_polls.update(poll_ids)
+        if self.user.is_authenticated:
+            self.voted_options.update(PollOption.votes.through.objects
+                                      .filter(polloption__poll_id__in=poll_ids, moogtmedauser_id=self.user.id)
+                                      .values_list('polloption_id', flat=True))
+
+    def load_following(self, user_ids):
+        user_ids = {user_id for user_id in user_ids if user_id is not None}
+        if not user_ids:
+            return
+
+        self.following_loaded.update(user_ids)
+        if self.user.is_authenticated:
+            self.following.update(Follow.objects.filter(from_user_id=self.user.id, to_user_id__in=user_ids)
+                                  .values_list('to_user_id', flat=True))
+
+    def has_commented(self, obj):
+        key = self.get_comment_key(obj)
+        if key in self.comments_loaded:
+            return key in self.commented
+
+        ctype_id, object_pk = key
+        return XtdComment.objects.filter(user_id=self.user.id, content_type_id=ctype_id, object_pk=object_pk).exists()
+
+    def get_commentbox_props(self, obj):
+        return {**PrecountedCommentBoxDriver.get_props(obj, self.user), 'comment_count': obj.comment_count}
+
+    def has_voted(self, poll_option):
+        if poll_option.poll_id in self.voted_polls:
+            return poll_option.pk in self.voted_options
+
+        return poll_option.votes.filter(pk=self.user.pk).exists()
+
+    def is_following(self, user):
+        if user.pk in self.following_loaded:
+            return user.pk in self.following
+
+        return MoogtMedaUser.objects.is_following(self.user, user)
+
+
+def get_viewer_context(context):
+    """
+    Returns the viewer context of the serializer context, creating an empty one if the page wasn't loaded.
+    """
+    if 'viewer_context' not in context:
+        context['viewer_context'] = ViewerContext(context['request'].user)
+    return context['viewer_context']
@@ -1,3 +1,5 @@
+from collections import defaultdict
+
 import rest_framework
 from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
 from allauth.socialaccount.providers.oauth2.client import OAuth2Client
@@ -5,7 +7,10 @@ from avatar.conf import settings as avatar_settings
 from avatar.models import Avatar
 from avatar.signals import avatar_deleted, avatar_updated
 from avatar.utils import get_primary_avatar, invalidate_cache
-from django.db.models import Sum, IntegerField, Count
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum, IntegerField, Count, Q, F, OuterRef, Subquery, Value, DecimalField
+from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404
 import six
 from django_comments_xtd.api.serializers import WriteCommentSerializer
@@ -14,7 +19,7 @@ from drf_multiple_model.views import FlatMultipleModelAPIView
 from dynamic_preferences.users.models import UserPreferenceModel
 from dynamic_preferences.users.viewsets import UserPreferencesViewSet
 from dj_rest_auth.registration.views import SocialLoginView
-from rest_framework import generics, permissions, status
+from rest_framework import generics, permissions, serializers, status
 from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.parsers import FormParser, MultiPartParser
@@ -22,31 +27,42 @@ from rest_framework.response import Response
 from rest_framework_serializer_extensions.views import SerializerExtensionsAPIViewMixin
 from rest_framework_jwt.views import ObtainJSONWebToken
 
+from arguments.managers import ArgumentQuerySet
 from arguments.models import Argument
 from arguments.serializers import ArgumentSerializer
 from invitations.models import Invitation
 from meda.enums import InvitationStatus
+from meda.search import SEARCH_COUNT_CACHE_TTL, SEARCH_COUNT_LIMIT, count_in_one_query, get_search_cache_key, \
+    normalize_search_term
+from meda.typeahead import coalesce
 from moogter_bot.bot import bot
 from arguments.extensions import BasicArgumentSerializerExtensions
 from moogts.extensions import BasicMoogtExtensions
-from moogts.models import Moogt
+from moogts.managers import MoogtQuerySet
+from moogts.models import Moogt, Donation
 from moogts.serializers import MoogtSerializer
 from notifications.models import NOTIFICATION_TYPES
 from notifications.signals import notify
+from polls.managers import PollQuerySet
 from polls.models import Poll
 from polls.serializers import PollSerializer
-from users.models import MoogtMedaUser
+from users.managers import MoogtMedaUserQuerySet
+from users.models import MoogtMedaUser, Follow, Wallet
 from users.serializers import MoogtMedaUserSerializer
 from views.extensions import BasicViewSerializerExtensions
+from views.managers import ViewQuerySet
 from views.models import View
 from views.serializers import ViewSerializer
-from .enums import Visibility
+from .enums import Visibility, FEED_ITEM_TYPE
+from .feed import get_feed_queryset
 from .mixins import CommentMixin, SortCategorizeFilterMixin
 from .models import TelegramChatToUser
-from .pagination import MultiModelLimitOffsetPagination, StandardResultsSetPagination, SmallResultsSetPagination
+from .pagination import (MultiModelLimitOffsetPagination, StandardResultsSetPagination,
+                         FeedPagination, CommentPagination)
 from .serializers import (AvatarSerializer, TelegramChatToUserSerializer,
                           SidebarSerializer, CommentSerializer, CommentNotificationSerializer,
                           FirebaseJSONWebTokenSerializer)
+from .utils import update_comment_count
 
 
 class PreferencesViewSet(UserPreferencesViewSet):
@@ -183,29 +199,30 @@ class GetPublicityStatusView(generics.GenericAPIView):
 
 class SideBarApiView(generics.GenericAPIView):
     def get(self, request, *args, **kwargs):
-        moogt_count = Moogt.objects.filter(proposition=request.user).count()
-
-        user = MoogtMedaUser.objects.get(pk=request.user.id)
-
-        subscriber_count = user.followers.count()
-        subscribed_count = user.followings.count()
-
-        open_invitation_count = Invitation.objects.filter(inviter=request.user,
-                                                          invitee=None, status=InvitationStatus.PENDING.name).count()
-
-        wallet_amount = user.wallet.credit
-        donations_amount = user.donations.aggregate(
-            Sum('amount', output_field=IntegerField()))['amount__sum']
-
-        if donations_amount == None:
-            donations_amount = 0
-
-        sidebar_data = {"moogt_count": moogt_count,
-                        "subscriber_count": subscriber_count,
-                        "subscribed_count": subscribed_count,
-                        "open_invitation_count": open_invitation_count,
-                        "donations_amount": donations_amount,
-                        "wallet_amount": wallet_amount}
+        # Every count is a correlated subquery on the user's row, so the sidebar is a single query.
+        moogts = MoogtQuerySet(Moogt).filter(is_removed=False, proposition=OuterRef('pk')) \
+            .order_by().values('proposition').annotate(count=Count('pk')).values('count')
+        subscribers = Follow.objects.filter(to_user=OuterRef('pk')) \
+            .order_by().values('to_user').annotate(count=Count('pk')).values('count')
+        subscribed = Follow.objects.filter(from_user=OuterRef('pk')) \
+            .order_by().values('from_user').annotate(count=Count('pk')).values('count')
+        open_invitations = Invitation.objects.filter(inviter=OuterRef('pk'), invitee=None,
+                                                     status=InvitationStatus.PENDING.name) \
+            .order_by().values('inviter').annotate(count=Count('pk')).values('count')
+        donations = Donation.objects.filter(donated_for=OuterRef('pk')) \
+            .order_by().values('donated_for').annotate(amount=Sum('amount')).values('amount')
+        default_credit = Wallet._meta.get_field('credit').default
+
+        sidebar_data = MoogtMedaUserQuerySet(MoogtMedaUser).filter(pk=request.user.pk).annotate(
+            moogt_count=Coalesce(Subquery(moogts), 0),
+            subscriber_count=Coalesce(Subquery(subscribers), 0),
+            subscribed_count=Coalesce(Subquery(subscribed), 0),
+            open_invitation_count=Coalesce(Subquery(open_invitations), 0),
+            donations_amount=Coalesce(Subquery(donations, output_field=IntegerField()), 0),
+            # Users who never had their wallet touched get the starting credit.
+            wallet_amount=Coalesce(F('wallet__credit'), Value(default_credit, output_field=DecimalField())),
+        ).values('moogt_count', 'subscriber_count', 'subscribed_count', 'open_invitation_count',
+                 'donations_amount', 'wallet_amount').get()
 
         serializer = SidebarSerializer(sidebar_data)
         return Response(serializer.data, status.HTTP_200_OK)
@@ -219,9 +236,6 @@ class FeedContentApiView(FlatMultipleModelAPIView):
         return self.list(request, *args, **kwargs)
 
     def get_querylist(self):
-        user = MoogtMedaUser.objects.get(pk=self.request.user.id)
-        following_ids = [
-            following.pk for following in user.followings.all()] + [user.pk]
         querylist = [
             {
                 'queryset': Moogt.objects.get_feed_moogts(user=self.request.user).order_by('-created_at'),
@@ -236,7 +250,7 @@ class FeedContentApiView(FlatMultipleModelAPIView):
                 'expand': BasicViewSerializerExtensions.extensions_expand
             },
             {
-                'queryset': self.get_polls(following_ids).filter_poll_by_blocked_user(self.request.user),
+                'queryset': self.get_polls(self.request.user).filter_poll_by_blocked_user(self.request.user),
                 'serializer_class': PollSerializer,
                 'label': 'poll',
             }
@@ -244,9 +258,10 @@ class FeedContentApiView(FlatMultipleModelAPIView):
         ]
         return querylist
 
-    def get_polls(self, following_ids):
-        return Poll.objects.filter(user__pk__in=following_ids).order_by('-created_at').get_polls_for_user(
-            self.request.user)
+    def get_polls(self, user):
+        following_ids = MoogtMedaUser.objects.get_following_ids(user)
+        return Poll.objects.filter(Q(user__in=following_ids) | Q(user=user)).order_by('-created_at') \
+            .get_polls_for_user(self.request.user)
 
     def list(self, request, *args, **kwargs):
         querylist = self.get_querylist()
@@ -299,6 +314,61 @@ class FeedContentApiView(FlatMultipleModelAPIView):
         return results
 
 
+class HomeFeedApiView(generics.GenericAPIView):
+    """
+    Returns the home feed of the user, newest first, read from the materialized feed inbox
+    with keyset pagination. Items have the same shape as the ones of FeedContentApiView.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = FeedPagination
+
+    def get(self, request, *args, **kwargs):
+        items = self.paginate_queryset(get_feed_queryset(request.user))
+        return self.get_paginated_response(self.get_results(items))
+
+    def get_querylist(self, ids):
+        user = self.request.user
+        return [
+            {
+                'queryset': Moogt.objects.filter(pk__in=ids[FEED_ITEM_TYPE.moogt]),
+                'serializer_class': MoogtSerializer,
+                'label': FEED_ITEM_TYPE.moogt,
+                'expand': {'banner'}
+            },
+            {
+                'queryset': View.objects.annotate_top_reactions(user).filter(pk__in=ids[FEED_ITEM_TYPE.view]),
+                'serializer_class': ViewSerializer,
+                'label': FEED_ITEM_TYPE.view,
+                'expand': BasicViewSerializerExtensions.extensions_expand
+            },
+            {
+                'queryset': Poll.objects.filter(pk__in=ids[FEED_ITEM_TYPE.poll]).get_polls_for_user(user),
+                'serializer_class': PollSerializer,
+                'label': FEED_ITEM_TYPE.poll,
+            }
+        ]
+
+    def get_results(self, items):
+        ids = defaultdict(list)
+        for item in items:
+            ids[item.item_type].append(item.item_id)
+
+        serialized = {}
+        for query_data in self.get_querylist(ids):
+            if not ids[query_data['label']]:
+                continue
+
+            context = self.get_serializer_context()
+            context['expand'] = query_data.get('expand', [])
+            data = query_data['serializer_class'](query_data['queryset'], many=True, context=context).data
+            for datum in data:
+                datum.update({'item_type': query_data['label']})
+                serialized[(query_data['label'], datum['id'])] = datum
+
+        return [serialized[(item.item_type, item.item_id)] for item in items
+                if (item.item_type, item.item_id) in serialized]
+
+
 class ReplyCommentApiView(CommentMixin, generics.GenericAPIView):
     serializer_class = WriteCommentSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -364,25 +434,32 @@ class UnlikeCommentApiView(CommentMixin, generics.GenericAPIView):
 
 class BrowseCommentReplyApiView(SerializerExtensionsAPIViewMixin, CommentMixin, generics.ListAPIView):
     serializer_class = CommentSerializer
-    pagination_class = SmallResultsSetPagination
+    pagination_class = CommentPagination
     extensions_expand = ['user__profile']
 
     def get_queryset(self):
         parent_id = self.kwargs.get('pk')
         xtd_comment = get_object_or_404(XtdComment, pk=parent_id)
-        return self.get_comments(self.request, xtd_comment)
+        return self.get_replies(self.request, xtd_comment)
 
 
 class RemoveCommentApiView(generics.GenericAPIView):
     def post(self, request, *args, **kwargs):
-        comment = get_object_or_404(XtdComment,
-                                    pk=kwargs.get('pk'))
+        with transaction.atomic():
+            # The comment is locked so removing it twice at once doesn't decrement the count twice.
+            comment = get_object_or_404(XtdComment.objects.select_for_update(),
+                                        pk=kwargs.get('pk'))
+
+            if comment.user != request.user:
+                raise PermissionDenied('You cannot remove this comment.')
+
+            if comment.is_public:
+                comment.is_public = False
+                comment.save(update_fields=['is_public'])
 
-        if comment.user != request.user:
-            raise PermissionDenied('You cannot remove this comment.')
+                if isinstance(comment.content_object, (View, Argument, Poll)):
+                    update_comment_count(comment.content_object, -1)
 
-        comment.is_public = False
-        comment.save(update_fields=['is_public'])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -482,6 +559,8 @@ class SearchResultsApiView(generics.ListAPIView,
 
         if sort_by == 'date':
             queryset = queryset.order_by("-created_at")
+        elif sort_by == 'relevance':
+            queryset = queryset.order_by('-search_rank', '-created_at')
         else:
             queryset = queryset.annotate(reaction_count=Count(
                 'argument_reactions')).order_by('-reaction_count')
@@ -506,54 +585,80 @@ class SearchResultsApiView(generics.ListAPIView,
 
 
 class SearchResultsCountApiView(generics.GenericAPIView):
+    """
+    Counts the search results of every item type in a single query.
+
+    With `approximate=true` the counts stop at SEARCH_COUNT_LIMIT, and larger counts are reported as
+    e.g. "99+". The counts are cached for a few seconds per user and normalized search term, since
+    typeahead clients ask for the same counts on every keystroke.
+    """
+
     def get(self, request, *args, **kwargs):
-        search_term = request.query_params.get('q')
+        search_term = normalize_search_term(request.query_params.get('q') or '')
         if not search_term:
             raise rest_framework.exceptions.ValidationError(
                 'You must provide the search term.')
 
-        count = {
-            'moogts_count': self.get_moogts_count(search_term),
-            'views_count': self.get_views_count(search_term),
-            'polls_count': self.get_polls_count(search_term),
-            'arguments_count': self.get_arguments_count(search_term),
-            'accounts_count': self.get_accounts_count(search_term)
-        }
-
-        return Response(count)
-
-    def get_moogts_count(self, search_term):
-        queryset = Moogt.objects.get_all_moogts().filter_using_search_term(search_term)
+        try:
+            approximate = serializers.BooleanField().to_internal_value(
+                request.query_params.get('approximate', 'false'))
+        except rest_framework.exceptions.ValidationError as e:
+            raise rest_framework.exceptions.ValidationError({'approximate': e.detail})
+        limit = SEARCH_COUNT_LIMIT + 1 if approximate else None
+
+        cache_key = get_search_cache_key('counts', request.user.pk, limit, search_term)
+        counts = cache.get(cache_key)
+        if counts is None:
+            counts = coalesce(cache_key, lambda: count_in_one_query({
+                'moogts_count': self.get_moogts_queryset(search_term),
+                'views_count': self.get_views_queryset(search_term),
+                'polls_count': self.get_polls_queryset(search_term),
+                'arguments_count': self.get_arguments_queryset(search_term),
+                'accounts_count': self.get_accounts_queryset(search_term),
+            }, limit=limit))
+            cache.set(cache_key, counts, timeout=SEARCH_COUNT_CACHE_TTL)
+
+        if approximate:
+            counts = {key: f'{SEARCH_COUNT_LIMIT}+' if count > SEARCH_COUNT_LIMIT else count
+                      for key, count in counts.items()}
+
+        return Response(counts)
+
+    # The plain querysets are used rather than the default managers, the counts don't need the
+    # annotations and eager loading the managers do for serialization.
+
+    def get_moogts_queryset(self, search_term):
+        queryset = MoogtQuerySet(Moogt).filter(is_removed=False).get_all_moogts() \
+            .filter_using_search_term(search_term)
         if self.request.user.is_authenticated:
             queryset = queryset.filter_moogts_by_blocked_users(
                 self.request.user)
-        return queryset.count()
+        return queryset
 
-    def get_views_count(self, search_term):
-        queryset = View.objects.filter_using_search_term(search_term)
+    def get_views_queryset(self, search_term):
+        queryset = ViewQuerySet(View).filter(is_removed=False).filter_using_search_term(search_term)
         if self.request.user.is_authenticated:
             queryset = queryset.filter_views_by_blocked_users(
                 self.request.user)
-        return queryset.count()
+        return queryset
 
-    def get_polls_count(self, search_term):
-        queryset = Poll.objects.filter_using_search_term(search_term)
+    def get_polls_queryset(self, search_term):
+        queryset = PollQuerySet(Poll).filter(is_removed=False).filter_using_search_term(search_term)
         if self.request.user.is_authenticated:
             queryset = queryset.filter_poll_by_blocked_user(self.request.user)
-        return queryset.count()
+        return queryset
 
-    def get_arguments_count(self, search_term):
-        queryset = Argument.objects.filter_using_search_term(search_term)
-        return queryset.count()
+    def get_arguments_queryset(self, search_term):
+        return ArgumentQuerySet(Argument).filter(is_removed=False).filter_using_search_term(search_term)
 
-    def get_accounts_count(self, search_term):
-        queryset = MoogtMedaUser.objects.exclude(
+    def get_accounts_queryset(self, search_term):
+        queryset = MoogtMedaUserQuerySet(MoogtMedaUser).exclude(
             pk=self.request.user.pk).filter_using_search_term(search_term)
 
         if self.request.user.is_authenticated:
             queryset = queryset.filter_blocked_users(self.request.user)
 
-        return queryset.count()
+        return queryset
 
 
 class TelegramOptInApiView(generics.GenericAPIView):
@@ -4,6 +4,7 @@ from model_utils.managers import SoftDeletableManager
 from api.enums import ViewType
 from arguments.enums import ArgumentReactionType
 from meda.enums import ArgumentType
+from meda.search import filter_by_full_text
 
 
 class ArgumentQuerySet(QuerySet):
@@ -55,7 +56,7 @@ class ArgumentQuerySet(QuerySet):
         return self.prefetch_related_objects().filter(user=user, type=ArgumentType.NORMAL.name)
 
     def filter_using_search_term(self, search_term):
-        return self.filter(argument__icontains=search_term)
+        return filter_by_full_text(self, search_term, fallback_lookups=['argument__icontains'])
 
 
 class ArgumentManager(SoftDeletableManager):
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.5 on 2026-10-19 05:56
+
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import migrations
+
+from meda.search import SEARCH_CONFIG
+
+
+def build_search_vectors(apps, schema_editor):
+    # Full text search is postgres only, the other databases fall back to `icontains` lookups.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('CREATE INDEX argument_search_vector_idx ON arguments_argument USING gin (search_vector);')
+
+    Argument = apps.get_model('arguments', 'Argument')
+    Argument.objects.using(schema_editor.connection.alias).update(
+        search_vector=SearchVector('argument', weight='A', config=SEARCH_CONFIG))
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('DROP INDEX argument_search_vector_idx;')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arguments', '0030_alter_argument_id_alter_argumentactivity_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='argument',
+            name='search_vector',
+            field=SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(build_search_vectors, drop_search_index),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.5 on 2026-10-19 07:45
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_relation(stats, relation, count_field):
+    through = stats.model._meta.get_field(relation).remote_field.through
+    source_field = f'{stats.model._meta.model_name}_id'
+    counts = through.objects.filter(**{source_field: OuterRef('pk')}).order_by() \
+        .values(source_field).annotate(count=Count('pk')).values('count')
+    stats.update(**{count_field: Coalesce(Subquery(counts), 0)})
+
+
+def count_votes(apps, schema_editor):
+    ArgumentStats = apps.get_model('arguments', 'ArgumentStats')
+    stats = ArgumentStats.objects.using(schema_editor.connection.alias)
+    count_relation(stats, 'applauds', 'applaud_count')
+    count_relation(stats, 'upvotes', 'upvote_count')
+    count_relation(stats, 'downvotes', 'downvote_count')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arguments', '0031_argument_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='argumentstats',
+            name='applaud_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='argumentstats',
+            name='downvote_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='argumentstats',
+            name='upvote_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_votes, migrations.RunPython.noop),
+    ]
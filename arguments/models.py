@@ -1,12 +1,11 @@
 from annoying.fields import AutoOneToOneField
-from django.contrib.contenttypes.fields import ContentType, GenericRelation
+from django.contrib.contenttypes.fields import GenericRelation
 from django.db import models
 from django.utils import timezone
-from django_comments_xtd.conf import settings
-from django_comments_xtd.models import XtdComment
 from model_utils.models import SoftDeletableModel
 
 from api.enums import ReactionType
+from meda.behaviors import Searchable
 from meda.enums import ArgumentType
 from meda.models import AbstractActivity, BaseReport, Score
 from meda.models import AbstractActivityAction
@@ -16,7 +15,7 @@ from .enums import ArgumentActivityType, ArgumentReactionType
 from .managers import ArgumentActivityManager, ArgumentManager, ArgumentQuerySet
 
 
-class Argument(SoftDeletableModel):
+class Argument(Searchable, SoftDeletableModel):
     """Represents a single argument in a Moogt by a user. A Moogt is made up of
     many Arguments.
     """
@@ -92,6 +91,8 @@ class Argument(SoftDeletableModel):
 
     objects = ArgumentManager.from_queryset(ArgumentQuerySet)()
 
+    search_document_fields = (('argument', 'A'),)
+
     def __str__(self):
         if self.argument == None:
             return ''
@@ -157,12 +158,7 @@ class Argument(SoftDeletableModel):
             return None
 
     def comments_count(self):
-        ctype = ContentType.objects.get_for_model(self)
-        comments = XtdComment.objects.filter(content_type=ctype,
-                                             object_pk=self.pk,
-                                             site__pk=settings.SITE_ID,
-                                             is_public=True)
-        return comments.count()
+        return self.comment_count
 
     def reactions_count_of_type(self, reaction_type):
         """
@@ -236,11 +232,18 @@ class ArgumentStats(models.Model):
     # The number of disagreement ocunt from unique users
     disagreement_count = models.IntegerField(default=0)
 
+    # The number of applauds, upvotes and downvotes, kept along with the relations above.
+    applaud_count = models.IntegerField(default=0)
+
+    upvote_count = models.IntegerField(default=0)
+
+    downvote_count = models.IntegerField(default=0)
+
     def func_num_votes(self):
-        return self.upvotes.count() - self.downvotes.count()
+        return self.upvote_count - self.downvote_count
 
     def func_num_voters(self):
-        return self.upvotes.count() + self.downvotes.count()
+        return self.upvote_count + self.downvote_count
 
     def get_argument(self):
         return self.argument
@@ -261,7 +264,7 @@ class ArgumentStats(models.Model):
         self.downvotes = value
 
     def applauds_count(self):
-        return self.applauds.all().count()
+        return self.applaud_count
 
 
 class ArgumentImage(models.Model):
@@ -1,13 +1,14 @@
-from django.contrib.contenttypes.models import ContentType
-from django_comments_xtd.api.frontend import commentbox_props
+from django.db.models import prefetch_related_objects
+from django.db.models.manager import BaseManager
 from django_comments_xtd.api.serializers import ReadCommentSerializer
-from django_comments_xtd.models import XtdComment
 from rest_framework import serializers
 from rest_framework.fields import SerializerMethodField, IntegerField, DateTimeField
 from rest_framework_serializer_extensions.serializers import SerializerExtensionsMixin
 
 from api.enums import ReactionType
-from api.serializers import StatsItemSerializer, ReactionStatsSerializer, BaseViewArgumentSerializer
+from api.serializers import StatsItemSerializer, ReactionStatsSerializer, BaseViewArgumentSerializer, \
+    ViewerContextListSerializer
+from api.viewer import get_viewer_context
 from arguments.models import Argument, ArgumentActivity, ArgumentActivityAction, ArgumentImage, ArgumentReport
 from moogts.models import MoogtStatus, MoogtActivityBundle
 from users.serializers import MoogtMedaUserSerializer
@@ -23,6 +24,13 @@ class ArgumentNotificationSerializer(SerializerExtensionsMixin, serializers.Mode
         )
 
 
+class ArgumentListSerializer(ViewerContextListSerializer):
+    def to_representation(self, data):
+        arguments = list(data.all() if isinstance(data, BaseManager) else data)
+        prefetch_related_objects(arguments, 'activities')
+        return super().to_representation(arguments)
+
+
 class ArgumentSerializer(SerializerExtensionsMixin, serializers.ModelSerializer, BaseViewArgumentSerializer):
     stats = serializers.SerializerMethodField()
     proposition_created = serializers.SerializerMethodField()
@@ -35,6 +43,7 @@ class ArgumentSerializer(SerializerExtensionsMixin, serializers.ModelSerializer,
         fields = ['id', 'argument', 'type', 'is_edited', 'has_activities',
                   'proposition_created', 'stats', 'reaction_type', 'created_at', 'updated_at',
                   'consecutive_expired_turns_count', 'has_reactions', 'user', 'user_id']
+        list_serializer_class = ArgumentListSerializer
         expandable_fields = dict(
 
             moogt=dict(
@@ -86,8 +95,8 @@ class ArgumentSerializer(SerializerExtensionsMixin, serializers.ModelSerializer,
         disagreements_count = len(users_disagreeing)
         total = endorsements_count + disagreements_count
 
-        ctype = ContentType.objects.get_for_model(argument)
         current_user = self.context['request'].user
+        viewer_context = get_viewer_context(self.context)
 
         return {
             'endorse': ReactionStatsSerializer({
@@ -105,15 +114,13 @@ class ArgumentSerializer(SerializerExtensionsMixin, serializers.ModelSerializer,
                 'has_reaction_with_statement': self.has_reaction_with_statement(current_user, endorsements)
             }).data,
             'applaud': StatsItemSerializer({
-                'count': len(applauds),
+                'count': argument.stats.applaud_count,
                 'selected': self.has_user_applauded(current_user, applauds),
                 'allowed': False,
             }).data,
-            'comment': {**commentbox_props(argument, self.context['request'].user),
+            'comment': {**viewer_context.get_commentbox_props(argument),
                         'count': argument.comment_count,
-                        'selected': XtdComment.objects.filter(user_id=self.context['request'].user.id,
-                                                              content_type=ctype,
-                                                              object_pk=argument.pk).exists(),
+                        'selected': viewer_context.has_commented(argument),
                         'allowed': True
                         },
         }
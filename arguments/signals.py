@@ -1,9 +1,10 @@
 from asgiref.sync import async_to_sync
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, m2m_changed
 from django.dispatch import receiver
 
+from api.utils import recount_relation
 from moogts.enums import MoogtWebsocketMessageType
-from .models import ArgumentActivity, Argument
+from .models import ArgumentActivity, Argument, ArgumentStats
 from .utils import notify_ws_clients_for_argument as notify_ws_clients_for_argument
 
 
@@ -14,3 +15,13 @@ def activity_created_notification(sender, instance, created, **kwargs):
 
     if argument.moogt and created:
         async_to_sync(notify_ws_clients_for_argument)(argument, message_type=type)
+
+
+@receiver(m2m_changed, sender=ArgumentStats.applauds.through)
+def applauds_changed_receiver(sender, instance, action, reverse, **kwargs):
+    """
+    Keeps the applaud count in step when the applauds are changed through the relation's manager,
+    `toggle_relation` updates it itself.
+    """
+    if action in ('post_add', 'post_remove', 'post_clear') and not reverse:
+        recount_relation(instance.applauds, 'applaud_count')
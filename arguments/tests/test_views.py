@@ -2,8 +2,11 @@
 import datetime
 import json
 import os
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
@@ -13,10 +16,12 @@ from rest_framework.test import APITestCase
 from api.enums import ReactionType, ViewType
 from api.tests.tests import create_user_and_login
 from api.tests.utility import create_user_and_login, create_argument, create_comment, create_moogt_with_user, \
-    create_argument_activity, generate_photo_file, create_view, create_user
+    create_argument_activity, generate_photo_file, create_view, create_user, create_reaction_view
+from api.utils import add_to_relation, remove_from_relation
 from arguments.models import Argument, ArgumentReport, ArgumentStats, ArgumentActivity, ArgumentActivityType, ArgumentReactionType, \
     ArgumentImage
 from arguments.tests.factories import ArgumentFactory
+from arguments.views import ArgumentReactionApiView, UpvoteDownvoteArgumentView
 from meda.enums import ArgumentType, ActivityStatus
 from meda.tests.test_models import create_moogt
 from meda.models import AbstractActivityAction
@@ -24,6 +29,7 @@ from moogtmeda.settings import MEDIA_ROOT
 from moogts.models import Moogt, ReadBy, MoogtActivity, MoogtStatus, MoogtActivityType, MoogtActivityBundle
 from moogts.serializers import MoogtNotificationSerializer
 from notifications.enums import NOTIFICATION_TYPES
+from users.events import process_all_activity_events
 from users.models import Activity, MoogtMedaUser, CreditPoint, ActivityType
 from views.models import View
 
@@ -106,6 +112,27 @@ class ApplaudArgumentApiViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(argument.stats.applauds.count(), 0)
         self.assertEqual(ArgumentStats.objects.first().applauds.count(), 0)
+        self.assertEqual(ArgumentStats.objects.first().applaud_count, 0)
+
+    def test_applauding_twice_at_once_counts_once(self):
+        """
+        If the applaud of a concurrent request already got in, applauding should neither add it
+        again nor count it twice.
+        """
+        user = create_user_and_login(self)
+        argument = create_argument(user, "test argument")
+        stats = argument.stats
+
+        self.assertTrue(add_to_relation(stats.applauds, user))
+        self.assertFalse(add_to_relation(stats.applauds, user))
+        self.assertEqual(stats.applauds.count(), 1)
+
+        self.assertTrue(remove_from_relation(stats.applauds, user))
+        self.assertFalse(remove_from_relation(stats.applauds, user))
+        self.assertEqual(stats.applauds.count(), 0)
+
+        self.post(argument.id)
+        self.assertEqual(ArgumentStats.objects.get(argument=argument).applaud_count, 1)
 
     def test_stats_are_properly_set(self):
         """
@@ -230,7 +257,7 @@ class GetArgumentReactingUsersApiViewTests(APITestCase):
         user_2 = create_user('user_2', 'test_password')
 
         follower = create_user('follower', 'test_password')
-        user_2.follower.add(follower)
+        user_2.followers.add(follower)
 
         self.argument.stats.applauds.add(user_1)
         self.argument.stats.applauds.add(user_2)
@@ -239,15 +266,16 @@ class GetArgumentReactingUsersApiViewTests(APITestCase):
         self.assertEqual(response.data['count'], 2)
         self.assertEqual(response.data['results'][0]['id'], user_2.id)
 
-    def test_users_who_you_are_following_should_be_ranked_first(self):
+    def test_users_who_you_are_following_are_flagged(self):
         """
-        The people that you're following should be ranked highest in the response.
+        The users should be ranked by their follower count, and the ones you're following flagged.
         """
         user_1 = create_user('user_1', 'test_password')
         follower_user = create_user('follower_user', 'test_password')
-        user_1.follower.add(follower_user)
+        user_1.followers.add(follower_user)
         user_2 = create_user('user_2', 'test_password')
-        user_2.follower.add(self.user)
+        user_2.followers.add(self.user)
+        user_2.followers.add(follower_user)
 
         self.argument.stats.applauds.add(user_1)
         self.argument.stats.applauds.add(user_2)
@@ -255,6 +283,28 @@ class GetArgumentReactingUsersApiViewTests(APITestCase):
         response = self.get(self.argument.id)
         self.assertEqual(response.data['count'], 2)
         self.assertEqual(response.data['results'][0]['id'], user_2.id)
+        self.assertEqual(response.data['results'][0]['followers_count'], 2)
+        self.assertTrue(response.data['results'][0]['is_following'])
+        self.assertEqual(response.data['results'][1]['followers_count'], 1)
+        self.assertFalse(response.data['results'][1]['is_following'])
+
+    def test_users_are_paged_by_cursor(self):
+        """
+        The next page should continue after the last user of the previous page.
+        """
+        users = [create_user(f'user_{i}', 'test_password') for i in range(3)]
+        for i, user in enumerate(users):
+            self.argument.stats.applauds.add(user)
+            for j in range(i):
+                user.followers.add(users[j])
+
+        url = reverse('api:arguments:users_reacting', kwargs={'version': 'v1', 'pk': self.argument.id})
+        response = self.client.get(f'{url}?limit=2')
+        self.assertEqual([result['id'] for result in response.data['results']], [users[2].id, users[1].id])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([result['id'] for result in response.data['results']], [users[0].id])
+        self.assertIsNone(response.data['next'])
 
 
 class CreateArgumentViewTests(APITestCase):
@@ -454,6 +504,7 @@ class CreateArgumentViewTests(APITestCase):
                               'status': 'continue'})
 
         argument_id = response.data['id']
+        process_all_activity_events()
         activity = Activity.objects.get(object_id=argument_id)
         self.assertIsNotNone(activity)
         self.assertEqual(activity.profile, user.profile)
@@ -926,6 +977,22 @@ class UpvoteDownvoteArgumentViewTests(APITestCase):
                       'pk': argument_id, 'version': 'v1'})
         return self.client.post(url, data)
 
+    def test_an_upvote_made_by_a_concurrent_request_is_not_recorded_twice(self):
+        """
+        If a concurrent request already upvoted, the upvote should neither be counted nor recorded again.
+        """
+        user = create_user('voter', 'test_password')
+        moogt = create_moogt(has_opening_argument=True)
+        argument = moogt.arguments.first()
+        add_to_relation(argument.stats.upvotes, user)
+
+        # The other request's upvote lands between this request's remove and add.
+        with patch('api.utils.remove_from_relation', return_value=False):
+            UpvoteDownvoteArgumentView.maybe_upvote(argument, user)
+
+        self.assertEqual(ArgumentStats.objects.get(argument=argument).upvote_count, 0)
+        self.assertFalse(Activity.objects.filter(type=ActivityType.upvote_argument.name).exists())
+
     def test_unauthenticated_user_attempting_to_upvote_or_downvote(self):
         response = self.post(1, {})
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -1037,6 +1104,24 @@ class UpvoteDownvoteArgumentViewTests(APITestCase):
         self.assertEqual(credit_point.type,
                          ActivityType.downvote_argument.name)
 
+    def test_vote_counts(self):
+        """
+        The vote counts should follow the votes as they are toggled.
+        """
+        create_user_and_login(self)
+        moogt = create_moogt(has_opening_argument=True)
+        argument = moogt.arguments.first()
+
+        response = self.post(argument.id, {'action': 'upvote'})
+        self.assertEqual((response.data['num_upvotes'], response.data['num_downvotes']), (1, 0))
+
+        response = self.post(argument.id, {'action': 'downvote'})
+        self.assertEqual((response.data['num_upvotes'], response.data['num_downvotes']), (0, 1))
+
+        response = self.post(argument.id, {'action': 'downvote'})
+        self.assertEqual((response.data['num_upvotes'], response.data['num_downvotes']), (0, 0))
+        self.assertEqual(argument.stats.upvotes.count() + argument.stats.downvotes.count(), 0)
+
     def test_upvote_downvote_upvote_single_credit_point_created(self):
         """
         Upvote activity creates credit points once when upvoted downvoted and upvoted again in the database when called from API
@@ -1583,6 +1668,94 @@ class ArgumentReactionAPIViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(argument.argument_reactions.count(), 2)
 
+    def test_reaction_counts_follow_the_reactions(self):
+        """
+        The endorsement and disagreement counts should follow the reactions as they are toggled.
+        """
+        user = create_user_and_login(self)
+        proposition = create_user("username", "password")
+        argument = create_argument(proposition, "test argument")
+
+        def get_counts():
+            stats = ArgumentStats.objects.get(argument=argument)
+            return stats.endorsement_count, stats.disagreement_count
+
+        self.post({'type': ReactionType.ENDORSE.name, 'argument_id': argument.id})
+        self.assertEqual(get_counts(), (1, 0))
+
+        self.post({'type': ReactionType.ENDORSE.name, 'content': 'test content', 'argument_id': argument.id})
+        self.assertEqual(get_counts(), (1, 0))
+
+        self.post({'type': ReactionType.ENDORSE.name, 'argument_id': argument.id})
+        self.assertEqual(get_counts(), (1, 0))
+
+        self.post({'type': ReactionType.DISAGREE.name, 'content': 'test content', 'argument_id': argument.id})
+        self.assertEqual(get_counts(), (1, 1))
+
+        create_user_and_login(self, 'test_username', 'password')
+        self.post({'type': ReactionType.DISAGREE.name, 'argument_id': argument.id})
+        self.assertEqual(get_counts(), (1, 2))
+
+        self.post({'type': ReactionType.ENDORSE.name, 'argument_id': argument.id})
+        self.assertEqual(get_counts(), (2, 1))
+
+    def test_reaction_counts_are_not_inflated_by_concurrent_reactions(self):
+        """
+        A reaction made while another one of the same type by the user was in flight shouldn't count
+        the user twice.
+        """
+        user = create_user_and_login(self)
+        proposition = create_user("username", "password")
+        argument = create_argument(proposition, "test argument")
+
+        # The other request has made and counted its reaction since the reactions of the user were looked at.
+        create_reaction_view(user, argument, content='test content', type=ViewType.ARGUMENT_REACTION.name,
+                             reaction_type=ReactionType.ENDORSE.name)
+        ArgumentStats.objects.update_or_create(argument=argument, defaults={'endorsement_count': 1})
+        with patch.object(ArgumentReactionApiView, 'get_user_reactions',
+                          return_value={'count': 0, 'opposing_count': 0, 'with_statement_count': 0,
+                                        'without_statement_id': None, 'opposing_without_statement_id': None}):
+            self.post({'type': ReactionType.ENDORSE.name, 'content': 'test content 2', 'argument_id': argument.id})
+
+        self.assertEqual(argument.argument_reactions.filter(reaction_type=ReactionType.ENDORSE.name).count(), 2)
+        self.assertEqual(ArgumentStats.objects.get(argument=argument).endorsement_count, 1)
+
+    def test_a_reaction_without_statement_is_made_once(self):
+        """
+        A user can't have two reactions of the same type without a statement on an argument.
+        """
+        user = create_user_and_login(self)
+        proposition = create_user("username", "password")
+        argument = create_argument(proposition, "test argument")
+
+        data = {'type': ViewType.ARGUMENT_REACTION.name, 'reaction_type': ReactionType.ENDORSE.name,
+                'parent_argument': argument, 'user': user}
+        View.objects.create(**data)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            View.objects.create(**data)
+
+    def test_reaction_queries_do_not_grow_with_the_reactions(self):
+        """
+        Reacting to an argument should cost the same number of queries however many reactions it has.
+        """
+        proposition = create_user("username", "password")
+        argument = create_argument(proposition, "test argument")
+
+        def count_queries(username):
+            view = ArgumentReactionApiView()
+            view.request = SimpleNamespace(user=create_user(username, 'password'),
+                                           data={'type': ReactionType.ENDORSE.name})
+            with CaptureQueriesContext(connection) as queries:
+                view.react(view.request, argument, ViewType.ARGUMENT_REACTION.name)
+            return len(queries)
+
+        count_queries('first_user')
+        queries_count = count_queries('second_user')
+        for i in range(5):
+            count_queries(f'user_{i}')
+        self.assertEqual(count_queries('last_user'), queries_count)
+        self.assertEqual(ArgumentStats.objects.get(argument=argument).endorsement_count, 8)
+
     def test_reaction_from_a_moogter_creates_an_activity(self):
         """
         If a moogter on an argument reacts without statement to the argument of an opponent
@@ -1724,6 +1897,7 @@ class ArgumentCommentCreateAPITests(APITestCase):
             'comment': 'test comment'
         })
 
+        argument.refresh_from_db()
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(argument.comments_count(), 1)
         self.assertEqual(user.notifications.count(), 1)
@@ -1786,9 +1960,8 @@ class ArgumentCommentCreateAPITests(APITestCase):
 
 
 class ListArgumentCommentsAPITests(APITestCase):
-    def get(self, argument_id, limit=3, offset=0):
-        url = reverse('api:arguments:list_comment', kwargs={'version': 'v1', 'pk': argument_id}) + '?limit=' + str(
-            limit) + '&offset=' + str(offset)
+    def get(self, argument_id, limit=3):
+        url = reverse('api:arguments:list_comment', kwargs={'version': 'v1', 'pk': argument_id}) + '?limit=' + str(limit)
         return self.client.get(url, format='json')
 
     def reply(self, body=None):
@@ -1810,7 +1983,7 @@ class ListArgumentCommentsAPITests(APITestCase):
         response = self.get(argument.id, limit=5)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(len(response.data['results']), 5)
         self.assertEqual(response.data['results'][0]['user_id'], user.id)
 
     def test_reply_to_comment(self):
@@ -1832,7 +2005,8 @@ class ListArgumentCommentsAPITests(APITestCase):
         response = self.get(argument.id, limit=5)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['reply_count'], 1)
 
 
 class ListArgumentsAPITests(APITestCase):
@@ -2303,6 +2477,40 @@ class ListConcludingArgumentsApiViewTests(APITestCase):
         self.assertEqual(response.data['results'][1]['id'], argument2.id)
 
 
+class ExportArgumentsApiViewTests(APITestCase):
+    def get(self, moogt_id):
+        url = reverse('api:arguments:export_arguments',
+                      kwargs={'version': 'v1', 'pk': moogt_id})
+        return self.client.get(url)
+
+    def test_streams_the_arguments_in_chronological_order(self):
+        """
+        It should stream every argument of the moogt as a json line, oldest first.
+        """
+        proposition = create_user_and_login(self)
+        opposition = create_user("username", "password")
+
+        moogt = create_moogt_with_user(
+            proposition_user=proposition, opposition=opposition, started_at_days_ago=1)
+
+        argument1 = create_argument(proposition, "argument1", moogt=moogt)
+        argument2 = create_argument(opposition, "argument2", moogt=moogt)
+
+        response = self.get(moogt.id)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([line['id'] for line in lines], [argument1.id, argument2.id])
+        self.assertEqual(lines[1]['argument'], 'argument2')
+        self.assertEqual(lines[1]['user_id'], opposition.id)
+
+    def test_non_existing_moogt(self):
+        create_user_and_login(self)
+        response = self.get(404)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
 class CreateEditRequestApiViewTests(APITestCase):
     def post(self, body=None):
         url = reverse('api:arguments:request_edit', kwargs={'version': 'v1'})
@@ -7,7 +7,7 @@ from arguments.views import (CreateArgumentView, ReportArgumentApiView, UpvoteDo
                              DeleteRequestActionApiView, EditRequestActionApiView, ListConcludingArgumentsApiView,
                              ListArgumentCommentsApiView, ListArgumentsApiView, 
                              ArgumentDetailApiView, ListArgumentActivityApiView, AdjacentArgumentsListApiView, 
-                             UploadArgumentImageApiView, ReadArgumentApiView)
+                             UploadArgumentImageApiView, ReadArgumentApiView, ExportArgumentsApiView)
 
 app_name = 'arguments'
 
@@ -29,6 +29,7 @@ urlpatterns = [
     re_path(r'^comment/$', ArgumentCommentCreateApiView.as_view(), name="comment_argument"),
     re_path(r'^comment/all/(?P<pk>\d+)/$', ListArgumentCommentsApiView.as_view(), name='list_comment'),
     re_path(r'^all/(?P<pk>\d+)/$', ListArgumentsApiView.as_view(), name='list_argument',),
+    re_path(r'^export/(?P<pk>\d+)/$', ExportArgumentsApiView.as_view(), name='export_arguments'),
     re_path(r'^concluding/all/(?P<pk>\d+)/$', ListConcludingArgumentsApiView.as_view(), name='list_concluding_argument'),
     re_path(r'^detail/(?P<pk>\d+)/$', ArgumentDetailApiView.as_view(), name='argument_detail'),
     re_path(r'^adjacent/(?P<pk>\d+)/$', AdjacentArgumentsListApiView.as_view(), name='adjacent_arguments_list'),
@@ -19,10 +19,11 @@ from rest_framework_serializer_extensions.views import SerializerExtensionsAPIVi
 from api.enums import ViewType, ReactionType
 from api.mixins import ReportMixin, ViewArgumentReactionMixin, ApplaudMixin, BrowseReactionsMixin, CommentMixin, \
     ActivityActionValidationMixin, ActivityCreationValidationMixin, CreateImageMixin
-from api.pagination import SmallResultsSetPagination
+from api.pagination import SmallResultsSetPagination, CommentPagination, ReactingUserPagination
 from api.serializers import CommentSerializer
-from api.utils import get_union_queryset, inflate_referenced_objects
-from arguments.models import Argument, ArgumentActivity, ArgumentActivityType
+from api.utils import get_union_queryset, inflate_referenced_objects, ndjson_response, EXPORT_CHUNK_SIZE, \
+    toggle_relation, remove_from_relation, update_relation_count
+from arguments.models import Argument, ArgumentActivity, ArgumentActivityType, ArgumentStats
 from arguments.serializers import ArgumentReportSerializer, ArgumentSerializer, ArgumentImageSerializer, \
     ArgumentActivitySerializer, ArgumentReactionSerializer, ListArgumentSerialier, \
     ArgumentNotificationSerializer
@@ -35,6 +36,7 @@ from moogts.models import Moogt, MoogtActivityBundle
 from moogts.serializers import MoogtNotificationSerializer
 from notifications.models import Notification, NOTIFICATION_TYPES
 from notifications.signals import notify
+from users.events import record_event
 from users.models import Activity, ActivityType, CreditPoint
 from users.serializers import MoogtMedaUserSerializer
 from views.models import View
@@ -236,11 +238,7 @@ class CreateArgumentView(SerializerExtensionsAPIViewMixin, generics.GenericAPIVi
 
     @staticmethod
     def record_activity(user, argument):
-        activity = Activity()
-        activity.profile = user.profile
-        activity.type = ActivityType.create_argument.name
-        activity.object_id = argument.id
-        activity.save()
+        record_event(user.profile, ActivityType.create_argument.name, argument.id)
 
 
 class UpvoteDownvoteArgumentView(generics.GenericAPIView):
@@ -257,7 +255,6 @@ class UpvoteDownvoteArgumentView(generics.GenericAPIView):
                 "This user can't perform this action.")
 
         action = request.data.get('action')
-        argument_stats = argument.stats
         if action == "upvote":
             self.maybe_upvote(argument, request.user)
         elif action == "downvote":
@@ -265,42 +262,41 @@ class UpvoteDownvoteArgumentView(generics.GenericAPIView):
         else:
             raise rest_framework.exceptions.ValidationError('Invalid action.')
 
+        argument_stats = ArgumentStats.objects.get(argument=argument)
         return Response({'success': True,
-                         'num_upvotes': argument_stats.upvotes.count(),
-                         'num_downvotes': argument_stats.downvotes.count()},
+                         'num_upvotes': argument_stats.upvote_count,
+                         'num_downvotes': argument_stats.downvote_count},
                         status=status.HTTP_200_OK)
 
     @staticmethod
+    @transaction.atomic
     def maybe_upvote(argument, user):
         argument_stats = argument.stats
-        if argument_stats.upvotes.filter(id=user.id).exists():
-            argument_stats.upvotes.remove(user)
-        else:
-            argument_stats.upvotes.add(user)
+        upvoted, changed = toggle_relation(argument_stats.upvotes, user, 'upvote_count')
+        if upvoted and changed:
             activity = Activity.record_activity(
                 user.profile, ActivityType.upvote_argument.name, argument.id)
 
             CreditPoint.create_upvote_downvote_credit_point(
                 ActivityType.upvote_argument, activity, argument)
 
-            if argument_stats.downvotes.filter(id=user.id).exists():
-                argument_stats.downvotes.remove(user)
+            if remove_from_relation(argument_stats.downvotes, user):
+                update_relation_count(argument_stats, 'downvote_count', -1)
 
     @staticmethod
+    @transaction.atomic
     def maybe_downvote(argument, user):
         argument_stats = argument.stats
-        if argument_stats.downvotes.filter(id=user.id).exists():
-            argument_stats.downvotes.remove(user)
-        else:
-            argument_stats.downvotes.add(user)
+        downvoted, changed = toggle_relation(argument_stats.downvotes, user, 'downvote_count')
+        if downvoted and changed:
             activity = Activity.record_activity(
                 user.profile, ActivityType.downvote_argument.name, argument.id)
 
             CreditPoint.create_upvote_downvote_credit_point(
                 ActivityType.downvote_argument, activity, argument)
 
-            if argument_stats.upvotes.filter(id=user.id).exists():
-                argument_stats.upvotes.remove(user)
+            if remove_from_relation(argument_stats.upvotes, user):
+                update_relation_count(argument_stats, 'upvote_count', -1)
 
 
 class ArgumentReactionApiView(SerializerExtensionsAPIViewMixin,
@@ -447,7 +443,7 @@ class BrowseArgumentReactionsApiView(SerializerExtensionsAPIViewMixin,
 class GetArgumentReactingUsersApiView(SerializerExtensionsAPIViewMixin, generics.ListAPIView,
                                       ViewArgumentReactionMixin):
     serializer_class = MoogtMedaUserSerializer
-    pagination_class = SmallResultsSetPagination
+    pagination_class = ReactingUserPagination
 
     def get(self, request, *args, **kwargs):
         argument = get_object_or_404(Argument, pk=kwargs.get('pk'))
@@ -456,6 +452,9 @@ class GetArgumentReactingUsersApiView(SerializerExtensionsAPIViewMixin, generics
 
         return self.list(request, *args, **kwargs)
 
+    def paginate_queryset(self, queryset):
+        return self.load_following_status(self.request, super().paginate_queryset(queryset))
+
 
 class ArgumentCommentCreateApiView(CommentMixin, generics.GenericAPIView, BasicArgumentSerializerExtensions):
     serializer_class = WriteCommentSerializer
@@ -494,7 +493,7 @@ class ArgumentCommentCreateApiView(CommentMixin, generics.GenericAPIView, BasicA
 
 class ListArgumentCommentsApiView(SerializerExtensionsAPIViewMixin, CommentMixin, generics.ListAPIView):
     serializer_class = CommentSerializer
-    pagination_class = SmallResultsSetPagination
+    pagination_class = CommentPagination
     extensions_expand = ['user__profile']
 
     def get_queryset(self):
@@ -558,6 +557,24 @@ class ListArgumentsApiView(SerializerExtensionsAPIViewMixin, BasicArgumentSerial
         return 0
 
 
+class ExportArgumentsApiView(generics.GenericAPIView):
+    """
+    Stream the whole argument history of a moogt as newline delimited JSON.
+    """
+
+    def get(self, request, *args, **kwargs):
+        moogt = get_object_or_404(Moogt, pk=self.kwargs.get('pk'))
+
+        arguments = Argument.objects \
+            .filter(moogt_id=moogt.id, modified_parent=None) \
+            .order_by('created_at', 'id') \
+            .values('id', 'type', 'user_id', 'argument', 'reply_to_id', 'react_to_id', 'reaction_type',
+                    'is_edited', 'created_at') \
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+        return ndjson_response(arguments, filename=f'moogt-{moogt.id}-arguments.ndjson')
+
+
 class ListConcludingArgumentsApiView(SerializerExtensionsAPIViewMixin, generics.ListAPIView,
                                      BasicArgumentSerializerExtensions):
     serializer_class = ArgumentSerializer
@@ -7,14 +7,15 @@ from rest_framework.generics import ListAPIView, CreateAPIView, RetrieveAPIView,
 from rest_framework.response import Response
 from rest_framework_serializer_extensions.views import SerializerExtensionsAPIViewMixin
 
-from api.pagination import SmallResultsSetPagination
-from api.utils import get_union_queryset, inflate_referenced_objects
+from api.pagination import SmallResultsSetPagination, KeysetPagination
+from api.utils import get_union_queryset, inflate_referenced_objects, ndjson_response
+from chat import presence
 from chat.enums import ConversationType, MessageType
-from chat.models import Conversation, RegularMessage, InvitationMessage, MiniSuggestionMessage
+from chat.models import Conversation, RegularMessage, InvitationMessage, MiniSuggestionMessage, Participant
 from chat.serializers import ConversationSerializer, MessageSerializer, \
     RegularMessageSerializer
-from chat.utils import get_or_create_conversation, notify_message_read
-from chat.serializers import UnreadConversationCountSerializer
+from chat.utils import get_or_create_conversation, notify_message_read, get_conversation_transcript
+from chat.serializers import UnreadConversationCountSerializer, UserPresenceSerializer
 from moogts.models import Moogt
 from users.models import MoogtMedaUser
 
@@ -40,6 +41,33 @@ class ListConversationApiView(SerializerExtensionsAPIViewMixin, ListAPIView):
             return Conversation.objects.get_user_conversations(user=user)
 
 
+class InboxPagination(KeysetPagination):
+    ordering = ('-last_message_at', '-conversation_id')
+
+
+class ConversationInboxApiView(SerializerExtensionsAPIViewMixin, ListAPIView):
+    """
+    Get the priority or general inbox of a user, paginated by a (last_message_at, id) cursor.
+    """
+    serializer_class = ConversationSerializer
+    pagination_class = InboxPagination
+
+    def get_queryset(self):
+        list_type = self.request.query_params.get(
+            'type', ConversationType.GENERAL.value)
+        if list_type not in [ConversationType.PRIORITY.value, ConversationType.GENERAL.value]:
+            raise ValidationError(f'{list_type} is an invalid query param.')
+
+        return Participant.objects.get_inbox(user=self.request.user,
+                                             is_priority=list_type == ConversationType.PRIORITY.value)
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        conversations = Conversation.objects.get_inbox_conversations(request.user, page)
+        serializer = self.get_serializer(conversations, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
 class RecentConversationsApiView(SerializerExtensionsAPIViewMixin, ListAPIView):
     """
     Get a list of recent conversation messages for a particular user.
@@ -161,6 +189,20 @@ class ListMessageApiView(ListAPIView):
         return recent
 
 
+class ExportConversationApiView(GenericAPIView):
+    """
+    Stream the whole transcript of a conversation as newline delimited JSON.
+    """
+
+    def get(self, request, *args, **kwargs):
+        conversation = get_object_or_404(Conversation, pk=self.kwargs.get('pk'))
+        if not conversation.participants.filter(user=request.user).exists():
+            raise PermissionDenied()
+
+        return ndjson_response(get_conversation_transcript(conversation),
+                               filename=f'conversation-{conversation.id}.ndjson')
+
+
 class MessageDetailApiView(RetrieveAPIView):
     serializer_class = MessageSerializer
 
@@ -395,3 +437,31 @@ class UnreadConversationCountApiView(GenericAPIView):
         }
 
         return Response(self.get_serializer(count_unread).data)
+
+
+class UserPresenceApiView(GenericAPIView):
+    """
+    Get the online status of a batch of users, e.g. ?ids=1,2,3
+    """
+    serializer_class = UserPresenceSerializer
+
+    # The maximum number of users whose presence can be requested at once.
+    MAX_USER_IDS = 100
+
+    def get(self, request, *args, **kwargs):
+        ids = request.query_params.get('ids')
+        if not ids:
+            raise ValidationError('ids query param is required.')
+
+        try:
+            user_ids = list(dict.fromkeys(int(user_id) for user_id in ids.split(',') if user_id))
+        except ValueError:
+            raise ValidationError('ids must be a comma separated list of user ids.')
+
+        if len(user_ids) > self.MAX_USER_IDS:
+            raise ValidationError(f'You can request the presence of at most {self.MAX_USER_IDS} users.')
+
+        results = [{'user_id': user_id, **user_presence}
+                   for user_id, user_presence in presence.get_presence(user_ids).items()]
+
+        return Response(self.get_serializer(results, many=True).data)
@@ -1,6 +1,11 @@
+from asgiref.sync import sync_to_async
 from channels.exceptions import StopConsumer
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 
+from chat import presence
+from chat.enums import WebSocketEventType
+from meda.utils import get_user_group_name
+
 
 class ChatConsumer(AsyncJsonWebsocketConsumer):
     """
@@ -22,13 +27,14 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
             # Reject the connection
             await self.close()
         else:
-            self.group_name = f'{user.id}'
+            self.group_name = get_user_group_name(user.id)
             await self.channel_layer.group_add(
                 group=self.group_name,
                 channel=self.channel_name
             )
             # Accept the connection
             await self.accept()
+            await sync_to_async(presence.user_connected)(user.id)
 
     async def disconnect(self, close_code):
         if hasattr(self, 'group_name'):
@@ -36,14 +42,17 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
                 group=self.group_name,
                 channel=self.channel_name
             )
+            await sync_to_async(presence.user_disconnected)(self.scope['user'].id)
         raise StopConsumer()
 
     async def receive_json(self, content, **kwargs):
-        pass
+        if content.get('type') == WebSocketEventType.HEARTBEAT.value:
+            await sync_to_async(presence.user_heartbeat)(self.scope['user'].id)
 
     async def receive_group_message(self, event):
-        # Remove the type key
+        # Remove the type key, and the conversation stream which only multiplexed connections use
         event.pop('type', None)
+        event.pop('conversation_stream', None)
 
         # Send message to WebSocket
         await self.send_json(content=event)
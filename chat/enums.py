@@ -10,6 +10,11 @@ class WebSocketMessageType(Enum):
     ARGUMENT = 'argument'
 
 
+class WebSocketEventType(Enum):
+    """Events sent by clients over the chat websocket."""
+    HEARTBEAT = 'heartbeat'
+
+
 class MessageType(Enum):
     REGULAR_MESSAGE = 'regular_message'
     MINI_SUGGESTION_MESSAGE = 'mini_suggestion_message'
@@ -39,6 +39,34 @@ class ConversationManager(models.Manager):
     def get_recent_user_conversations(self, user):
         return self.get_user_conversations(user=user)[:5]
 
+    def get_inbox_conversations(self, user, participants):
+        """
+        Loads the conversations of an inbox page in the order of the given participant rows.
+        """
+        is_priority = {participant.conversation_id: participant.is_priority for participant in participants}
+        conversations = self.get_user_conversations(user).filter(id__in=is_priority.keys()).in_bulk()
+
+        inbox = []
+        for conversation_id, priority in is_priority.items():
+            conversation = conversations.get(conversation_id)
+            if conversation:
+                conversation.is_priority = priority
+                inbox.append(conversation)
+        return inbox
+
+
+class ParticipantQuerySet(models.QuerySet):
+    def get_inbox(self, user, is_priority):
+        """
+        The participant rows of a user's priority or general inbox. This is a plain
+        range over `participant_inbox_idx`, so it can be keyset paginated without DISTINCT.
+        """
+        return self.filter(user=user, is_priority=is_priority, last_message_at__isnull=False)
+
+
+class ParticipantManager(models.Manager.from_queryset(ParticipantQuerySet)):
+    pass
+
 
 class MessageManager(SoftDeletableManager):
     def get_queryset(self):
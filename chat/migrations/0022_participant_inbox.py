@@ -0,0 +1,44 @@
+from django.db import migrations, models
+
+
+def populate_inbox_fields(apps, schema_editor):
+    Conversation = apps.get_model('chat', 'Conversation')
+    Participant = apps.get_model('chat', 'Participant')
+    MoogtMedaUser = apps.get_model('users', 'MoogtMedaUser')
+
+    conversations = Conversation.objects.filter(last_message__isnull=False).exclude(last_message='')
+    for conversation in conversations.iterator(chunk_size=1000):
+        Participant.objects.filter(conversation=conversation).update(
+            last_message_at=conversation.updated_at or conversation.created_at)
+
+    PriorityConversation = MoogtMedaUser.priority_conversations.through
+    for row in PriorityConversation.objects.all().iterator(chunk_size=1000):
+        Participant.objects.filter(user_id=row.moogtmedauser_id,
+                                   conversation_id=row.conversation_id).update(is_priority=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0021_alter_conversation_id_alter_invitationmessage_id_and_more'),
+        ('users', '0041_alter_accountreport_id_alter_activity_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participant',
+            name='is_priority',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='participant',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['user', 'is_priority', '-last_message_at', '-conversation'],
+                               name='participant_inbox_idx'),
+        ),
+        migrations.RunPython(populate_inbox_fields, migrations.RunPython.noop),
+    ]
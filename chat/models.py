@@ -4,7 +4,8 @@ from django.core.exceptions import ValidationError
 from django.db import models
 from model_utils.models import SoftDeletableModel
 
-from chat.managers import ConversationManager, MessageManager, MessageSummaryManager, InvitationMessageManager, RegularMessageManager
+from chat.managers import ConversationManager, MessageManager, MessageSummaryManager, InvitationMessageManager, RegularMessageManager, \
+    ParticipantManager
 from invitations.models import Invitation
 from meda.behaviors import Timestampable
 from invitations.models import ModeratorInvitation
@@ -24,8 +25,19 @@ class Conversation(Timestampable):
 
     objects = ConversationManager()
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Keep the inbox position of the participants in sync with the last message.
+        self.participants.update(last_message_at=self.get_last_message_at())
+
+    def get_last_message_at(self):
+        if not self.last_message:
+            return None
+        return self.updated_at or self.created_at
+
     def add_participant(self, user, role):
-        participant = Participant(user=user, role=role, conversation=self)
+        participant = Participant(user=user, role=role, conversation=self,
+                                  last_message_at=self.get_last_message_at())
         # This is to validate the role, i.e. based on the choices given to the CharField.
         # If it's invalid it will throw a ValidationError.
         participant.full_clean()
@@ -73,6 +85,21 @@ class Participant(models.Model):
                              on_delete=models.SET_NULL,
                              null=True)
 
+    # Whether or not the user has this conversation in their priority list.
+    # This mirrors `MoogtMedaUser.priority_conversations` for inbox queries.
+    is_priority = models.BooleanField(default=False)
+
+    # The time of the last message in the conversation, null if it has no message yet.
+    last_message_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ParticipantManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'is_priority', '-last_message_at', '-conversation'],
+                         name='participant_inbox_idx'),
+        ]
+
 
 class Message(Timestampable, SoftDeletableModel):
     """
@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+# How long (in seconds) a connection is considered alive without a heartbeat.
+PRESENCE_TTL = getattr(settings, 'PRESENCE_TTL', 60)
+
+CONNECTIONS_KEY = 'presence:connections:{}'
+LAST_SEEN_KEY = 'presence:last_seen:{}'
+
+# The last seen timestamp outlives the connection counter so clients can
+# still show "last seen x minutes ago" for users who went offline.
+LAST_SEEN_TTL = getattr(settings, 'PRESENCE_LAST_SEEN_TTL', 60 * 60 * 24 * 7)
+
+
+def _connections_key(user_id):
+    return CONNECTIONS_KEY.format(user_id)
+
+
+def _last_seen_key(user_id):
+    return LAST_SEEN_KEY.format(user_id)
+
+
+def user_connected(user_id):
+    """
+    Registers a new websocket connection for the user.
+
+    A user can have several open connections (e.g. chat and moogt detail), so
+    we keep a counter rather than a flag. The counter is only correct across
+    workers on a shared cache: `incr` and `decr` are atomic on Redis, the cache
+    configured in the settings. The LocMemCache of the local settings keeps a
+    counter per process.
+    """
+    key = _connections_key(user_id)
+    if not cache.add(key, 1, timeout=PRESENCE_TTL):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # The key expired between add and incr.
+            cache.set(key, 1, timeout=PRESENCE_TTL)
+        cache.touch(key, timeout=PRESENCE_TTL)
+    cache.set(_last_seen_key(user_id), timezone.now(), timeout=LAST_SEEN_TTL)
+
+
+def user_disconnected(user_id):
+    """
+    Removes one websocket connection of the user.
+    """
+    key = _connections_key(user_id)
+    try:
+        connections = cache.decr(key)
+    except ValueError:
+        connections = 0
+
+    if connections <= 0:
+        cache.delete(key)
+    cache.set(_last_seen_key(user_id), timezone.now(), timeout=LAST_SEEN_TTL)
+
+
+def user_heartbeat(user_id):
+    """
+    Keeps the connections of the user alive for another PRESENCE_TTL seconds.
+    """
+    key = _connections_key(user_id)
+    if not cache.touch(key, timeout=PRESENCE_TTL):
+        # The connection counter has expired(e.g. heartbeats were delayed), revive it.
+        cache.add(key, 1, timeout=PRESENCE_TTL)
+    cache.set(_last_seen_key(user_id), timezone.now(), timeout=LAST_SEEN_TTL)
+
+
+def get_presence(user_ids):
+    """
+    Returns the presence of the given users, fetched in two batched cache reads.
+
+    :param user_ids: An iterable of user ids.
+    :return: A dict of user id to a dict with `is_online` and `last_seen` keys.
+    """
+    user_ids = list(user_ids)
+    connections = cache.get_many([_connections_key(user_id) for user_id in user_ids])
+    last_seen = cache.get_many([_last_seen_key(user_id) for user_id in user_ids])
+
+    return {
+        user_id: {
+            'is_online': (connections.get(_connections_key(user_id)) or 0) > 0,
+            'last_seen': last_seen.get(_last_seen_key(user_id)),
+        }
+        for user_id in user_ids
+    }
+
+
+def get_online_user_ids(user_ids):
+    """
+    Returns the subset of the given user ids that currently have an open connection.
+    """
+    return [user_id for user_id, presence in get_presence(user_ids).items() if presence['is_online']]
@@ -3,5 +3,5 @@ from django.urls import re_path
 from . import consumers
 
 websocket_urlpatterns = [
-    re_path(r'ws/chat/$', consumers.ChatConsumer)
+    re_path(r'ws/chat/$', consumers.ChatConsumer.as_asgi())
 ]
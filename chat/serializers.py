@@ -248,6 +248,10 @@ class ConversationSerializer(ModelSerializer):
         if not request:
             return
 
+        # Inbox listings already know the type of every conversation.
+        if hasattr(conversation, 'is_priority'):
+            return ConversationType.PRIORITY.value if conversation.is_priority else ConversationType.GENERAL.value
+
         if Conversation.objects.get_priority_conversations(request.user).filter(id=conversation.id).exists():
             return ConversationType.PRIORITY.value
         else:
@@ -259,3 +263,9 @@ class UnreadConversationCountSerializer(serializers.Serializer):
         read_only=True)
     unread_general_count = serializers.IntegerField(
         read_only=True)
+
+
+class UserPresenceSerializer(serializers.Serializer):
+    user_id = serializers.IntegerField(read_only=True)
+    is_online = serializers.BooleanField(read_only=True)
+    last_seen = serializers.DateTimeField(read_only=True, allow_null=True)
@@ -1,4 +1,4 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, m2m_changed
 from django.dispatch import receiver, Signal
 
 from chat.utils import create_or_update_conversation, create_mini_suggestion_message, create_moderator_invitation_message
@@ -11,7 +11,9 @@ from moogts.models import MoogtMiniSuggestion
 from .enums import WebSocketMessageType
 from notifications.signals import notify
 from notifications.models import Notification
-from .models import InvitationMessage, MiniSuggestionMessage, Message, ModeratorInvitationMessage, RegularMessage
+from users.models import MoogtMedaUser
+from .models import InvitationMessage, MiniSuggestionMessage, Message, ModeratorInvitationMessage, RegularMessage, \
+    Participant
 
 # Signal that will be dispatched after saving a message, used to notify web socket clients.
 post_message_save = Signal()
@@ -44,6 +46,27 @@ def moogt_suggestion_receiver(sender, **kwargs):
             mini_suggestion.message.save()
 
 
+@receiver(m2m_changed, sender=MoogtMedaUser.priority_conversations.through)
+def priority_conversations_receiver(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Mirrors the priority list of users on their participant rows, which the inbox queries use.
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    is_priority = action == 'post_add'
+    if reverse:
+        participants = Participant.objects.filter(conversation=instance)
+        if pk_set is not None:
+            participants = participants.filter(user__in=pk_set)
+    else:
+        participants = Participant.objects.filter(user=instance)
+        if pk_set is not None:
+            participants = participants.filter(conversation__in=pk_set)
+
+    participants.update(is_priority=is_priority)
+
+
 @receiver(post_message_save)
 def notify_clients(sender, **kwargs):
     message = kwargs.get('message')
@@ -1,3 +1,5 @@
+import time
+
 import pytest
 from asgiref.sync import sync_to_async
 from channels.db import database_sync_to_async
@@ -8,12 +10,18 @@ from rest_framework_jwt.settings import api_settings
 from chat.enums import WebSocketMessageType
 from chat.models import Conversation, Participant, RegularMessage, InvitationMessage, MiniSuggestionMessage
 from chat.utils import notify_ws_clients, notify_message_read
+from moogtmeda.channels_middleware import token_user_cache
 from moogtmeda.routing import application
 
 jwt_payload_handler = api_settings.JWT_PAYLOAD_HANDLER
 jwt_encode_handler = api_settings.JWT_ENCODE_HANDLER
 
 
+@database_sync_to_async
+def deactivate_user(user):
+    get_user_model().objects.filter(pk=user.pk).update(is_active=False)
+
+
 @database_sync_to_async
 def create_user(username, password):
     user = get_user_model().objects.create_user(
@@ -83,6 +91,53 @@ class TestConsumer:
         assert connected is True
         await communicator.disconnect()
 
+    async def test_validated_token_is_cached(self):
+        user, access = await create_user(
+            'test.user@example.com', 'pAssw0rd'
+        )
+        communicator = WebsocketCommunicator(
+            application=application,
+            path=f'/ws/chat/?token={access}'
+        )
+        connected, _ = await communicator.connect()
+        assert connected is True
+        assert token_user_cache.get(access)[0] == user.pk
+        await communicator.disconnect()
+
+    async def test_cached_token_of_a_deactivated_user_is_rejected(self):
+        user, access = await create_user(
+            'test.user@example.com', 'pAssw0rd'
+        )
+        communicator = WebsocketCommunicator(
+            application=application,
+            path=f'/ws/chat/?token={access}'
+        )
+        connected, _ = await communicator.connect()
+        assert connected is True
+        await communicator.disconnect()
+
+        await deactivate_user(user)
+        communicator = WebsocketCommunicator(
+            application=application,
+            path=f'/ws/chat/?token={access}'
+        )
+        connected, _ = await communicator.connect()
+        assert connected is False
+        await communicator.disconnect()
+
+    async def test_cached_token_that_expired_is_rejected(self):
+        user, access = await create_user(
+            'test.user@example.com', 'pAssw0rd'
+        )
+        token_user_cache[access] = (user.pk, time.time() - 1)
+        communicator = WebsocketCommunicator(
+            application=application,
+            path=f'/ws/chat/?token={access}'
+        )
+        connected, _ = await communicator.connect()
+        assert connected is False
+        await communicator.disconnect()
+
     async def test_broadcasts_a_message_when_a_regular_message_is_created(self):
         user, access = await create_user(
             'test.user@example.com', 'pAssw0rd'
@@ -1,3 +1,5 @@
+import json
+
 from meda.tests.test_models import create_moogt
 from chat.tests.utility import create_mini_suggestion_message
 from chat.models import Conversation, Participant, InvitationMessage, MiniSuggestionMessage, RegularMessage
@@ -10,6 +12,7 @@ from rest_framework.test import APITestCase
 
 from api.tests.utility import create_moderator_invitation
 from chat.models import ModeratorInvitationMessage
+from chat.presence import user_connected, user_disconnected
 from meda.enums import ModeratorInvititaionStatus
 
 
@@ -385,7 +388,7 @@ class ListConversationApiViewTests(APITestCase):
             user=self.participant_user, role=Participant.ROLES.MOOGTER.value)
 
         self.user.priority_conversations.add(self.conversation)
-        self.user.following.add(self.participant_user)
+        self.user.followings.add(self.participant_user)
 
         response = self.get(type=ConversationType.PRIORITY.value)
 
@@ -1152,3 +1155,158 @@ class CountUnreadConversationsApiViewTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(
             response.data['unread_general_count'], 1)
+
+
+class UserPresenceApiViewTests(APITestCase):
+    def get(self, ids):
+        url = reverse('api:chat:user_presence', kwargs={'version': 'v1'})
+        return self.client.get(url, {'ids': ids})
+
+    def setUp(self) -> None:
+        self.user = create_user_and_login(self)
+        self.online_user = create_user('online_user', 'password')
+        self.offline_user = create_user('offline_user', 'password')
+        user_connected(self.online_user.id)
+
+    def tearDown(self) -> None:
+        user_disconnected(self.online_user.id)
+
+    def test_returns_the_presence_of_the_requested_users(self):
+        """
+        It should return whether each of the requested users is online.
+        """
+        response = self.get(f'{self.online_user.id},{self.offline_user.id}')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        presence = {item['user_id']: item for item in response.data}
+        self.assertTrue(presence[self.online_user.id]['is_online'])
+        self.assertIsNotNone(presence[self.online_user.id]['last_seen'])
+        self.assertFalse(presence[self.offline_user.id]['is_online'])
+
+    def test_user_goes_offline_after_the_last_connection_is_closed(self):
+        """
+        A user with two connections should be online until both are closed.
+        """
+        user_connected(self.offline_user.id)
+        user_connected(self.offline_user.id)
+        user_disconnected(self.offline_user.id)
+
+        response = self.get(f'{self.offline_user.id}')
+        self.assertTrue(response.data[0]['is_online'])
+
+        user_disconnected(self.offline_user.id)
+
+        response = self.get(f'{self.offline_user.id}')
+        self.assertFalse(response.data[0]['is_online'])
+
+    def test_invalid_ids(self):
+        """
+        It should respond with a bad request if the ids are not valid.
+        """
+        response = self.get('a,b')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConversationInboxApiViewTests(APITestCase):
+    def get(self, type, **params):
+        url = reverse('api:chat:conversation_inbox', kwargs={'version': 'v1'})
+        return self.client.get(url, {'type': type, **params}, format='json')
+
+    def setUp(self) -> None:
+        self.user = create_user_and_login(self)
+        self.conversations = []
+        for i in range(3):
+            other_user = create_user(f'inbox_user_{i}', 'password')
+            conversation = create_conversation([self.user, other_user])
+            create_regular_message(other_user, f'message {i}', conversation)
+            self.conversations.append(conversation)
+
+    def test_general_inbox_is_ordered_by_the_last_message(self):
+        """
+        The most recently active conversation should be the first one in the inbox.
+        """
+        response = self.get(ConversationType.GENERAL.value)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([conversation['id'] for conversation in response.data['results']],
+                         [conversation.id for conversation in reversed(self.conversations)])
+
+    def test_prioritized_conversation_moves_to_priority_inbox(self):
+        """
+        A prioritized conversation should only be in the priority inbox.
+        """
+        self.user.priority_conversations.add(self.conversations[0])
+
+        response = self.get(ConversationType.PRIORITY.value)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['id'], self.conversations[0].id)
+        self.assertEqual(response.data['results'][0]['type'], ConversationType.PRIORITY.value)
+
+        response = self.get(ConversationType.GENERAL.value)
+        self.assertNotIn(self.conversations[0].id, [conversation['id'] for conversation in response.data['results']])
+
+        self.user.priority_conversations.remove(self.conversations[0])
+
+        response = self.get(ConversationType.PRIORITY.value)
+        self.assertEqual(len(response.data['results']), 0)
+
+    def test_follows_the_cursor_to_the_next_page(self):
+        """
+        The next link should continue right after the last conversation of the page.
+        """
+        response = self.get(ConversationType.GENERAL.value, limit=2)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+        response = self.client.get(response.data['next'], format='json')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['id'], self.conversations[0].id)
+        self.assertIsNone(response.data['next'])
+
+    def test_conversation_without_messages_is_not_in_the_inbox(self):
+        """
+        A conversation without any message should not be listed.
+        """
+        create_conversation([self.user, create_user('silent_user', 'password')])
+
+        response = self.get(ConversationType.GENERAL.value)
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_invalid_cursor(self):
+        response = self.get(ConversationType.GENERAL.value, cursor='invalid')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ExportConversationApiViewTests(APITestCase):
+    def get(self, pk):
+        url = reverse('api:chat:export_conversation', kwargs={'version': 'v1', 'pk': pk})
+        return self.client.get(url)
+
+    def setUp(self) -> None:
+        self.user = create_user_and_login(self)
+        self.other_user = create_user('other_user', 'password')
+        self.conversation = create_conversation([self.user, self.other_user])
+
+    def test_streams_the_messages_in_chronological_order(self):
+        """
+        It should stream every message of the conversation as a json line, oldest first.
+        """
+        message_1 = create_regular_message(self.user, 'first', self.conversation)
+        message_2 = create_regular_message(self.other_user, 'second', self.conversation)
+
+        response = self.get(self.conversation.id)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([line['id'] for line in lines], [message_1.id, message_2.id])
+        self.assertEqual(lines[0]['type'], MessageType.REGULAR_MESSAGE.value)
+        self.assertEqual(lines[1]['content'], 'second')
+
+    def test_non_participant_cannot_export(self):
+        """
+        Only the participants of a conversation can export it.
+        """
+        conversation = create_conversation([self.other_user])
+
+        response = self.get(conversation.id)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
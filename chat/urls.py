@@ -7,7 +7,8 @@ from chat.api.views import (SendRegularMessageApiView, ListConversationApiView,
                             ForwardMessageApiView,
                             CountPendingMessagesOfConversationApiView, GetMoogtInvitationMessageApiView,
                             GetInvitationMessageApiView, GetMiniSuggestionMessageApiView)
-from chat.api.views import UnreadConversationCountApiView
+from chat.api.views import UnreadConversationCountApiView, UserPresenceApiView, ConversationInboxApiView, \
+    ExportConversationApiView
 
 app_name = 'chat'
 
@@ -16,6 +17,10 @@ urlpatterns = [
             ListConversationApiView.as_view(),
             name='conversation_list'),
 
+    re_path(r'^conversation/inbox/$',
+            ConversationInboxApiView.as_view(),
+            name='conversation_inbox'),
+
     re_path(r'^conversation/recent/$',
             RecentConversationsApiView.as_view(),
             name='recent_conversations'),
@@ -36,6 +41,10 @@ urlpatterns = [
             ListMessageApiView.as_view(),
             name='message_list'),
 
+    re_path(r'^conversation/export/(?P<pk>\d+)/$',
+            ExportConversationApiView.as_view(),
+            name='export_conversation'),
+
     re_path(r'^message/send/$',
             SendRegularMessageApiView.as_view(),
             name='send_message'),
@@ -75,4 +84,8 @@ urlpatterns = [
     re_path(r'^message/unread-conversation-count/$',
             UnreadConversationCountApiView.as_view(),
             name='unread_conversation_count'),
+
+    re_path(r'^presence/$',
+            UserPresenceApiView.as_view(),
+            name='user_presence'),
 ]
@@ -1,11 +1,13 @@
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 from django.db import transaction
-from django.db.models import Count, Q, F, Sum
+from django.db.models import Count, Q, F, Sum, CharField, Value
 
+from api.utils import merge_querysets
+from meda.utils import get_conversation_group_name, get_user_group_name, with_stream
 from users.models import MoogtMedaUser
 
-from .enums import WebSocketMessageType
+from .enums import WebSocketMessageType, MessageType
 from .models import MessageSummary, InvitationMessage, MiniSuggestionMessage, ModeratorInvitationMessage, RegularMessage
 from notifications.models import Notification, NOTIFICATION_TYPES
 
@@ -175,11 +177,23 @@ def notify_message_read(conversation, date):
 
 
 def group_send(conversation, notification):
+    """
+    Sends the event to the user stream of every participant, which keeps their inbox up to date, and
+    to the conversation's own stream for the clients that have the conversation open.
+
+    The events name the conversation stream, so a connection subscribed to both streams can skip the
+    copy it gets on the user stream.
+    """
     channel_layer = get_channel_layer()
     if conversation:
-        for participant in conversation.participants.all():
+        conversation_group_name = get_conversation_group_name(conversation.id)
+        notification = {**notification, 'conversation_stream': conversation_group_name}
+        group_names = [get_user_group_name(participant.user_id)
+                       for participant in conversation.participants.all()]
+        group_names.append(conversation_group_name)
+        for group_name in group_names:
             async_to_sync(channel_layer.group_send)(
-                f'{participant.user.id}', notification)
+                group_name, with_stream(group_name, notification))
 
 
 def get_notification_message_type(message):
@@ -217,3 +231,24 @@ def unread_messages(user):
         user=user).aggregate(Sum('unread_messages_count'))['unread_messages_count__sum']
 
     return unread_messages_count
+
+
+def get_conversation_transcript(conversation):
+    """
+    Returns every message of the conversation as dicts in chronological order.
+    """
+    message_querysets = {
+        MessageType.REGULAR_MESSAGE.value: conversation.regular_messages.all(),
+        MessageType.INVITATION_MESSAGE.value: conversation.invitation_messages.all(),
+        MessageType.MINI_SUGGESTION_MESSAGE.value: conversation.mini_suggestion_messages.all(),
+        MessageType.MODERATOR_INVITATION_MESSAGE.value: conversation.moderator_invitation_messages.all(),
+    }
+
+    querysets = [
+        queryset.annotate(
+            type=Value(message_type, output_field=CharField())
+        ).values('id', 'type', 'user_id', 'content', 'is_read', 'created_at').order_by('created_at', 'id')
+        for message_type, queryset in message_querysets.items()
+    ]
+
+    return merge_querysets(*querysets, key=lambda message: (message['created_at'], message['id']))
@@ -25,7 +25,8 @@ from moogts.models import Moogt, ReadBy
 from moogts.serializers import MoogtNotificationSerializer, MoogtSerializer, MoogtMiniSuggestionSerializer
 from notifications.models import Notification, NOTIFICATION_TYPES
 from notifications.signals import notify
-from users.models import ActivityType, MoogtMedaUser, Activity
+from users.events import record_event
+from users.models import ActivityType, MoogtMedaUser
 from users.serializers import MoogtMedaUserSerializer
 from django.utils import timezone
 
@@ -141,8 +142,7 @@ class UpdateInvitationView(SerializerExtensionsAPIViewMixin, generics.GenericAPI
 
                 invitation.moogt.followers.add(request.user)
                 request.user.last_opened_following_moogt = invitation.moogt
-                Activity.record_activity(request.user.profile,
-                                         ActivityType.follow_moogt.name, invitation.moogt.id)
+                record_event(request.user.profile, ActivityType.follow_moogt.name, invitation.moogt.id)
 
                 self.create_moogt_read_by(invitation.moogt)
 
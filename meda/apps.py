@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MedaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'meda'
+
+    def ready(self):
+        import meda.signals
@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils import timezone
 
@@ -38,3 +39,77 @@ class Taggable(models.Model):
         for t in tags:
             t, _ = Tag.objects.get_or_create(name=t['name'])
             self.tags.add(t)
+
+
+class ChangeTrackable(models.Model):
+    """
+    An abstract behavior that remembers the values an object was loaded with, so receivers of
+    ``post_save`` can tell whether the fields they care about were changed by the save.
+    """
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, update_fields=None, **kwargs):
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+        # What was saved is what the next save is compared against.
+        saved_values = {field.attname: self.__dict__[field.attname] for field in self._meta.concrete_fields
+                        if field.attname in self.__dict__ and
+                        (update_fields is None or field.name in update_fields or field.attname in update_fields)}
+        self._loaded_values = {**getattr(self, '_loaded_values', {}), **saved_values}
+
+    def get_loaded_value(self, field, default=None):
+        return getattr(self, '_loaded_values', {}).get(field, default)
+
+    def has_changed(self, fields):
+        """
+        Returns whether any of the fields (by attname) differs from the value it was loaded with.
+
+        Objects that weren't loaded from the database, and fields that were deferred when it was
+        loaded, count as changed.
+        """
+        loaded_values = getattr(self, '_loaded_values', None)
+        if loaded_values is None:
+            return True
+
+        return any(field in self.__dict__ and
+                   (field not in loaded_values or self.__dict__[field] != loaded_values[field])
+                   for field in fields)
+
+
+class Searchable(ChangeTrackable):
+    """
+    An abstract behavior for content that can be found through full text search.
+
+    ``search_document_fields`` lists the fields that make up the document along with their weight.
+    ``search_vector`` is kept in sync with them on postgres when a save changes them, see ``meda.search``.
+    """
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    search_document_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def get_search_document(self):
+        """
+        Returns the document as a list of (text, weight) pairs.
+        """
+        return [(getattr(self, field) or '', weight) for field, weight in self.search_document_fields]
+
+    def is_search_document_changed(self, created, update_fields):
+        """
+        Returns whether a save changed the fields of the document. Text that lives in other tables
+        (e.g. the options of a poll) has to be taken care of where it's changed.
+        """
+        fields = {field for field, _ in self.search_document_fields}
+        if update_fields is not None and not set(update_fields) & fields:
+            return False
+        return created or self.has_changed(fields)
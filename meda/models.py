@@ -8,7 +8,7 @@ from model_utils.models import SoftDeletableModel
 
 from api.enums import Visibility
 from api.models import ShareStats, Tag
-from meda.behaviors import Timestampable, Taggable
+from meda.behaviors import ChangeTrackable, Timestampable, Taggable
 from .enums import ActivityStatus
 from model_utils import Choices
 
@@ -90,7 +90,7 @@ class Stats(models.Model):
         return count
 
 
-class BaseModel(SoftDeletableModel):
+class BaseModel(ChangeTrackable, SoftDeletableModel):
     # The list of tags for the content.
     tags = models.ManyToManyField(Tag, blank=True)
 
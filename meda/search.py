@@ -0,0 +1,158 @@
+import hashlib
+import re
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.db import connections
+from django.db.models import Count, F, FloatField, Q, TextField, Value
+from django.db.models.functions import Greatest, Upper
+
+# The text search configuration used both to build the search vectors and to parse the search terms.
+SEARCH_CONFIG = getattr(settings, 'SEARCH_CONFIG', 'english')
+
+# Approximate counts stop at this many results, larger counts are reported as e.g. "99+".
+SEARCH_COUNT_LIMIT = getattr(settings, 'SEARCH_COUNT_LIMIT', 99)
+
+# How long (in seconds) search counts are cached.
+SEARCH_COUNT_CACHE_TTL = getattr(settings, 'SEARCH_COUNT_CACHE_TTL', 30)
+
+
+def is_full_text_search_enabled(using):
+    """
+    Full text search is only available on postgres, other databases (e.g. sqlite for the tests)
+    fall back to `icontains` lookups.
+    """
+    return connections[using].vendor == 'postgresql'
+
+
+def normalize_search_term(search_term):
+    """
+    Collapses whitespace and case, so that e.g. "Climate  change" and "climate change " share cache entries.
+    """
+    return ' '.join(search_term.split()).lower()
+
+
+def get_search_cache_key(kind, *parts):
+    digest = hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'search:{kind}:{digest}'
+
+
+def get_prefix_search_text(search_term):
+    """
+    Returns a raw tsquery that matches all the words of the search term, the last one as a prefix, so
+    e.g. "deb" finds "debate" while it's being typed. Returns None if the term has no words.
+    """
+    words = re.findall(r'[^\W_]+', search_term)
+    if not words:
+        return None
+    return ' & '.join(words[:-1] + [f'{words[-1]}:*'])
+
+
+def get_search_query(search_term):
+    """
+    Matches the search term as a web search (quotes, "or" and "-" work as on search engines), or as
+    a prefix of the words of the document.
+    """
+    query = SearchQuery(search_term, search_type='websearch', config=SEARCH_CONFIG)
+
+    prefix_text = get_prefix_search_text(search_term)
+    if prefix_text is not None:
+        query |= SearchQuery(prefix_text, search_type='raw', config=SEARCH_CONFIG)
+    return query
+
+
+def build_search_vector(document):
+    """
+    Builds a search vector out of a document made of (text, weight) pairs.
+
+    The texts are passed in as values rather than column references, so the document can include
+    text that lives in other tables (e.g. the options of a poll).
+    """
+    return reduce(lambda vector, other: vector + other, [
+        SearchVector(Value(text, output_field=TextField()), weight=weight, config=SEARCH_CONFIG)
+        for text, weight in document
+    ])
+
+
+def update_search_vector(instance):
+    """
+    Rewrites the search vector of a single object. It's a no-op off postgres.
+    """
+    model = type(instance)
+    queryset = model._base_manager.using(instance._state.db).filter(pk=instance.pk)
+    if not is_full_text_search_enabled(queryset.db):
+        return
+
+    queryset.update(search_vector=build_search_vector(instance.get_search_document()))
+
+
+def filter_by_full_text(queryset, search_term, fallback_lookups, extra_q=None):
+    """
+    Filters the queryset down to the objects whose search vector matches the search term and
+    annotates them with a `search_rank`, so results can be ordered by relevance.
+
+    :param fallback_lookups: The `icontains` lookups to use when full text search is not available.
+    :param extra_q: A callable returning an extra condition for matches that live outside of the
+                    search vector of the object (e.g. the usernames of the moogt's participants).
+                    It's called with the search term and whether full text search is enabled.
+    """
+    enabled = is_full_text_search_enabled(queryset.db)
+
+    if enabled:
+        query = get_search_query(search_term)
+        condition = Q(search_vector=query)
+        rank = SearchRank(F('search_vector'), query)
+    else:
+        condition = reduce(or_, [Q(**{lookup: search_term}) for lookup in fallback_lookups])
+        rank = Value(0.0, output_field=FloatField())
+
+    if extra_q is not None:
+        condition |= extra_q(search_term, enabled)
+
+    return queryset.filter(condition).annotate(search_rank=rank)
+
+
+def filter_by_trigram(queryset, search_term, fields):
+    """
+    Filters the queryset down to the objects where one of the fields contains the search term or
+    is similar to it, and annotates them with a `search_rank` based on the trigram similarity.
+
+    On postgres the `icontains` lookups are covered by the `gin_trgm_ops` indexes of the fields.
+    """
+    condition = reduce(or_, [Q(**{f'{field}__icontains': search_term}) for field in fields])
+
+    if not is_full_text_search_enabled(queryset.db):
+        return queryset.filter(condition).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    # The similarity is computed on the same upper cased expressions as the lookups, so it's covered
+    # by the indexes too.
+    aliases = {f'{field}_upper': Upper(field) for field in fields}
+    condition |= reduce(or_, [Q(**{f'{alias}__trigram_similar': search_term.upper()}) for alias in aliases])
+    similarities = [TrigramSimilarity(alias, search_term.upper()) for alias in aliases]
+    rank = Greatest(*similarities) if len(similarities) > 1 else similarities[0]
+
+    return queryset.alias(**aliases).filter(condition).annotate(search_rank=rank)
+
+
+def count_in_one_query(querysets, limit=None):
+    """
+    Counts several querysets in a single round trip, by UNION ALL-ing one count per queryset.
+
+    :param querysets: A dict of key to queryset.
+    :param limit: If given, each count stops at `limit` rows, so a broad search term doesn't pay for
+                  counting every match.
+    :return: A dict of key to count.
+    """
+    counts = []
+    for key, queryset in querysets.items():
+        queryset = queryset.order_by()
+        if limit is not None:
+            queryset = queryset.model._base_manager.filter(pk__in=queryset.values('pk')[:limit])
+
+        counts.append(queryset.annotate(kind=Value(key)).values('kind').annotate(count=Count('pk'))
+                      .values_list('kind', 'count'))
+
+    first, *rest = counts
+    return dict(first.union(*rest, all=True))
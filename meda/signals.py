@@ -0,0 +1,14 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .behaviors import Searchable
+from .search import update_search_vector
+
+
+@receiver(post_save)
+def searchable_was_saved(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    if raw or not isinstance(instance, Searchable):
+        return
+
+    if instance.is_search_document_changed(created, update_fields):
+        update_search_vector(instance)
@@ -1,7 +1,9 @@
 from django.test import TestCase
 
 from api.models import Tag
+from api.tests.utility import create_user, create_view
 from meda.models import TimestampableMock, TaggableMock
+from views.models import View
 
 
 class TestTimestamped(TestCase):
@@ -33,3 +35,26 @@ class TestTaggable(TestCase):
         tags = [{'name': 'test_tag 1'}, {'name': 'test_tag 2'}]
         self.mock.add_tags(tags)
         self.assertEqual(self.mock.tags.count(), 2)
+
+
+class TestSearchable(TestCase):
+    def setUp(self):
+        self.view = View.objects.get(pk=create_view(create_user('test_user', 'test_password'), 'test content').pk)
+
+    def test_search_document_is_changed_on_creation(self):
+        self.assertTrue(self.view.is_search_document_changed(True, None))
+
+    def test_search_document_is_not_changed_by_other_fields(self):
+        self.view.is_draft = True
+        self.assertFalse(self.view.is_search_document_changed(False, None))
+        self.assertFalse(self.view.is_search_document_changed(False, ['is_draft']))
+
+    def test_search_document_is_changed_by_its_fields(self):
+        self.view.content = 'edited content'
+        self.assertTrue(self.view.is_search_document_changed(False, None))
+        self.assertTrue(self.view.is_search_document_changed(False, ['content']))
+
+    def test_saved_document_is_not_changed_anymore(self):
+        self.view.content = 'edited content'
+        self.view.save()
+        self.assertFalse(self.view.is_search_document_changed(False, None))
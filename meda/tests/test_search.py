@@ -0,0 +1,17 @@
+from django.test import SimpleTestCase
+
+from meda.search import get_prefix_search_text
+
+
+class PrefixSearchTextTests(SimpleTestCase):
+    def test_last_word_is_matched_as_a_prefix(self):
+        """Every word should be required, the last one as a prefix of a word of the document."""
+        self.assertEqual(get_prefix_search_text('deb'), 'deb:*')
+        self.assertEqual(get_prefix_search_text('climate chan'), 'climate & chan:*')
+
+    def test_operators_of_the_search_term_are_left_out(self):
+        """Characters that mean something to tsquery shouldn't make it into the raw query."""
+        self.assertEqual(get_prefix_search_text("it's (a) deb:* & |!_"), 'it & s & a & deb:*')
+
+    def test_search_term_without_words(self):
+        self.assertIsNone(get_prefix_search_text('&|! '))
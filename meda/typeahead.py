@@ -0,0 +1,113 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .search import get_search_cache_key, normalize_search_term
+
+# How long (in seconds) the candidates of a search-as-you-type term are cached.
+TYPEAHEAD_CACHE_TTL = getattr(settings, 'TYPEAHEAD_CACHE_TTL', 15)
+
+# Terms with more candidates than this are cached truncated, and can't be refined into longer terms.
+TYPEAHEAD_MAX_CANDIDATES = getattr(settings, 'TYPEAHEAD_MAX_CANDIDATES', 200)
+
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def coalesce(key, compute):
+    """
+    Runs `compute` once for concurrent callers with the same key. The callers that arrive while it's
+    running wait for its result rather than running the same query again.
+
+    Callers are only coalesced within a process, across processes the cache in front of it does the work.
+    """
+    with _in_flight_lock:
+        call = _in_flight.get(key)
+        is_leader = call is None
+        if is_leader:
+            call = _in_flight[key] = _Call()
+
+    if not is_leader:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = compute()
+        return call.result
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _in_flight_lock:
+            del _in_flight[key]
+        call.done.set()
+
+
+class PrefixSearch:
+    """
+    Serves search-as-you-type lookups, where a burst of requests comes in for growing terms
+    (e.g. "deb", "deba", "debat").
+
+    The candidates of a term are cached for a short while. A longer term is refined in python from the
+    cached candidates of its longest prefix, as long as those are complete. That is only sound for
+    prefix or substring matching, where every match of "deba" is also a match of "deb".
+
+    :param name: A unique name, used to namespace the cache keys.
+    :param fetch_candidates: A callable taking the term and a limit, returning a list of candidates from
+                             the database. A candidate is a tuple of its id and the texts it's matched on.
+    :param matches: A callable taking a candidate and the term, telling whether the candidate matches it.
+    """
+
+    def __init__(self, name, fetch_candidates, matches):
+        self.name = name
+        self.fetch_candidates = fetch_candidates
+        self.matches = matches
+
+    def get_cache_key(self, term):
+        return get_search_cache_key(f'typeahead:{self.name}', term)
+
+    def get_candidate_ids(self, term):
+        """
+        Returns the ids of the candidates of the term, or None if they aren't all known, i.e. the term
+        is empty or has more than TYPEAHEAD_MAX_CANDIDATES candidates. The caller queries the database then.
+        """
+        term = normalize_search_term(term)
+        if not term:
+            return None
+
+        keys = {term[:end]: self.get_cache_key(term[:end]) for end in range(1, len(term) + 1)}
+        cached = cache.get_many(keys.values())
+
+        entry = cached.get(keys[term])
+        if entry is None:
+            entry = self.refine(term, keys, cached) or coalesce(keys[term], lambda: self.fetch(term))
+            cache.set(keys[term], entry, timeout=TYPEAHEAD_CACHE_TTL)
+
+        candidates, is_complete = entry
+        if not is_complete:
+            return None
+        return [candidate[0] for candidate in candidates]
+
+    def fetch(self, term):
+        candidates = list(self.fetch_candidates(term, TYPEAHEAD_MAX_CANDIDATES + 1))
+        is_complete = len(candidates) <= TYPEAHEAD_MAX_CANDIDATES
+        return candidates[:TYPEAHEAD_MAX_CANDIDATES], is_complete
+
+    def refine(self, term, keys, cached):
+        for end in range(len(term) - 1, 0, -1):
+            entry = cached.get(keys[term[:end]])
+            if entry is not None and entry[1]:
+                candidates, _ = entry
+                return [candidate for candidate in candidates if self.matches(candidate, term)], True
+
+        return None
@@ -1,7 +1,49 @@
 from channels.layers import get_channel_layer
 
+# Websocket groups are namespaced by the kind of stream, so e.g. user 42 and moogt 42
+# don't share a group.
+USER_STREAM = 'user'
+MOOGT_STREAM = 'moogt'
+CONVERSATION_STREAM = 'conversation'
+
+
+def get_group_name(stream, object_id):
+    return f'{stream}.{object_id}'
+
+
+def get_user_group_name(user_id):
+    return get_group_name(USER_STREAM, user_id)
+
+
+def get_moogt_group_name(moogt_id):
+    return get_group_name(MOOGT_STREAM, moogt_id)
+
+
+def get_conversation_group_name(conversation_id):
+    return get_group_name(CONVERSATION_STREAM, conversation_id)
+
+
+def parse_group_name(group_name):
+    """
+    Splits a group name into its stream and object id, e.g. 'moogt.42' -> ('moogt', 42).
+    Returns (None, None) for a malformed group name.
+    """
+    stream, _, object_id = str(group_name).partition('.')
+    if stream not in (USER_STREAM, MOOGT_STREAM, CONVERSATION_STREAM) or not object_id.isdigit():
+        return None, None
+    return stream, int(object_id)
+
+
+def with_stream(group_name, notification):
+    """
+    Tags a notification with the group it is sent to, so clients of a multiplexed
+    connection can tell the streams apart.
+    """
+    return {**notification, 'stream': group_name}
+
 
 async def group_send(moogt, notification):
     channel_layer = get_channel_layer()
     if moogt:
-        await channel_layer.group_send(f'{moogt.id}', notification)
+        group_name = get_moogt_group_name(moogt.id)
+        await channel_layer.group_send(group_name, with_stream(group_name, notification))
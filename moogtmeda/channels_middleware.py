@@ -1,8 +1,12 @@
+import time
+from threading import Lock
 from urllib.parse import parse_qs
 
+from cachetools import TTLCache
+from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
-from django.db import close_old_connections
 from rest_framework import exceptions
 from rest_framework_jwt.settings import api_settings
 
@@ -11,6 +15,15 @@ jwt_get_username_from_payload = api_settings.JWT_PAYLOAD_GET_USERNAME_HANDLER
 
 User = get_user_model()
 
+# Validated tokens are cached for a short while, so reconnect storms (e.g. after a deploy)
+# don't decode the token and look the user up by username once per handshake. The cache holds
+# the user id and expiry of the token, the user is still loaded by pk for every connection.
+TOKEN_AUTH_CACHE_TTL = getattr(settings, 'TOKEN_AUTH_CACHE_TTL', 60)
+TOKEN_AUTH_CACHE_SIZE = getattr(settings, 'TOKEN_AUTH_CACHE_SIZE', 10_000)
+
+token_user_cache = TTLCache(maxsize=TOKEN_AUTH_CACHE_SIZE, ttl=TOKEN_AUTH_CACHE_TTL)
+token_user_cache_lock = Lock()
+
 
 def authenticate_credentials(payload):
     """
@@ -32,6 +45,45 @@ def authenticate_credentials(payload):
     return user
 
 
+@database_sync_to_async
+def get_user_from_payload(payload):
+    # database_sync_to_async closes old database connections before and after the call,
+    # and runs the query in a thread, so the event loop is never blocked.
+    try:
+        return authenticate_credentials(payload)
+    except exceptions.AuthenticationFailed:
+        return None
+
+
+@database_sync_to_async
+def get_active_user(user_id):
+    return User.objects.filter(pk=user_id, is_active=True).first()
+
+
+async def get_user_from_token(token):
+    with token_user_cache_lock:
+        entry = token_user_cache.get(token)
+    if entry is not None:
+        user_id, expires_at = entry
+        # The token may have expired, or the user been deactivated, since it was cached.
+        if expires_at is not None and expires_at <= time.time():
+            with token_user_cache_lock:
+                token_user_cache.pop(token, None)
+            return None
+        return await get_active_user(user_id)
+
+    try:
+        payload = jwt_decode_handler(token)
+    except Exception:
+        return None
+
+    user = await get_user_from_payload(payload)
+    if user is not None:
+        with token_user_cache_lock:
+            token_user_cache[token] = (user.pk, payload.get('exp'))
+    return user
+
+
 class TokenAuthMiddleware:
     """
     Custom JWT Auth Middleware for channels.
@@ -41,24 +93,15 @@ class TokenAuthMiddleware:
         # Store the ASGI application we were passed
         self.inner = inner
 
-    def __call__(self, scope):
-        # Close old database connections to prevent usage of timed out connections
-        close_old_connections()
-
+    async def __call__(self, scope, receive, send):
         # Get the token
         query_string = parse_qs(scope['query_string'].decode())
         token = query_string.get('token')
 
-        if not token:
-            return self.inner(dict(scope, user=AnonymousUser()))
-
-        # Try to authenticate the user
-        try:
-            payload = jwt_decode_handler(token[0])
-        except Exception:
-            return self.inner(dict(scope, user=AnonymousUser()))
-
-        user = authenticate_credentials(payload)
+        user = None
+        if token:
+            # Try to authenticate the user
+            user = await get_user_from_token(token[0])
 
         # Return the inner application directly and let it run everything else
-        return self.inner(dict(scope, user=user))
+        return await self.inner(dict(scope, user=user or AnonymousUser()), receive, send)
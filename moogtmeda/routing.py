@@ -1,5 +1,6 @@
 from .channels_middleware import TokenAuthMiddleware
 from channels.routing import ProtocolTypeRouter, URLRouter
+import api.routing
 import chat.routing
 import moogts.routing
 
@@ -11,7 +12,9 @@ application = ProtocolTypeRouter({
     'websocket': TokenAuthMiddleware(
         URLRouter(
             # URLRouter just takes standard Django path() or url() entries.
-            chat.routing.websocket_urlpatterns + moogts.routing.websocket_urlpatterns
+            api.routing.websocket_urlpatterns +
+            chat.routing.websocket_urlpatterns +
+            moogts.routing.websocket_urlpatterns
         )
     ),
 })
@@ -141,6 +141,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'users.events.ActivityEventMiddleware',
 ]
 
 ROOT_URLCONF = 'moogtmeda.urls'
@@ -178,6 +179,15 @@ CHANNEL_LAYERS = {
     },
 }
 
+# The cache is shared by all the workers, e.g. the presence counters of the chat are kept in it.
+# A per-process cache (LocMemCache) is only right when a single process serves the app.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/1',
+    },
+}
+
 # Database
 # https://docs.djangoproject.com/en/2.1/ref/settings/#databases
 
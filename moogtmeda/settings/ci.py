@@ -20,6 +20,12 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
 GS_BUCKET_NAME = 'moogter-dev-storage'
 GS_PROJECT_ID = 'moogter-backend-dev'
 
@@ -48,6 +48,13 @@ CHANNEL_LAYERS = {
     },
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://:abFVOjZZymtA5WrBviNJ6Ov7DkN7zNkM@redis-10088.c250.eu-central-1-1.ec2.cloud.redislabs.com:10088',
+    },
+}
+
 # Static files (CSS, JavaScript, Images)
 # [START staticurl]
 # [START gaeflex_py_django_static_config]
@@ -12,6 +12,13 @@ CHANNEL_LAYERS = {
     }
 }
 
+# A single process serves the app, like the in-memory channel layer the cache doesn't need to be shared.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+    }
+}
+
 CORS_ORIGIN_WHITELIST = [
     'http://localhost:4200',
     'http://192.168.1.106:4200',
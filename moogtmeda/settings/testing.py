@@ -34,6 +34,13 @@ CHANNEL_LAYERS = {
     }
 }
 
+# A single process serves the app, like the in-memory channel layer the cache doesn't need to be shared.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+    }
+}
+
 DJANGO_NOTIFICATIONS_CONFIG = {
     'USE_JSONFIELD': True,
 }
@@ -1,8 +1,11 @@
+from asgiref.sync import sync_to_async
 from channels.db import database_sync_to_async
 from channels.exceptions import StopConsumer
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from django.shortcuts import get_object_or_404
 
+from chat import presence
+from meda.utils import get_moogt_group_name, with_stream
 from .enums import MOOGT_WEBSOCKET_EVENT
 from .models import Moogt
 
@@ -30,13 +33,15 @@ class MoogtDetailConsumer(AsyncJsonWebsocketConsumer):
             await self.close()
         else:
             moogt = await database_sync_to_async(get_object_or_404)(Moogt, pk=moogt_id)
-            self.group_name = f'{moogt.id}'
+            self.moogt_id = moogt.id
+            self.group_name = get_moogt_group_name(moogt.id)
             await self.channel_layer.group_add(
                 group=self.group_name,
                 channel=self.channel_name
             )
             # Accept the connection
             await self.accept()
+            await sync_to_async(presence.user_connected)(user.id)
 
     async def disconnect(self, close_code):
         if hasattr(self, 'group_name'):
@@ -44,17 +49,21 @@ class MoogtDetailConsumer(AsyncJsonWebsocketConsumer):
                 group=self.group_name,
                 channel=self.channel_name
             )
+            await sync_to_async(presence.user_disconnected)(self.scope['user'].id)
         raise StopConsumer()
 
     async def receive_json(self, content, **kwargs):
         if content.get('type') == MOOGT_WEBSOCKET_EVENT.start_is_typing:
             user = self.scope['user']
-            moogt: Moogt = await database_sync_to_async(get_object_or_404)(Moogt, pk=self.group_name)
+            moogt: Moogt = await database_sync_to_async(get_object_or_404)(Moogt, pk=self.moogt_id)
             if moogt.func_is_participant(user) and moogt.func_is_current_turn(user):
                 await self.channel_layer.group_send(self.group_name,
-                                                    {'type': 'receive_group_message',
-                                                     'user_id': user.id,
-                                                     'event_type': MOOGT_WEBSOCKET_EVENT.user_is_typing})
+                                                    with_stream(self.group_name,
+                                                                {'type': 'receive_group_message',
+                                                                 'user_id': user.id,
+                                                                 'event_type': MOOGT_WEBSOCKET_EVENT.user_is_typing}))
+        elif content.get('type') == MOOGT_WEBSOCKET_EVENT.heartbeat:
+            await sync_to_async(presence.user_heartbeat)(self.scope['user'].id)
 
     async def receive_group_message(self, event):
         # Remove the type key
@@ -2,7 +2,7 @@ from enum import Enum
 
 from model_utils import Choices
 
-MOOGT_WEBSOCKET_EVENT = Choices('start_is_typing', 'user_is_typing')
+MOOGT_WEBSOCKET_EVENT = Choices('start_is_typing', 'user_is_typing', 'heartbeat')
 
 
 class MiniSuggestionState(Enum):
@@ -1,12 +1,13 @@
 from django.db.models import Manager
-from django.db.models import F, Count, Q, Prefetch, QuerySet, Sum, Case, When
+from django.db.models import F, Count, Q, Prefetch, QuerySet, Sum, Case, When, OuterRef, Exists
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils import timezone
-from queryset_sequence import QuerySetSequence
-
 from meda.enums import ArgumentType
 from meda.managers import BaseManager
-from users.models import Activity, ActivityType
+from meda.search import filter_by_full_text
+from users.blocking import get_hidden_users_filter
+from users.events import record_event
+from users.models import ActivityType
 
 
 class MoogtQuerySet(QuerySet):
@@ -29,13 +30,14 @@ class MoogtQuerySet(QuerySet):
         return self.filter(Q(proposition=user) | Q(opposition=user) | Q(moderator=user))
 
     def get_feed_moogts(self, user):
-        # TODO: Use Subqueries to find moogts that belong to users that you are following
-        following_ids = [
-            following.pk for following in user.followings.all()] + [user.pk]
+        from users.models import MoogtMedaUser
+
+        following_ids = MoogtMedaUser.objects.get_following_ids(user)
 
         return self.get_all_moogts() \
             .filter(  # moogts from proposition or opposition you are following
-            Q(proposition__pk__in=following_ids) | Q(opposition__pk__in=following_ids) | Q(moderator__pk__in=following_ids))
+            Q(proposition__in=following_ids) | Q(opposition__in=following_ids) | Q(moderator__in=following_ids) |
+            Q(proposition=user) | Q(opposition=user) | Q(moderator=user))
 
     def get_ended_moogts(self):
         return self.filter(has_ended=True)
@@ -43,32 +45,32 @@ class MoogtQuerySet(QuerySet):
     def get_paused_moogts(self):
         return self.filter(is_paused=True)
 
-    def filter_using_search_term(self, search_term):
-        return self.filter(Q(resolution__icontains=search_term) |
-                           Q(description__icontains=search_term) |
-                           Q(proposition__first_name__icontains=search_term) |
-                           Q(opposition__first_name__icontains=search_term) |
-                           Q(proposition__username__icontains=search_term) |
-                           Q(opposition__username__icontains=search_term))
+    def filter_using_search_term(self, search_term, include_arguments=False):
+        from arguments.models import Argument
+        from users.models import MoogtMedaUser
 
-    def filter_moogts_by_blocked_users(self, user):
-        blocked_user_ids = user.blockings.annotate(block_user_id=F(
-            'blocked_user'))
+        def participants_or_arguments(search_term, is_full_text):
+            # The participants are matched through their own index rather than the vector of the moogt,
+            # so renaming a user doesn't have to rewrite the vectors of all of their moogts.
+            user_ids = MoogtMedaUser.objects.filter_using_search_term(search_term).values('pk')
+            condition = Q(proposition__in=user_ids) | Q(opposition__in=user_ids)
 
-        blocker_user_ids = user.blockers.annotate(
-            block_user_id=F('user'))
+            if include_arguments:
+                arguments = Argument.objects.filter(moogt=OuterRef('pk')).filter_using_search_term(search_term)
+                condition |= Q(Exists(arguments))
 
-        user_ids = QuerySetSequence(blocked_user_ids, blocker_user_ids).values_list(
-            'block_user_id', flat=True)
+            return condition
 
-        return self.exclude(Q(
-            Q(proposition__id__in=user_ids) &
-            Q(opposition__id__in=user_ids) &
-            Q(
-                Q(moderator__isnull=True) |
-                Q(moderator__id__in=user_ids)
-            )
-        )
+        return filter_by_full_text(self, search_term,
+                                   fallback_lookups=['resolution__icontains', 'description__icontains'],
+                                   extra_q=participants_or_arguments)
+
+    def filter_moogts_by_blocked_users(self, user):
+        # A moogt is hidden only if all of its participants are hidden.
+        return self.exclude(
+            get_hidden_users_filter(user, 'proposition') &
+            get_hidden_users_filter(user, 'opposition') &
+            (Q(moderator__isnull=True) | get_hidden_users_filter(user, 'moderator'))
         )
 
 
@@ -130,11 +132,7 @@ class MoogtManager(BaseManager):
 
         moogt = super().create(**kwargs)
         try:
-            activity = Activity()
-            activity.profile = moogt.get_proposition().profile
-            activity.type = ActivityType.create_moogt.name
-            activity.object_id = moogt.id
-            activity.save()
+            record_event(moogt.get_proposition().profile, ActivityType.create_moogt.name, moogt.id)
         except ObjectDoesNotExist:
             pass
 
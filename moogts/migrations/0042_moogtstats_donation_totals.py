@@ -0,0 +1,58 @@
+# Generated by Django 4.2.5 on 2026-10-19 08:21
+
+from django.db import migrations, models
+from django.db.models import Sum
+import django.db.models.deletion
+
+
+def count_donations(apps, schema_editor):
+    MoogtStats = apps.get_model('moogts', 'MoogtStats')
+    Donation = apps.get_model('moogts', 'Donation')
+    donations = Donation.objects.using(schema_editor.connection.alias).filter(moogt__isnull=False)
+
+    for moogt_id in donations.values_list('moogt_id', flat=True).distinct():
+        moogt_donations = donations.filter(moogt_id=moogt_id)
+        stats, _ = MoogtStats.objects.using(schema_editor.connection.alias).get_or_create(moogt_id=moogt_id)
+        stats.donation_total = moogt_donations.aggregate(total=Sum('amount'))['total'] or 0
+        for side, donation_for_proposition in [('proposition', True), ('opposition', False)]:
+            side_donations = moogt_donations.filter(donation_for_proposition=donation_for_proposition)
+            setattr(stats, f'{side}_donation_total', side_donations.aggregate(total=Sum('amount'))['total'] or 0)
+            setattr(stats, f'top_{side}_donation',
+                    side_donations.order_by('-amount', '-created_at').first())
+        stats.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moogts', '0041_moogt_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='moogtstats',
+            name='donation_total',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='moogtstats',
+            name='opposition_donation_total',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='moogtstats',
+            name='proposition_donation_total',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='moogtstats',
+            name='top_opposition_donation',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='moogts.donation'),
+        ),
+        migrations.AddField(
+            model_name='moogtstats',
+            name='top_proposition_donation',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='moogts.donation'),
+        ),
+        migrations.RunPython(count_donations, migrations.RunPython.noop),
+    ]
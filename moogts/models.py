@@ -9,16 +9,18 @@ from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError, SuspiciousOperation
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models, transaction
-from django.db.models import Q
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Coalesce
 from django.urls import reverse
 from django.utils import timezone
 from model_utils import Choices
 
 from api.enums import Visibility
 from arguments.models import Argument
-from meda.behaviors import Timestampable, Taggable
+from meda.behaviors import Timestampable, Taggable, Searchable
 from meda.enums import MoogtEndStatus, MoogtType, ArgumentType, ActivityStatus
 from meda.models import BaseReport, Score, Stats, BaseModel, AbstractActivity, AbstractActivityAction
+from meda.utils import get_moogt_group_name, with_stream
 from moogts.enums import MiniSuggestionState, MoogtActivityType, DonationLevel, MoogtWebsocketMessageType
 from moogts.managers import MoogtManager, MoogtQuerySet, DonationManager, MoogtStatusManager, MoogtActivityManager
 
@@ -33,7 +35,7 @@ class MoogtBanner(models.Model):
     banner = models.ImageField(upload_to='banners', null=False)
 
 
-class Moogt(BaseModel):
+class Moogt(Searchable, BaseModel):
     """A model representing a full debate (moogt)."""
 
     # The central statement which is being debated. Supplied by the
@@ -188,6 +190,8 @@ class Moogt(BaseModel):
     # A custom model manager for the Moogt model
     objects = MoogtManager.from_queryset(MoogtQuerySet)()
 
+    search_document_fields = (('resolution', 'A'), ('description', 'B'))
+
     def __str__(self):
         if self.resolution == None:
             return ''
@@ -570,10 +574,7 @@ class Moogt(BaseModel):
         return users
 
     def applauds_count(self):
-        count = 0
-        for argument in self.arguments.all():
-            count += argument.stats.applauds_count()
-        return count
+        return self.arguments.aggregate(count=Coalesce(Sum('stats__applaud_count'), 0))['count']
 
     def unread_cards_count(self, user):
         read_by = user.read_moogts.filter(moogt=self).first()
@@ -918,6 +919,44 @@ class MoogtStats(Stats):
 
     view_count = models.IntegerField(default=0)
 
+    # The running totals of the donations made to the moogt, overall and for each side.
+    donation_total = models.IntegerField(default=0)
+
+    proposition_donation_total = models.IntegerField(default=0)
+
+    opposition_donation_total = models.IntegerField(default=0)
+
+    # The highest donation made to each side, the latest one wins a tie.
+    top_proposition_donation = models.ForeignKey('Donation',
+                                                 related_name='+',
+                                                 null=True,
+                                                 on_delete=models.SET_NULL)
+
+    top_opposition_donation = models.ForeignKey('Donation',
+                                                related_name='+',
+                                                null=True,
+                                                on_delete=models.SET_NULL)
+
+    def add_donation(self, donation):
+        """
+        Adds a new donation to the running totals and the top donation of its side. The stats row is
+        locked meanwhile, so concurrent donations don't replace each other's top donation.
+        """
+        amount = donation.amount or 0
+        updates = {'donation_total': F('donation_total') + amount}
+
+        if donation.donation_for_proposition is not None:
+            side = 'proposition' if donation.donation_for_proposition else 'opposition'
+            stats = MoogtStats.objects.select_for_update(of=('self',)) \
+                .select_related(f'top_{side}_donation').get(pk=self.pk)
+            top_donation = getattr(stats, f'top_{side}_donation')
+
+            updates[f'{side}_donation_total'] = F(f'{side}_donation_total') + amount
+            if top_donation is None or (top_donation.amount or 0) <= amount:
+                updates[f'top_{side}_donation'] = donation
+
+        MoogtStats.objects.filter(pk=self.pk).update(**updates)
+
     def func_proposition_win_percent(self):
         prop_upvotes = 0
         prop_num_voters = 0
@@ -925,10 +964,10 @@ class MoogtStats(Stats):
         oppo_num_voters = 0
         for argument in self.moogt.arguments.all():
             if argument.user == self.moogt.get_proposition():
-                prop_upvotes += argument.stats.upvotes.count()
+                prop_upvotes += argument.stats.upvote_count
                 prop_num_voters += argument.stats.func_num_voters()
             else:
-                oppo_upvotes += argument.stats.upvotes.count()
+                oppo_upvotes += argument.stats.upvote_count
                 oppo_num_voters += argument.stats.func_num_voters()
 
         prop_upvote_percent = 0
@@ -1133,19 +1172,26 @@ class Donation(Timestampable):
         else:
             return DonationLevel.LEVEL_5.name
 
+    @transaction.atomic
     def save(self, *args, **kwargs):
         self.donated_for = self.moogt.proposition if self.donation_for_proposition else self.moogt.opposition
+        is_new = self._state.adding
         super().save(*args, **kwargs)
-        self.send_web_socket_message()
+        if is_new:
+            self.moogt.stats.add_donation(self)
+
+        # The clients are told once the donation is in, not while it can still be rolled back.
+        transaction.on_commit(self.send_web_socket_message)
 
     def send_web_socket_message(self):
         channel_layer = get_channel_layer()
         from .serializers import DonationSerializer
-        async_to_sync(channel_layer.group_send)(f'{self.moogt.id}', {
+        group_name = get_moogt_group_name(self.moogt.id)
+        async_to_sync(channel_layer.group_send)(group_name, with_stream(group_name, {
             'type': 'receive_group_message',
             'donation': DonationSerializer(self).data,
             'event_type': MoogtWebsocketMessageType.DONATION_MADE.name
-        })
+        }))
 
 
 class ReadBy(Timestampable):
@@ -3,5 +3,5 @@ from django.urls import re_path
 from . import consumers
 
 websocket_urlpatterns = [
-    re_path(r'ws/moogt/(?P<pk>\d+)/$', consumers.MoogtDetailConsumer)
+    re_path(r'ws/moogt/(?P<pk>\d+)/$', consumers.MoogtDetailConsumer.as_asgi())
 ]
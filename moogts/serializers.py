@@ -1,4 +1,3 @@
-from django.db.models import Sum, IntegerField
 from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
@@ -257,16 +256,15 @@ class MoogtSerializer(SerializerExtensionsMixin, serializers.ModelSerializer):
         return False
 
     def get_total_donations(self, moogt):
-        return moogt.donations.aggregate(Sum('amount', output_field=IntegerField()))['amount__sum']
+        return moogt.stats.donation_total
 
     def get_your_donations(self, moogt):
-        qs = moogt.donations
         if self.context['request'].user == moogt.opposition:
-            qs = qs.filter(donation_for_proposition=False)
+            return moogt.stats.opposition_donation_total
         elif self.context['request'].user == moogt.proposition:
-            qs = qs.filter(donation_for_proposition=True)
+            return moogt.stats.proposition_donation_total
 
-        return qs.aggregate(Sum('amount', output_field=IntegerField()))['amount__sum']
+        return moogt.stats.donation_total
 
     def get_unread_cards_count(self, moogt):
         if self.context['request'].user.is_authenticated:
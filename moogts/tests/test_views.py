@@ -4,6 +4,8 @@ import os
 from datetime import timedelta
 from unittest.mock import MagicMock, patch
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
@@ -26,10 +28,12 @@ from invitations.models import ModeratorInvitation
 from moogtmeda.settings import MEDIA_ROOT
 from moogts.enums import MiniSuggestionState, MoogtActivityType, DonationLevel
 from moogts.models import Moogt, MoogtMiniSuggestion, MoogtBanner, MoogtActivity, Donation, MoogtReport, ReadBy, \
-    MoogtStatus, MoogtActivityBundle
+    MoogtStatus, MoogtActivityBundle, MoogtStats
 from moogts.tests.factories import MoogtFactory
 from notifications.models import NOTIFICATION_TYPES
-from users.models import MoogtMedaUser, CreditPoint, Activity, Wallet
+from users.events import process_all_activity_events
+from users.models import MoogtMedaUser, CreditPoint, Activity, ActivityEvent, ActivityType, Wallet, \
+    WalletTransaction
 from users.tests.factories import BlockingFactory
 from views.models import View
 
@@ -50,6 +54,22 @@ class MoogtListViewTests(APITestCase):
         self.assertEqual(response.data['count'], 0)
         self.assertEqual(response.status_code, 200)
 
+    def test_search_by_argument(self):
+        """
+        Searching should match moogts by the text of their arguments, and list each moogt once.
+        """
+        moogt = create_moogt(resolution='test resolution', started_at_days_ago=1)
+        create_moogt(resolution='another resolution', started_at_days_ago=1)
+        create_argument(moogt.proposition, 'first searchable argument', moogt=moogt)
+        create_argument(moogt.proposition, 'second searchable argument', moogt=moogt)
+
+        url = reverse('api:moogts:list', kwargs={'version': 'v1'}) + '?search=searchable'
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['id'], moogt.id)
+
     def test_a_moogt_exist(self):
         """
         If a moogt exists, it should be included in the response.
@@ -156,7 +176,7 @@ class MoogtListViewTests(APITestCase):
 
         rxn_view_1 = create_reaction_view(
             user, argument_prop, type=ViewType.ARGUMENT_REACTION.name)
-        create_reaction_view(user, argument_prop,
+        create_reaction_view(user, argument_prop, content='test reaction',
                              type=ViewType.ARGUMENT_REACTION.name)
         create_reaction_view(user_2, argument_prop,
                              type=ViewType.ARGUMENT_REACTION.name)
@@ -286,7 +306,7 @@ class MoogtListViewTests(APITestCase):
         rxn_view = create_reaction_view(
             user, argument_prop, type=ViewType.ARGUMENT_REACTION.name)
         rxn_view = create_reaction_view(
-            user, argument_prop, type=ViewType.ARGUMENT_REACTION.name)
+            user, argument_prop, content='test reaction', type=ViewType.ARGUMENT_REACTION.name)
 
         response = self.get()
 
@@ -627,15 +647,13 @@ class MoogtDetailViewTests(APITestCase):
         user = create_user_and_login(self)
 
         self.get(moogt.id)
+        process_all_activity_events()
 
         proposition_user = MoogtMedaUser.objects.get(pk=proposition_user.id)
         user = MoogtMedaUser.objects.get(pk=user.id)
 
-        # Patching the val() method inside the CreditPoint model so that this test won't break
-        # if the implementation is ever changed.
-        CreditPoint.val = lambda s: 10
-
-        self.assertEqual(proposition_user.profile.xp(), 10)
+        credit_point = CreditPoint.objects.get(profile=proposition_user.profile)
+        self.assertEqual(proposition_user.profile.xp(), credit_point.val())
         self.assertEqual(user.profile.xp(), 0)
 
     def test_someone_viewing_opposition_moogt(self):
@@ -653,14 +671,34 @@ class MoogtDetailViewTests(APITestCase):
 
         user = create_user_and_login(self)
         self.get(moogt.id)
+        process_all_activity_events()
         opposition_user = MoogtMedaUser.objects.get(pk=opposition_user.id)
         user = MoogtMedaUser.objects.get(pk=user.id)
 
-        CreditPoint.val = lambda s: 10
-
-        self.assertEqual(opposition_user.profile.xp(), 10)
+        credit_point = CreditPoint.objects.get(profile=opposition_user.profile)
+        self.assertEqual(opposition_user.profile.xp(), credit_point.val())
         self.assertEqual(user.profile.xp(), 0)
 
+    def test_viewing_a_moogt_records_a_single_event(self):
+        """
+        Viewing a moogt should write one activity event rather than the activity and its credit points.
+        """
+        moogt = create_moogt(started_at_days_ago=1)
+        create_moogt_stats(moogt)
+        moogt.set_proposition(create_user('proposition_user', '12345'))
+        moogt.set_opposition(create_user('opposition_user', '12345'))
+        moogt.save()
+        create_user_and_login(self)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.get(moogt.id)
+
+        inserts = [query['sql'] for query in queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len([sql for sql in inserts if 'users_activityevent' in sql]), 1)
+        self.assertFalse([sql for sql in inserts if 'users_activity"' in sql or 'users_creditpoint' in sql])
+        self.assertEqual(ActivityEvent.objects.get().get_credit_points()[1].type,
+                         ActivityType.view_opposition_moogt.name)
+
     def test_user_is_current_turn(self):
         """
         If it's a users turn in a moogt there is_current_turn field in the response should be true
@@ -1097,6 +1135,7 @@ class FollowMoogtAPIViewTests(APITestCase):
         response = self.post(moogt.id)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        process_all_activity_events()
         self.assertEqual(Activity.objects.count(), 1)
 
     def test_followers_count_should_be_included_in_the_response(self):
@@ -4453,6 +4492,51 @@ class MakeMoogtDonationApiViewTests(APITestCase):
                                              'donation_for_proposition': True,
                                              'message': 'test message'})
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Donation.objects.count(), 0)
+        self.assertFalse(WalletTransaction.objects.filter(type=WalletTransaction.TYPE.donation).exists())
+
+    def test_donation_is_recorded_in_the_wallet_ledger(self):
+        """The debit for a donation should be recorded along with the balance it leaves."""
+        response = self.post(self.moogt.id, {'amount': 5,
+                                             'donation_for_proposition': True,
+                                             'message': 'test message'})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        wallet = Wallet.objects.get(user=self.user)
+        wallet_transaction = wallet.transactions.get(type=WalletTransaction.TYPE.donation)
+        self.assertEqual(wallet_transaction.amount, -5)
+        self.assertEqual(wallet_transaction.balance, wallet.credit)
+        self.assertEqual(wallet_transaction.donation_id, response.data['id'])
+
+        # The ledger starts with the credit the wallet was opened with and adds up to its credit.
+        self.assertEqual(sum(transaction.amount for transaction in wallet.transactions.all()), wallet.credit)
+
+    def test_idempotency_key_that_is_too_long(self):
+        """Should respond with bad request rather than failing to store the key."""
+        url = reverse('api:moogts:make_moogt_donation', kwargs={'version': 'v1', 'pk': self.moogt.id})
+        response = self.client.post(url, {'amount': 5, 'donation_for_proposition': True, 'message': 'test message'},
+                                    format='json',
+                                    HTTP_IDEMPOTENCY_KEY='k' * (WalletTransaction.IDEMPOTENCY_KEY_MAX_LENGTH + 1))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Donation.objects.count(), 0)
+
+    def test_retrying_a_donation_with_the_same_idempotency_key(self):
+        """A retried donation should get the original donation back without being charged again."""
+        url = reverse('api:moogts:make_moogt_donation', kwargs={'version': 'v1', 'pk': self.moogt.id})
+        body = {'amount': 5, 'donation_for_proposition': True, 'message': 'test message'}
+        initial_user_amount = Wallet.objects.get(user=self.user).credit
+
+        response = self.client.post(url, body, format='json', HTTP_IDEMPOTENCY_KEY='test-key')
+        retried_response = self.client.post(url, body, format='json', HTTP_IDEMPOTENCY_KEY='test-key')
+
+        self.assertEqual(retried_response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retried_response.data['id'], response.data['id'])
+        self.assertEqual(Donation.objects.count(), 1)
+        self.assertEqual(Wallet.objects.get(user=self.user).credit, initial_user_amount - 5)
+
+        self.client.post(url, body, format='json', HTTP_IDEMPOTENCY_KEY='another-key')
+        self.assertEqual(Donation.objects.count(), 2)
 
     def test_without_providing_value_for_donation_for_proposition(self):
         """Should respond with bad request."""
@@ -4755,6 +4839,41 @@ class ListDonationsApiViewTests(APITestCase):
         response = self.get(self.moogt.id, False)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_donation_totals_are_kept_with_the_donations(self):
+        """The running totals and the top donation of each side should follow the donations."""
+        donation3 = Donation.objects.create(user=self.user,
+                                            moogt=self.moogt,
+                                            amount=10,
+                                            donation_for_proposition=False)
+        Donation.objects.create(user=self.user,
+                                moogt=self.moogt,
+                                amount=1,
+                                donation_for_proposition=False)
+        donation5 = Donation.objects.create(user=self.user,
+                                            moogt=self.moogt,
+                                            amount=5,
+                                            donation_for_proposition=True)
+
+        stats = MoogtStats.objects.get(moogt=self.moogt)
+        self.assertEqual(stats.donation_total, 26)
+        self.assertEqual(stats.proposition_donation_total, 10)
+        self.assertEqual(stats.opposition_donation_total, 16)
+        self.assertEqual(stats.top_proposition_donation, donation5)
+        self.assertEqual(stats.top_opposition_donation, donation3)
+
+    def test_donation_is_broadcast_after_commit(self):
+        """The donation should only be sent to the clients once its transaction is committed."""
+        with patch.object(Donation, 'send_web_socket_message') as send_web_socket_message:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                Donation.objects.create(user=self.user,
+                                        moogt=self.moogt,
+                                        amount=10,
+                                        donation_for_proposition=True)
+                send_web_socket_message.assert_not_called()
+
+        self.assertEqual(len(callbacks), 1)
+        send_web_socket_message.assert_called_once()
+
 
 class QuitMoogtApiViewTests(APITestCase):
     def get(self, moogt_id):
@@ -4909,7 +5028,7 @@ class GetUsersFollowingMoogtApiViewTests(APITestCase):
         user_2 = create_user('user_2', 'test_password')
 
         follower = create_user('follower', 'test_password')
-        user_2.follower.add(follower)
+        user_2.followers.add(follower)
 
         self.moogt.followers.add(user_1)
         self.moogt.followers.add(user_2)
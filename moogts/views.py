@@ -3,7 +3,7 @@ from urllib import request
 
 import django.core
 import rest_framework.exceptions
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.db.models import Q, Count, OuterRef, Subquery, F
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
@@ -14,9 +14,10 @@ from rest_framework.response import Response
 from rest_framework_serializer_extensions.views import SerializerExtensionsAPIViewMixin
 
 from api.enums import ShareProvider, ReactionType
+from api.filters import FullTextSearchFilter
 from api.mixins import ReportMixin, TrendingMixin, UpdatePublicityMixin, ShareMixin, ActivityActionValidationMixin, \
     ActivityCreationValidationMixin, ViewArgumentReactionMixin
-from api.pagination import SmallResultsSetPagination
+from api.pagination import SmallResultsSetPagination, ReactingUserPagination
 from api.signals import reaction_was_made
 from arguments.models import Argument
 from arguments.serializers import ArgumentSerializer
@@ -36,7 +37,8 @@ from moogts.serializers import MoogtReportSerializer, MoogtSerializer, MoogtMini
 from notifications.models import Notification, NOTIFICATION_TYPES
 from notifications.signals import notify
 from users import dynamic_preferences_registry as dynamic_prefs
-from users.models import MoogtMedaUser, Activity, ActivityType, CreditPoint
+from users.events import record_event
+from users.models import MoogtMedaUser, ActivityType, WalletTransaction
 from users.serializers import MoogtMedaUserSerializer
 
 
@@ -46,8 +48,8 @@ class MoogtListView(SerializerExtensionsAPIViewMixin,
                     BasicMoogtExtensions):
     serializer_class = MoogtSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['resolution', 'arguments__argument']
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter]
+    search_term_kwargs = {'include_arguments': True}
     pagination_class = SmallResultsSetPagination
     extensions_auto_optimize = True
 
@@ -77,9 +79,8 @@ class MoogtListView(SerializerExtensionsAPIViewMixin,
         feed_only = json.loads(
             self.request.query_params.get('feed_only', 'false'))
         if self.request.user.is_authenticated and feed_only:
-            user = get_object_or_404(MoogtMedaUser, pk=self.request.user.id)
-            following_ids = user.following.values_list('id', flat=True)
-            queryset = queryset.filter(proposition_id__in=following_ids)
+            following_ids = MoogtMedaUser.objects.get_following_ids(self.request.user)
+            queryset = queryset.filter(proposition__in=following_ids)
 
         return queryset.order_by('-updated_at')
 
@@ -182,8 +183,7 @@ class MoogtCreateView(SerializerExtensionsAPIViewMixin, generics.GenericAPIView)
 
         moogt.followers.add(request.user)
         request.user.last_opened_following_moogt = moogt
-        Activity.record_activity(request.user.profile,
-                                 ActivityType.follow_moogt.name, moogt.id)
+        record_event(request.user.profile, ActivityType.follow_moogt.name, moogt.id)
 
         self.create_moogt_read_by(moogt)
 
@@ -258,21 +258,13 @@ class MoogtDetailView(SerializerExtensionsAPIViewMixin, generics.RetrieveAPIView
             stats.view_count += 1
             stats.save()
 
-            try:
-                activity = Activity()
-                activity.profile = user.profile
-                activity.type = ActivityType.view_moogt.name
-                activity.object_id = moogt.id
-                activity.save()
-
-                CreditPoint.create(
-                    activity, ActivityType.view_proposition_moogt.name, moogt.get_proposition().profile)
+            credit_points = []
+            if moogt.get_proposition() is not None:
+                credit_points.append((ActivityType.view_proposition_moogt.name, moogt.get_proposition().profile))
+            if moogt.get_opposition() is not None:
+                credit_points.append((ActivityType.view_opposition_moogt.name, moogt.get_opposition().profile))
 
-                if moogt.get_opposition() is not None:
-                    CreditPoint.create(
-                        activity, ActivityType.view_opposition_moogt.name, moogt.get_opposition().profile)
-            except:
-                pass
+            record_event(user.profile, ActivityType.view_moogt.name, moogt.id, credit_points=credit_points)
 
     def get_queryset(self):
         return Moogt.objects.all()
@@ -331,8 +323,7 @@ class AcceptMoogtView(SerializerExtensionsAPIViewMixin, generics.GenericAPIView)
 
         moogt.followers.add(request.user)
         request.user.last_opened_following_moogt = moogt
-        Activity.record_activity(request.user.profile,
-                                 ActivityType.follow_moogt.name, moogt.id)
+        record_event(request.user.profile, ActivityType.follow_moogt.name, moogt.id)
 
         self.create_moogt_read_by(moogt)
 
@@ -382,8 +373,7 @@ class FollowMoogtAPIView(generics.GenericAPIView, BasicMoogtExtensions):
             followed = True
             moogt.followers.add(request.user)
             request.user.last_opened_following_moogt = moogt
-            Activity.record_activity(
-                request.user.profile, ActivityType.follow_moogt.name, moogt.id)
+            record_event(request.user.profile, ActivityType.follow_moogt.name, moogt.id)
 
             self.create_moogt_read_by(moogt)
 
@@ -1336,7 +1326,7 @@ class GetMoogtHighlightsApiView(SerializerExtensionsAPIViewMixin,
         all_arguments = moogt.arguments.prefetch_related_objects()
 
         all_arguments = all_arguments.annotate(
-            applauds_count=Count('stats__applauds'),
+            applauds_count=F('stats__applaud_count'),
             endorsements_count=Count('argument_reactions',
                                      filter=Q(
                                          argument_reactions__reaction_type=ReactionType.ENDORSE.name,
@@ -1399,22 +1389,48 @@ class MakeMoogtDonationApiView(SerializerExtensionsAPIViewMixin,
             raise rest_framework.exceptions.PermissionDenied(
                 'Moderators cannot donate to to its moogt.')
 
-        self.validate_account()
         self.validate_char_limit()
-        self.make_donation()
+        self.request.data['level'] = Donation.get_equivalence_level(
+            self.request.data.get('amount'))
 
-        return self.create(request, *args, **kwargs)
+        # A retried request sends the same key as the original one, which is answered with the
+        # donation it made instead of making another one.
+        self.idempotency_key = request.headers.get('Idempotency-Key')
+        if self.idempotency_key and len(self.idempotency_key) > WalletTransaction.IDEMPOTENCY_KEY_MAX_LENGTH:
+            raise ValidationError(
+                f'The idempotency key can be at most {WalletTransaction.IDEMPOTENCY_KEY_MAX_LENGTH} characters long.')
+        wallet_transaction = self.get_wallet_transaction()
+        if wallet_transaction:
+            return self.get_donation_response(wallet_transaction)
+
+        try:
+            with transaction.atomic():
+                return self.create(request, *args, **kwargs)
+        except IntegrityError:
+            # A concurrent retry used the key first.
+            wallet_transaction = self.get_wallet_transaction()
+            if not wallet_transaction:
+                raise
+            return self.get_donation_response(wallet_transaction)
 
     def perform_create(self, serializer):
-        serializer.save(moogt=self.moogt)
-
-    def validate_account(self):
-        user: MoogtMedaUser = self.request.user
+        donation = serializer.save(moogt=self.moogt)
         amount = self.request.data.get('amount')
-        if amount > user.wallet.credit:
+        if not self.request.user.wallet.debit(amount, WalletTransaction.TYPE.donation, self.idempotency_key, donation):
             raise ValidationError(
                 'You do not have enough credit to donate for the moogt.')
 
+    def get_wallet_transaction(self):
+        if not self.idempotency_key:
+            return None
+
+        return WalletTransaction.objects.filter(wallet_id=self.request.user.pk,
+                                                idempotency_key=self.idempotency_key) \
+            .select_related('donation').first()
+
+    def get_donation_response(self, wallet_transaction):
+        return Response(self.get_serializer(wallet_transaction.donation).data, status=status.HTTP_201_CREATED)
+
     def validate_char_limit(self):
         amount = self.request.data.get('amount')
         message = self.request.data.get('message', '')
@@ -1434,14 +1450,6 @@ class MakeMoogtDonationApiView(SerializerExtensionsAPIViewMixin,
                 raise ValidationError(
                     "Char limit passed for this level of donation")
 
-    def make_donation(self):
-        user: MoogtMedaUser = self.request.user
-        amount = self.request.data.get('amount')
-        self.request.data['level'] = Donation.get_equivalence_level(
-            self.request.data.get('amount'))
-        user.wallet.credit = user.wallet.credit - amount
-        user.wallet.save()
-
 
 class ListDonationsApiView(SerializerExtensionsAPIViewMixin,
                            generics.ListAPIView):
@@ -1456,7 +1464,10 @@ class ListDonationsApiView(SerializerExtensionsAPIViewMixin,
             .order_by('-created_at')
 
     def get_highest_donation(self):
-        return self.get_serializer(self.get_queryset().order_by('-amount', '-created_at').first()).data
+        stats = self.moogt.stats
+        if json.loads(self.donation_for_proposition):
+            return self.get_serializer(stats.top_proposition_donation).data
+        return self.get_serializer(stats.top_opposition_donation).data
 
     def get_paginated_response(self, data):
         response = super().get_paginated_response(data)
@@ -1537,15 +1548,18 @@ class QuitMoogtApiView(SerializerExtensionsAPIViewMixin, generics.GenericAPIView
 
 class GetUsersFollowingMoogtApiView(generics.ListAPIView, ViewArgumentReactionMixin):
     serializer_class = MoogtMedaUserSerializer
+    pagination_class = ReactingUserPagination
 
     def get(self, request, *args, **kwargs):
         moogt = get_object_or_404(Moogt, pk=kwargs.get('pk'))
 
-        self.queryset = self.sort_by_follower_count_and_following_status(
-            request, moogt.followers)
+        self.queryset = moogt.followers.all()
 
         return self.list(request, *args, **kwargs)
 
+    def paginate_queryset(self, queryset):
+        return self.load_following_status(self.request, super().paginate_queryset(queryset))
+
 
 class MoogtReportApiView(ReportMixin, generics.CreateAPIView):
     serializer_class = MoogtReportSerializer
@@ -1,9 +1,10 @@
 from django.db.models import Count, QuerySet, OuterRef, Exists
-from django.db.models import Manager, Q, F
+from django.db.models import Manager, Q
 from django.utils import timezone
-from queryset_sequence import QuerySetSequence
 
 from meda.managers import BaseManager
+from meda.search import filter_by_full_text
+from users.blocking import get_hidden_users_filter
 
 
 class PollOptionManager(Manager):
@@ -23,7 +24,14 @@ class PollQuerySet(QuerySet):
         return self.filter(end_date__lt=timezone.now())
 
     def filter_using_search_term(self, search_term):
-        return self.filter(Q(title__icontains=search_term) | Q(options__content__icontains=search_term))
+        def options(search_term, is_full_text):
+            # On postgres the options are part of the vector of the poll.
+            if is_full_text:
+                return Q()
+            from polls.models import PollOption
+            return Q(Exists(PollOption.objects.filter(poll=OuterRef('pk'), content__icontains=search_term)))
+
+        return filter_by_full_text(self, search_term, fallback_lookups=['title__icontains'], extra_q=options)
 
     def get_polls_for_user(self, user):
         if user and user.id:
@@ -35,14 +43,7 @@ class PollQuerySet(QuerySet):
         return self
 
     def filter_poll_by_blocked_user(self, user):
-        blocked_user_ids = user.blockings.annotate(
-            block_user_id=F('blocked_user'))
-        blocker_user_ids = user.blockers.annotate(block_user_id=F('user'))
-
-        user_ids = QuerySetSequence(blocked_user_ids, blocker_user_ids).values_list(
-            'block_user_id', flat=True)
-
-        return self.exclude(user_id__in=user_ids)
+        return self.exclude(get_hidden_users_filter(user, 'user'))
 
 
 class PollManager(BaseManager):
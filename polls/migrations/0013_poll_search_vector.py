@@ -0,0 +1,48 @@
+# Generated by Django 4.2.5 on 2026-10-19 05:56
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import migrations
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from meda.search import SEARCH_CONFIG
+
+
+def build_search_vectors(apps, schema_editor):
+    # Full text search is postgres only, the other databases fall back to `icontains` lookups.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('CREATE INDEX poll_search_vector_idx ON polls_poll USING gin (search_vector);')
+
+    Poll = apps.get_model('polls', 'Poll')
+    PollOption = apps.get_model('polls', 'PollOption')
+    options = PollOption.objects.filter(poll=OuterRef('pk')).order_by().values('poll') \
+        .annotate(text=StringAgg('content', ' ')).values('text')
+    Poll.objects.using(schema_editor.connection.alias).update(
+        search_vector=SearchVector('title', weight='A', config=SEARCH_CONFIG) +
+                      SearchVector(Coalesce(Subquery(options), Value('')), weight='B', config=SEARCH_CONFIG))
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('DROP INDEX poll_search_vector_idx;')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0012_alter_poll_id_alter_polloption_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='poll',
+            name='search_vector',
+            field=SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(build_search_vectors, drop_search_index),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.5 on 2026-10-19 12:10
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import CharField, Count, OuterRef, Subquery
+from django.db.models.functions import Cast, Coalesce
+
+
+def recount_comments(apps, schema_editor):
+    """
+    The stored counts were not decremented when comments were hidden, so they are counted again from
+    the public comments.
+    """
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    XtdComment = apps.get_model('django_comments_xtd', 'XtdComment')
+    Poll = apps.get_model('polls', 'Poll')
+    db_alias = schema_editor.connection.alias
+
+    ctype = ContentType.objects.using(db_alias).filter(app_label='polls', model='poll').first()
+    if ctype is None:
+        return
+
+    comments_count = XtdComment.objects.using(db_alias) \
+        .filter(content_type=ctype,
+                object_pk=Cast(OuterRef('pk'), CharField()),
+                site_id=settings.SITE_ID,
+                is_public=True,
+                is_removed=False) \
+        .order_by().values('object_pk').annotate(count=Count('pk')).values('count')
+    Poll.objects.using(db_alias).update(comment_count=Coalesce(Subquery(comments_count), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0013_poll_search_vector'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('django_comments_xtd', '0008_auto_20200920_2037'),
+    ]
+
+    operations = [
+        migrations.RunPython(recount_comments, migrations.RunPython.noop),
+    ]
@@ -4,7 +4,9 @@ from django.db import models
 from django.utils import timezone
 from rest_framework.serializers import ValidationError
 
+from meda.behaviors import Searchable
 from meda.models import BaseReport, Score, Stats, BaseModel
+from meda.search import update_search_vector
 from polls.managers import PollOptionManager, PollManager, PollQuerySet
 from users.models import MoogtMedaUser
 from notifications.models import Notification
@@ -12,7 +14,7 @@ from notifications.models import Notification
 
 # Create your models here.
 # Poll model class
-class Poll(BaseModel):
+class Poll(Searchable, BaseModel):
     """
     Represents a poll
     """
@@ -52,9 +54,15 @@ class Poll(BaseModel):
 
     objects = PollManager.from_queryset(PollQuerySet)()
 
+    search_document_fields = (('title', 'A'),)
+
     def __str__(self):
         return self.title[:50]
 
+    def get_search_document(self):
+        options = [(content, 'B') for content in self.options.values_list('content', flat=True)]
+        return super().get_search_document() + options
+
     def get_is_closed(self):
         return self.is_closed
 
@@ -98,6 +106,8 @@ class Poll(BaseModel):
             raise ValidationError("Options can not be less than 2 or greater than 4.")
 
         self.options.bulk_create([PollOption(poll=self, content=option.get('content')) for option in option_array])
+        # bulk_create doesn't send post_save, the options are brought into the search vector here.
+        update_search_vector(self)
     
     def comments_count(self):
         return self.comment_count
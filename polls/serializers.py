@@ -4,9 +4,9 @@ from rest_framework import serializers
 from rest_framework.fields import SerializerMethodField
 from rest_framework.serializers import ValidationError
 from rest_framework_serializer_extensions.serializers import SerializerExtensionsMixin
-from django_comments_xtd.api.frontend import commentbox_props
-from django_comments_xtd.models import XtdComment
-from django.contrib.contenttypes.models import ContentType
+
+from api.serializers import ViewerContextListSerializer
+from api.viewer import get_viewer_context
 from users.serializers import MoogtMedaSignupSerializer
 
 from users.serializers import MoogtMedaUserSerializer
@@ -38,8 +38,7 @@ class PollOptionSerializer(serializers.ModelSerializer):
         return poll_option.win_percentage()
 
     def get_has_voted(self, poll_option):
-        user = self.context['request'].user
-        return poll_option.votes.filter(pk=user.pk).exists()
+        return get_viewer_context(self.context).has_voted(poll_option)
 
     def get_num_of_votes(self, poll_option):
         if hasattr(poll_option, 'vote_count'):
@@ -69,6 +68,7 @@ class PollSerializer(SerializerExtensionsMixin, serializers.ModelSerializer):
         fields = ['id', 'title', 'visibility',
                   'options', 'created_at', 'total_votes', 'can_vote', 'max_duration',
                   'overall_time_left', 'start_date', 'end_date', 'comment_count', 'stats', 'user', 'user_id']
+        list_serializer_class = ViewerContextListSerializer
 
     def create(self, validated_data):
         options = validated_data.pop('options')
@@ -110,12 +110,10 @@ class PollSerializer(SerializerExtensionsMixin, serializers.ModelSerializer):
         return int(poll.overall_clock_time_remaining().total_seconds())
 
     def get_stats(self, poll):
-        ctype = ContentType.objects.get_for_model(poll)
+        viewer_context = get_viewer_context(self.context)
         return {
-            'comment': {**commentbox_props(poll, self.context['request'].user),
-                        'selected': XtdComment.objects.filter(user_id=self.context['request'].user.id,
-                                                              content_type=ctype,
-                                                              object_pk=poll.pk).exists()},
+            'comment': {**viewer_context.get_commentbox_props(poll),
+                        'selected': viewer_context.has_commented(poll)},
         }
 
 class PollReportSerializer(serializers.ModelSerializer):
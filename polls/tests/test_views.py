@@ -369,9 +369,8 @@ class PollCommentCreateAPITests(APITestCase):
 
 
 class ListPollCommentsAPITests(APITestCase):
-    def get(self, argument_id, limit=3, offset=0):
-        url = reverse('api:polls:list_comment', kwargs={'version': 'v1', 'pk': argument_id}) + '?limit=' + str(
-            limit) + '&offset=' + str(offset)
+    def get(self, argument_id, limit=3):
+        url = reverse('api:polls:list_comment', kwargs={'version': 'v1', 'pk': argument_id}) + '?limit=' + str(limit)
         return self.client.get(url, format='json')
 
     def reply(self, body=None):
@@ -392,7 +391,7 @@ class ListPollCommentsAPITests(APITestCase):
         response = self.get(argument.id, limit=5)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(len(response.data['results']), 5)
         self.assertEqual(response.data['results'][0]['user_id'], user.id)
 
     def test_reply_to_comment(self):
@@ -414,7 +413,8 @@ class ListPollCommentsAPITests(APITestCase):
         response = self.get(poll.id, limit=5)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['reply_count'], 1)
 
 
 class BrowsePollViewAPITests(APITestCase):
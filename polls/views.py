@@ -10,7 +10,7 @@ from rest_framework_serializer_extensions.views import SerializerExtensionsAPIVi
 
 from api.enums import ShareProvider
 from api.mixins import ReportMixin, TrendingMixin, ShareMixin, UpdatePublicityMixin, CommentMixin
-from api.pagination import SmallResultsSetPagination
+from api.pagination import SmallResultsSetPagination, CommentPagination
 from api.serializers import CommentSerializer
 from notifications.models import Notification, NOTIFICATION_TYPES
 from notifications.signals import notify
@@ -155,7 +155,7 @@ class PollCommentCreateApiView(CommentMixin, generics.GenericAPIView):
 
 class ListPollCommentsApiView(SerializerExtensionsAPIViewMixin, CommentMixin, generics.ListAPIView):
     serializer_class = CommentSerializer
-    pagination_class = SmallResultsSetPagination
+    pagination_class = CommentPagination
     extensions_expand = ['user__profile']
 
     def get_queryset(self):
@@ -0,0 +1,15 @@
+from django.db.models import Exists, OuterRef, Q
+
+
+def get_hidden_users_filter(user, field='pk'):
+    """
+    Returns a condition that holds for the rows whose `field` is a user hidden from the user, i.e. a
+    user they have blocked or a user that has blocked them.
+
+    Both sides are EXISTS lookups covered by the unique index on (user, blocked_user), and they are
+    read in the same query as the rows, so a block is seen by every worker as soon as it's saved.
+    """
+    from .models import Blocking
+
+    return Q(Exists(Blocking.objects.filter(user=user, blocked_user=OuterRef(field)))) | \
+        Q(Exists(Blocking.objects.filter(user=OuterRef(field), blocked_user=user)))
@@ -0,0 +1,149 @@
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Activity, ActivityEvent, CreditPoint, Profile
+
+# The number of events that are buffered before they are written, and processed per transaction.
+ACTIVITY_EVENT_BATCH_SIZE = getattr(settings, 'ACTIVITY_EVENT_BATCH_SIZE', 500)
+
+_buffered_events = ContextVar('buffered_activity_events', default=None)
+
+logger = logging.getLogger(__name__)
+
+
+def record_event(profile, activity_type, object_id=None, credit_points=()):
+    """
+    Records an activity of the user, and the credit points it earns as (type, profile) pairs.
+
+    Inside `buffered_events` (i.e. during a request) the event is written along with the other events
+    of the request, otherwise it's written right away.
+    """
+    event = ActivityEvent(profile=profile, type=activity_type, object_id=object_id,
+                          payload={'credit_points': [{'type': credit_point_type, 'profile_id': credit_profile.pk}
+                                                     for credit_point_type, credit_profile in credit_points]})
+
+    events = _buffered_events.get()
+    if events is None:
+        ActivityEvent.objects.bulk_create([event])
+        return
+
+    events.append(event)
+    if len(events) >= ACTIVITY_EVENT_BATCH_SIZE:
+        flush_events()
+
+
+def flush_events():
+    """
+    Writes the buffered events. A failure is logged rather than raised, the events are not worth
+    failing the request that recorded them.
+    """
+    events = _buffered_events.get()
+    if not events:
+        return
+
+    try:
+        # In a savepoint, so a failed insert doesn't break the transaction it may be part of.
+        with transaction.atomic():
+            ActivityEvent.objects.bulk_create(events, batch_size=ACTIVITY_EVENT_BATCH_SIZE)
+    except Exception:
+        logger.exception('Failed to write %d activity events.', len(events))
+    events.clear()
+
+
+def discard_events():
+    events = _buffered_events.get()
+    if events:
+        events.clear()
+
+
+@contextmanager
+def buffered_events():
+    """
+    Buffers the events recorded in the block and writes them at the end of it. If the block raises
+    the events are dropped, as the changes they record may have been rolled back.
+    """
+    token = _buffered_events.set([])
+    try:
+        yield
+        flush_events()
+    finally:
+        _buffered_events.reset(token)
+
+
+class ActivityEventMiddleware:
+    """
+    Buffers the activity events recorded while handling a request and writes them in one insert.
+
+    The events of a request that fails are dropped, e.g. the `create_moogt` event of a moogt whose
+    creation was rolled back.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with buffered_events():
+            response = self.get_response(request)
+            if response.status_code >= 400:
+                discard_events()
+            return response
+
+
+@transaction.atomic
+def process_activity_events(batch_size=ACTIVITY_EVENT_BATCH_SIZE):
+    """
+    Turns a batch of events into activities and credit points and returns how many were processed.
+
+    The rows are bulk created, which skips the `save` of the models, so the points are added to the
+    profiles' totals here, with one update per profile.
+    """
+    events = list(ActivityEvent.objects.select_for_update(skip_locked=True).order_by('pk')[:batch_size])
+    if not events:
+        return 0
+
+    ActivityEvent.objects.filter(pk__in=[event.pk for event in events]).delete()
+
+    activities = Activity.objects.bulk_create([
+        Activity(profile_id=event.profile_id, type=event.type, object_id=event.object_id,
+                 created_at=event.created_at)
+        for event in events
+    ])
+
+    credit_points = []
+    for event, activity in zip(events, activities):
+        for credit_point in event.get_credit_points():
+            credit_point.activity = activity
+            credit_points.append(credit_point)
+
+    # The profiles earning the points may have been deleted since.
+    profile_ids = set(Profile.objects.filter(pk__in={credit_point.profile_id for credit_point in credit_points})
+                      .values_list('pk', flat=True))
+    credit_points = [credit_point for credit_point in credit_points if credit_point.profile_id in profile_ids]
+    CreditPoint.objects.bulk_create(credit_points)
+
+    points = defaultdict(lambda: {'activity_pts': 0, 'credit_pts': 0})
+    for activity in activities:
+        points[activity.profile_id]['activity_pts'] += activity.xp()
+    for credit_point in credit_points:
+        points[credit_point.profile_id]['credit_pts'] += credit_point.val() or 0
+
+    # In the order of the profiles, so concurrent runs lock them in the same order.
+    for profile_id in sorted(points):
+        if points[profile_id]['activity_pts'] or points[profile_id]['credit_pts']:
+            Profile.add_points(profile_id, **points[profile_id])
+
+    return len(events)
+
+
+def process_all_activity_events(batch_size=ACTIVITY_EVENT_BATCH_SIZE):
+    count = 0
+    while True:
+        processed = process_activity_events(batch_size)
+        count += processed
+        if processed < batch_size:
+            return count
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from users.events import ACTIVITY_EVENT_BATCH_SIZE, process_all_activity_events
+
+
+class Command(BaseCommand):
+    help = 'Turns the recorded activity events into activities and credit points. ' \
+           'Meant to run every minute or so.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=ACTIVITY_EVENT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        count = process_all_activity_events(options['batch_size'])
+        self.stdout.write(f'Processed {count} activity events.')
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from users.models import Profile
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the stored point totals of the profiles from their activities and credit points.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        profile_ids = Profile.objects.order_by('pk').values_list('pk', flat=True)
+        batch_size = options['batch_size']
+
+        count = 0
+        last_id = None
+        while True:
+            batch = profile_ids if last_id is None else profile_ids.filter(pk__gt=last_id)
+            batch = list(batch[:batch_size])
+            if not batch:
+                break
+
+            with transaction.atomic():
+                Profile.rebuild_points(batch)
+            count += len(batch)
+            last_id = batch[-1]
+
+        self.stdout.write(f'Rebuilt the points of {count} profiles.')
@@ -1,20 +1,34 @@
-from django.db.models import QuerySet, Count, Q, OuterRef, Exists, F
+from django.db.models import QuerySet, Count, Q, OuterRef, Exists, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import UserManager
-from queryset_sequence import QuerySetSequence
-# from django.contrib.auth.models import AnonymousUser
+
+from meda.search import filter_by_trigram
+from .blocking import get_hidden_users_filter
 
 
 class MoogtMedaUserQuerySet(QuerySet):
     def annotate_follower_count(self):
-        return self.annotate(followers_count=Count('followers'))
+        from .models import Follow
+        followers_count = Follow.objects.filter(to_user=OuterRef('pk')).order_by().values('to_user') \
+            .annotate(count=Count('pk')).values('count')
+        return self.annotate(followers_count=Coalesce(Subquery(followers_count), 0))
 
+    def update_follower_counts(self):
+        """
+        Recounts the stored `follower_count` of the users in a single UPDATE.
+        """
+        from .models import Follow
+        followers_count = Follow.objects.filter(to_user=OuterRef('pk')).order_by().values('to_user') \
+            .annotate(count=Count('pk')).values('count')
+        return self.update(follower_count=Coalesce(Subquery(followers_count), 0))
 
     def annotate_following_exists(self, user):
-        followings_queryset = user.followings.filter(pk=OuterRef('pk'))
+        from .models import Follow
+        followings_queryset = Follow.objects.filter(from_user=user, to_user=OuterRef('pk'))
         return self.annotate(is_following=Exists(followings_queryset))
 
     def filter_using_search_term(self, search_term):
-        return self.filter(Q(username__icontains=search_term) | Q(first_name__icontains=search_term))
+        return filter_by_trigram(self, search_term, ['username', 'first_name'])
 
     def annonate_with_blocking_status(self, user):
         from .models import Blocking
@@ -25,18 +39,27 @@ class MoogtMedaUserQuerySet(QuerySet):
         return self.annotate(is_blocking=Exists(blocking), is_blocked=Exists(is_blocked))
 
     def filter_blocked_users(self, user):
-        # if isinstance(user, AnonymousUser):
-        #     return None
-        
-        blocked_users = user.blockings.annotate(block_user_id=F(
-            'blocked_user'))
-        blocker_users = user.blockers.annotate(block_user_id=F('user'))
-        user_ids = QuerySetSequence(blocked_users, blocker_users).values_list(
-            'block_user_id', flat=True)
-
-        return self.exclude(id__in=user_ids)
+        return self.exclude(get_hidden_users_filter(user))
 
 
 class MoogtMedaUserManager(UserManager.from_queryset(MoogtMedaUserQuerySet)):
     def get_queryset(self):
         return super().get_queryset().select_related('profile')
+
+    def get_following_ids(self, user):
+        """
+        Returns a subquery of the ids of the users that the given user is following.
+
+        It reads the follow table directly, so the SQL stays the same size no matter how many
+        accounts the user follows, e.g. `filter(user__in=get_following_ids(user))`.
+        """
+        from .models import Follow
+        return Follow.objects.filter(from_user=user).values('to_user')
+
+    def get_follower_ids(self, user):
+        from .models import Follow
+        return Follow.objects.filter(to_user=user).values('from_user')
+
+    def is_following(self, user, followee):
+        from .models import Follow
+        return Follow.objects.filter(from_user=user, to_user=followee).exists()
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Covers the "who is this user following" lookups of the feed and publicity filters, so they
+    are answered from the index alone. The table is the auto created through table of
+    `MoogtMedaUser.follower`, which can't declare indexes of its own.
+    """
+
+    dependencies = [
+        ('users', '0041_alter_accountreport_id_alter_activity_id_and_more'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql='CREATE INDEX users_follower_to_from_idx '
+                'ON users_moogtmedauser_follower (to_moogtmedauser_id, from_moogtmedauser_id);',
+            reverse_sql='DROP INDEX users_follower_to_from_idx;',
+        ),
+    ]
@@ -0,0 +1,87 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+BATCH_SIZE = 1000
+
+
+def merge_follow_tables(apps, schema_editor):
+    """
+    Copies the edges of the `follower` and `following` tables into the Follow table. Both
+    tables were written on every follow, so the union is deduplicated by the unique constraint.
+    """
+    MoogtMedaUser = apps.get_model('users', 'MoogtMedaUser')
+    Follow = apps.get_model('users', 'Follow')
+
+    # `a.follower` held the followers of `a`, and `a.following` the users `a` was following.
+    edges = [
+        MoogtMedaUser.follower.through.objects.values_list('to_moogtmedauser_id', 'from_moogtmedauser_id'),
+        MoogtMedaUser.following.through.objects.values_list('from_moogtmedauser_id', 'to_moogtmedauser_id'),
+    ]
+    for queryset in edges:
+        batch = []
+        for from_user_id, to_user_id in queryset.iterator(chunk_size=BATCH_SIZE):
+            batch.append(Follow(from_user_id=from_user_id, to_user_id=to_user_id))
+            if len(batch) >= BATCH_SIZE:
+                Follow.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        Follow.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def split_follow_table(apps, schema_editor):
+    MoogtMedaUser = apps.get_model('users', 'MoogtMedaUser')
+    Follow = apps.get_model('users', 'Follow')
+
+    FollowerThrough = MoogtMedaUser.follower.through
+    FollowingThrough = MoogtMedaUser.following.through
+    for follow in Follow.objects.iterator(chunk_size=BATCH_SIZE):
+        FollowerThrough.objects.get_or_create(from_moogtmedauser_id=follow.to_user_id,
+                                              to_moogtmedauser_id=follow.from_user_id)
+        FollowingThrough.objects.get_or_create(from_moogtmedauser_id=follow.from_user_id,
+                                               to_moogtmedauser_id=follow.to_user_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0042_follower_to_from_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Follow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('from_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('to_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['to_user', 'from_user'], name='follow_to_from_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('from_user', 'to_user'), name='follow_unique_edge'),
+        ),
+        migrations.RunPython(merge_follow_tables, split_follow_table),
+        migrations.RunSQL(
+            sql='DROP INDEX users_follower_to_from_idx;',
+            reverse_sql='CREATE INDEX users_follower_to_from_idx '
+                        'ON users_moogtmedauser_follower (to_moogtmedauser_id, from_moogtmedauser_id);',
+        ),
+        migrations.RemoveField(
+            model_name='moogtmedauser',
+            name='follower',
+        ),
+        migrations.RemoveField(
+            model_name='moogtmedauser',
+            name='following',
+        ),
+        migrations.AddField(
+            model_name='moogtmedauser',
+            name='followings',
+            field=models.ManyToManyField(related_name='followers', through='users.Follow', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # `icontains` and `istartswith` compare the upper cased columns, the indexes are built on the same
+    # expressions so pg_trgm can answer the lookups without scanning the table.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('CREATE INDEX users_username_trgm_idx '
+                          'ON users_moogtmedauser USING gin (UPPER(username) gin_trgm_ops);')
+    schema_editor.execute('CREATE INDEX users_first_name_trgm_idx '
+                          'ON users_moogtmedauser USING gin (UPPER(first_name) gin_trgm_ops);')
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('DROP INDEX users_username_trgm_idx;')
+    schema_editor.execute('DROP INDEX users_first_name_trgm_idx;')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0043_follow'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
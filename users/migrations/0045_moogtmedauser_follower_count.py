@@ -0,0 +1,30 @@
+# Generated by Django 4.2.5 on 2026-10-19 08:01
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_followers(apps, schema_editor):
+    MoogtMedaUser = apps.get_model('users', 'MoogtMedaUser')
+    Follow = apps.get_model('users', 'Follow')
+    followers_count = Follow.objects.filter(to_user=OuterRef('pk')).order_by().values('to_user') \
+        .annotate(count=Count('pk')).values('count')
+    MoogtMedaUser.objects.using(schema_editor.connection.alias) \
+        .update(follower_count=Coalesce(Subquery(followers_count), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0044_username_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='moogtmedauser',
+            name='follower_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_followers, migrations.RunPython.noop),
+    ]
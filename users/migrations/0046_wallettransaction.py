@@ -0,0 +1,33 @@
+# Generated by Django 4.2.5 on 2026-10-19 08:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moogts', '0042_moogtstats_donation_totals'),
+        ('users', '0045_moogtmedauser_follower_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('donation', 'donation'), ('refill', 'refill')], max_length=15)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('idempotency_key', models.CharField(max_length=64, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('donation', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='moogts.donation')),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transactions', to='users.wallet')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='wallettransaction',
+            constraint=models.UniqueConstraint(fields=('wallet', 'idempotency_key'), name='wallet_transaction_unique_idempotency_key'),
+        ),
+    ]
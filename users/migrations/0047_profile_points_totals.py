@@ -0,0 +1,48 @@
+# Generated by Django 4.2.5 on 2026-10-19 08:50
+
+from django.db import migrations, models
+from django.db.models import Case, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+ACTIVITY_XP = {'create_moogt': 10, 'create_argument': 20, 'follow_user': 30}
+
+CREDIT_POINT_VALUES = {'view_opposition_moogt': 40, 'view_proposition_moogt': 40, 'make_comment': 50,
+                       'upvote_argument': 60, 'downvote_argument': 70}
+
+
+def sum_points(model, values):
+    points = Case(*[When(type=type_name, then=Value(value)) for type_name, value in values.items()],
+                  default=Value(0), output_field=IntegerField())
+    total = model.objects.filter(profile=OuterRef('pk')).order_by().values('profile') \
+        .annotate(total=Sum(points)).values('total')
+    return Coalesce(Subquery(total), 0)
+
+
+def sum_profile_points(apps, schema_editor):
+    Profile = apps.get_model('users', 'Profile')
+    Activity = apps.get_model('users', 'Activity')
+    CreditPoint = apps.get_model('users', 'CreditPoint')
+    Profile.objects.using(schema_editor.connection.alias) \
+        .update(activity_pts_total=sum_points(Activity, ACTIVITY_XP),
+                credit_pts_total=sum_points(CreditPoint, CREDIT_POINT_VALUES))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0046_wallettransaction'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='activity_pts_total',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='credit_pts_total',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(sum_profile_points, migrations.RunPython.noop),
+    ]
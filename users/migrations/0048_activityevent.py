@@ -0,0 +1,26 @@
+# Generated by Django 4.2.5 on 2026-10-19 09:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0047_profile_points_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('create_moogt', 'Create Moogt'), ('create_argument', 'Create Argument'), ('follow_user', 'Follow User'), ('unfollow_user', 'Unfollow user'), ('view_moogt', 'View Moogt'), ('follow_moogt', 'Follow Moogt'), ('view_proposition_moogt', 'View Proposition Moogt'), ('view_opposition_moogt', 'View Opposition Moogt'), ('make_comment', 'Make Comment'), ('upvote_argument', 'Upvote Argument'), ('downvote_argument', 'Downvote Argument')], max_length=25)),
+                ('object_id', models.IntegerField(default=None, null=True)),
+                ('payload', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='users.profile')),
+            ],
+        ),
+    ]
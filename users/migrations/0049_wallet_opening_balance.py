@@ -0,0 +1,56 @@
+# Generated by Django 4.2.5 on 2026-10-19 09:55
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import DecimalField, Min, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+BATCH_SIZE = 1000
+
+
+def record_opening_balances(apps, schema_editor):
+    """
+    Opens the ledger of every wallet with the credit it had before its recorded transactions, so
+    the ledger adds up to the current credit.
+    """
+    Wallet = apps.get_model('users', 'Wallet')
+    WalletTransaction = apps.get_model('users', 'WalletTransaction')
+    db_alias = schema_editor.connection.alias
+
+    wallets = Wallet.objects.using(db_alias) \
+        .exclude(transactions__type='opening_balance') \
+        .annotate(ledger_total=Coalesce(Sum('transactions__amount'), Value(Decimal(0)),
+                                        output_field=DecimalField(max_digits=10, decimal_places=2)),
+                  first_transaction_at=Min('transactions__created_at')) \
+        .values_list('pk', 'credit', 'created_at', 'ledger_total', 'first_transaction_at')
+
+    transactions = []
+    for wallet_id, credit, created_at, ledger_total, first_transaction_at in wallets.iterator(chunk_size=BATCH_SIZE):
+        opening_balance = credit - ledger_total
+        transactions.append(WalletTransaction(wallet_id=wallet_id,
+                                              type='opening_balance',
+                                              amount=opening_balance,
+                                              balance=opening_balance,
+                                              created_at=created_at or first_transaction_at or timezone.now()))
+        if len(transactions) >= BATCH_SIZE:
+            WalletTransaction.objects.using(db_alias).bulk_create(transactions)
+            transactions = []
+    WalletTransaction.objects.using(db_alias).bulk_create(transactions)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0048_activityevent'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='wallettransaction',
+            name='type',
+            field=models.CharField(choices=[('opening_balance', 'opening_balance'), ('donation', 'donation'), ('refill', 'refill')], max_length=15),
+        ),
+        migrations.RunPython(record_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.5 on 2026-10-19 11:03
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0049_wallet_opening_balance'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='activity',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
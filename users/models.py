@@ -8,12 +8,13 @@ from annoying.fields import AutoOneToOneField
 from django.apps import apps
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.validators import UnicodeUsernameValidator
-from django.db import models
+from django.db import models, transaction
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage as storage
-from django.db.models import Count
+from django.db.models import Count, F
 from django.forms import ValidationError
 from django.shortcuts import reverse, get_object_or_404
+from django.utils import timezone
 from django_comments.signals import comment_was_posted
 from model_utils import Choices
 
@@ -56,13 +57,15 @@ class MoogtMedaUser(AbstractUser):
 
     cover = models.ImageField(blank=True)
 
-    follower = models.ManyToManyField('self',
-                                      related_name="followings",
-                                      symmetrical=False)
+    # The users this user is following. `followers` is the reverse side of the relation.
+    followings = models.ManyToManyField('self',
+                                        through='Follow',
+                                        through_fields=('from_user', 'to_user'),
+                                        related_name="followers",
+                                        symmetrical=False)
 
-    following = models.ManyToManyField('self',
-                                       related_name="followers",
-                                       symmetrical=False)
+    # The number of users following this user, recounted whenever `followings` changes.
+    follower_count = models.IntegerField(default=0)
 
     following_moogts = models.ManyToManyField("moogts.Moogt",
                                               related_name='followers')
@@ -95,6 +98,31 @@ class MoogtMedaUser(AbstractUser):
         return self.pk != followee.pk
 
 
+class Follow(models.Model):
+    """An edge of the social graph, `from_user` is following `to_user`.
+
+    The unique constraint doubles as the index for "who is this user following" and the
+    reverse index covers "who is following this user", so both lookups are index only.
+    """
+    from_user = models.ForeignKey(MoogtMedaUser,
+                                  related_name='+',
+                                  on_delete=models.CASCADE)
+
+    to_user = models.ForeignKey(MoogtMedaUser,
+                                related_name='+',
+                                on_delete=models.CASCADE)
+
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['from_user', 'to_user'], name='follow_unique_edge'),
+        ]
+        indexes = [
+            models.Index(fields=['to_user', 'from_user'], name='follow_to_from_idx'),
+        ]
+
+
 class Profile(models.Model):
     """A model for managing a user's profile."""
 
@@ -111,6 +139,13 @@ class Profile(models.Model):
 
     profile_photo = models.ImageField(upload_to='profile_photos', blank=True)
 
+    # Running totals of the points of the user's activities and credit points, kept up to date as
+    # the points are awarded so reading them doesn't go through the whole ledger.
+    # `rebuild_profile_points` recomputes them from the ledger.
+    activity_pts_total = models.IntegerField(default=0)
+
+    credit_pts_total = models.IntegerField(default=0)
+
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
 
@@ -145,10 +180,10 @@ class Profile(models.Model):
             original_image.close()
 
     def credit_pts(self):
-        return sum([credit_point.val() for credit_point in self.credit_points.all()])
+        return self.credit_pts_total
 
     def activity_pts(self):
-        return sum([activity.xp() for activity in self.activities.all()])
+        return self.activity_pts_total
 
     def credit_pts_count(self):
         return self.credit_points.values('type').annotate(Count('type'))
@@ -156,6 +191,34 @@ class Profile(models.Model):
     def xp(self):
         return self.activity_pts() + self.credit_pts()
 
+    @staticmethod
+    def add_points(profile_id, activity_pts=0, credit_pts=0):
+        Profile._base_manager.filter(pk=profile_id).update(activity_pts_total=F('activity_pts_total') + activity_pts,
+                                                           credit_pts_total=F('credit_pts_total') + credit_pts)
+
+    @staticmethod
+    def rebuild_points(profile_ids):
+        """
+        Recomputes the point totals of the given profiles from their activities and credit points,
+        with one grouped query per ledger.
+        """
+        activity_pts = dict.fromkeys(profile_ids, 0)
+        for activity in Activity.objects.filter(profile_id__in=profile_ids) \
+                .order_by().values('profile_id', 'type').annotate(count=Count('pk')):
+            activity_pts[activity['profile_id']] += Activity(type=activity['type']).xp() * activity['count']
+
+        credit_pts = dict.fromkeys(profile_ids, 0)
+        for credit_point in CreditPoint.objects.filter(profile_id__in=profile_ids) \
+                .order_by().values('profile_id', 'type').annotate(count=Count('pk')):
+            credit_pts[credit_point['profile_id']] += \
+                (CreditPoint(type=credit_point['type']).val() or 0) * credit_point['count']
+
+        Profile._base_manager.bulk_update([Profile(user_id=profile_id,
+                                                   activity_pts_total=activity_pts[profile_id],
+                                                   credit_pts_total=credit_pts[profile_id])
+                                           for profile_id in profile_ids],
+                                          ['activity_pts_total', 'credit_pts_total'])
+
     def __str__(self):
         return "Profile for user: " + str(self.user)
 
@@ -172,6 +235,83 @@ class Wallet(Timestampable):
     credit = models.DecimalField(
         max_digits=10, decimal_places=2, default=5_000)
 
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+
+        # The credit a wallet starts with is the first entry of its ledger.
+        if adding:
+            WalletTransaction.objects.create(wallet=self,
+                                             type=WalletTransaction.TYPE.opening_balance,
+                                             amount=self.credit,
+                                             balance=self.credit)
+
+    def debit(self, amount, type, idempotency_key=None, donation=None):
+        """
+        Takes the amount off the credit with a single conditional UPDATE, so concurrent debits can't
+        overdraw the wallet, and records it in the ledger. Returns the transaction, or None if there
+        wasn't enough credit.
+        """
+        updated = Wallet.objects.filter(pk=self.pk, credit__gte=amount).update(credit=F('credit') - amount)
+        if not updated:
+            return None
+
+        return self.record_transaction(-amount, type, idempotency_key, donation)
+
+    def refill(self, amount, idempotency_key=None):
+        Wallet.objects.filter(pk=self.pk).update(credit=F('credit') + amount)
+        return self.record_transaction(amount, WalletTransaction.TYPE.refill, idempotency_key)
+
+    def record_transaction(self, amount, type, idempotency_key=None, donation=None):
+        self.refresh_from_db(fields=['credit'])
+        return WalletTransaction.objects.create(wallet=self,
+                                                type=type,
+                                                amount=amount,
+                                                balance=self.credit,
+                                                idempotency_key=idempotency_key,
+                                                donation=donation)
+
+
+class WalletTransaction(models.Model):
+    """
+    An append-only ledger of the changes to the wallets, starting with the credit the wallet was
+    opened with. `Wallet.credit` is kept as the balance the ledger adds up to, and `balance` records
+    it right after each transaction.
+
+    A client retrying a request sends the same idempotency key, which can only be used once per wallet.
+    """
+    TYPE = Choices('opening_balance', 'donation', 'refill')
+
+    IDEMPOTENCY_KEY_MAX_LENGTH = 64
+
+    wallet = models.ForeignKey(Wallet,
+                               related_name='transactions',
+                               on_delete=models.CASCADE)
+
+    type = models.CharField(max_length=15, choices=TYPE)
+
+    # The change in credit, negative for debits.
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+
+    balance = models.DecimalField(max_digits=10, decimal_places=2)
+
+    # The donation a debit paid for.
+    donation = models.ForeignKey('moogts.Donation',
+                                 related_name='+',
+                                 null=True,
+                                 on_delete=models.SET_NULL)
+
+    idempotency_key = models.CharField(max_length=IDEMPOTENCY_KEY_MAX_LENGTH, null=True)
+
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['wallet', 'idempotency_key'],
+                                    name='wallet_transaction_unique_idempotency_key'),
+        ]
+
 
 class ActivityType(Enum):
     """Represents a kind of activity a user can do."""
@@ -193,11 +333,20 @@ class Activity(models.Model):
 
     profile = models.ForeignKey(
         Profile, on_delete=models.CASCADE, related_name="activities")
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add, so activities processed from the activity log keep the time of their event.
+    created_at = models.DateTimeField(default=timezone.now)
     type = models.CharField(max_length=25, choices=[(
         type.name, type.value) for type in ActivityType])
     object_id = models.IntegerField(null=True, default=None)
 
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+
+        if adding:
+            Profile.add_points(self.profile_id, activity_pts=self.xp())
+
     def href(self):
         if self.object_id is None:
             return None
@@ -253,10 +402,9 @@ class Activity(models.Model):
 
     @staticmethod
     def new_comment_recorder(sender, comment, request, *args, **kwargs):
-        activity = Activity.record_activity(
-            request.user.profile, ActivityType.make_comment.name, comment.id)
-        CreditPoint.create(
-            activity, ActivityType.make_comment.name, request.user.profile)
+        from .events import record_event
+        record_event(request.user.profile, ActivityType.make_comment.name, comment.id,
+                     credit_points=[(ActivityType.make_comment.name, request.user.profile)])
 
 
 class CreditPoint(models.Model):
@@ -268,6 +416,14 @@ class CreditPoint(models.Model):
         Profile, on_delete=models.CASCADE, related_name='credit_points', null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+
+        if adding and self.profile_id is not None:
+            Profile.add_points(self.profile_id, credit_pts=self.val() or 0)
+
     @staticmethod
     def create(activity, activity_type_name, profile):
         credit_point = CreditPoint(
@@ -288,6 +444,7 @@ class CreditPoint(models.Model):
             return 70
 
     @staticmethod
+    @transaction.atomic
     def create_upvote_downvote_credit_point(activity_type, activity, argument):
 
         credit_point = CreditPoint.objects.filter(
@@ -295,11 +452,40 @@ class CreditPoint(models.Model):
         credit_point = credit_point.filter(type=ActivityType.upvote_argument.name) | credit_point.filter(
             type=ActivityType.downvote_argument.name)
 
-        if not credit_point.exists():
+        credit_points = list(credit_point.select_for_update(of=('self',)))
+        if not credit_points:
             CreditPoint.create(activity, activity_type.name,
                                argument.user.profile)
         else:
+            # Switching between an upvote and a downvote changes what the points are worth.
+            new_val = CreditPoint(type=activity_type.name).val()
             credit_point.update(type=activity_type.name)
+            Profile.add_points(argument.user.profile.pk,
+                               credit_pts=sum(new_val - point.val() for point in credit_points))
+
+
+class ActivityEvent(models.Model):
+    """
+    An entry of the activity log: an activity of a user along with the credit points it earns.
+
+    Events are written in bulk (see `users.events`) and turned into activities and credit points,
+    with their points added to the profiles' totals, by the `process_activity_events` command.
+    """
+    profile = models.ForeignKey(Profile, related_name='+', on_delete=models.CASCADE)
+
+    type = models.CharField(max_length=25, choices=[(
+        type.name, type.value) for type in ActivityType])
+
+    object_id = models.IntegerField(null=True, default=None)
+
+    # The credit points earned by the activity, e.g. {'credit_points': [{'type': ..., 'profile_id': ...}]}.
+    payload = models.JSONField(default=dict)
+
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def get_credit_points(self):
+        return [CreditPoint(type=credit_point['type'], profile_id=credit_point['profile_id'])
+                for credit_point in self.payload.get('credit_points', [])]
 
 
 class Blocking(Timestampable):
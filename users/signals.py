@@ -0,0 +1,24 @@
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from .models import MoogtMedaUser
+
+
+@receiver(m2m_changed, sender=MoogtMedaUser.followings.through)
+def followings_changed_receiver(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Recounts the followers of the users whose followers changed. They are recounted rather than
+    incremented since `pk_set` can hold users that weren't followed in the first place.
+    """
+    if action == 'pre_clear' and not reverse:
+        instance._cleared_following_ids = set(MoogtMedaUser.objects.get_following_ids(instance)
+                                              .values_list('to_user', flat=True))
+        return
+
+    if action == 'post_clear':
+        pk_set = {instance.pk} if reverse else getattr(instance, '_cleared_following_ids', set())
+    elif action not in ('post_add', 'post_remove'):
+        return
+
+    followed_ids = {instance.pk} if reverse else pk_set
+    MoogtMedaUser.objects.filter(pk__in=followed_ids).update_follower_counts()
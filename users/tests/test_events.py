@@ -0,0 +1,93 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from api.tests.utility import create_user
+from users.events import ActivityEventMiddleware, buffered_events, process_activity_events, record_event
+from users.models import Activity, ActivityEvent, ActivityType, CreditPoint, Profile
+
+
+class ActivityEventTests(TestCase):
+    def setUp(self) -> None:
+        self.user = create_user('test_username', 'test_password')
+        self.author = create_user('test_author', 'test_password')
+
+    def test_buffered_events_are_written_together(self):
+        """Events recorded in a buffer should be written when the buffer is flushed, in one insert."""
+        with buffered_events():
+            record_event(self.user.profile, ActivityType.follow_user.name, self.author.id)
+            record_event(self.user.profile, ActivityType.follow_moogt.name, 1)
+            self.assertEqual(ActivityEvent.objects.count(), 0)
+
+        self.assertEqual(ActivityEvent.objects.count(), 2)
+
+    def test_buffered_events_are_dropped_when_the_block_raises(self):
+        """Events of a block that raises may record rolled back changes, so they shouldn't be written."""
+        with self.assertRaises(ValueError):
+            with buffered_events():
+                record_event(self.user.profile, ActivityType.follow_user.name, self.author.id)
+                raise ValueError()
+
+        self.assertEqual(ActivityEvent.objects.count(), 0)
+
+    def test_events_of_an_error_response_are_dropped(self):
+        """The middleware should only write the events of requests that succeed."""
+        def get_response(status):
+            def view(request):
+                record_event(self.user.profile, ActivityType.follow_user.name, self.author.id)
+                return HttpResponse(status=status)
+            return view
+
+        request = RequestFactory().get('/')
+        ActivityEventMiddleware(get_response(400))(request)
+        self.assertEqual(ActivityEvent.objects.count(), 0)
+
+        ActivityEventMiddleware(get_response(200))(request)
+        self.assertEqual(ActivityEvent.objects.count(), 1)
+
+    def test_a_failing_flush_is_logged(self):
+        """A failure to write the events should be logged instead of failing the request."""
+        with patch.object(ActivityEvent.objects, 'bulk_create', side_effect=DatabaseError()), \
+                self.assertLogs('users.events', level='ERROR'):
+            with buffered_events():
+                record_event(self.user.profile, ActivityType.follow_user.name, self.author.id)
+
+        self.assertEqual(ActivityEvent.objects.count(), 0)
+
+    def test_events_are_written_right_away_outside_a_buffer(self):
+        """An event recorded outside of a buffer should be written right away."""
+        record_event(self.user.profile, ActivityType.follow_user.name, self.author.id)
+        self.assertEqual(ActivityEvent.objects.count(), 1)
+
+    def test_processing_events(self):
+        """Processing the events should create the activities and credit points and add up their points."""
+        record_event(self.user.profile, ActivityType.view_moogt.name, 1,
+                     credit_points=[(ActivityType.view_proposition_moogt.name, self.author.profile)])
+        record_event(self.user.profile, ActivityType.follow_user.name, self.author.id)
+
+        self.assertEqual(process_activity_events(batch_size=1), 1)
+        call_command('process_activity_events', stdout=StringIO())
+
+        self.assertEqual(ActivityEvent.objects.count(), 0)
+        self.assertEqual(Activity.objects.filter(profile=self.user.profile).count(), 2)
+        credit_point = CreditPoint.objects.get(profile=self.author.profile)
+        self.assertEqual(credit_point.activity.type, ActivityType.view_moogt.name)
+
+        self.assertEqual(Profile.objects.get(pk=self.user.pk).xp(), 30)
+        self.assertEqual(Profile.objects.get(pk=self.author.pk).xp(), 40)
+
+    def test_activities_keep_the_time_of_their_event(self):
+        """An activity should be dated when its event happened, not when the event was processed."""
+        record_event(self.user.profile, ActivityType.follow_user.name, self.author.id)
+        happened_at = timezone.now() - timedelta(minutes=5)
+        ActivityEvent.objects.update(created_at=happened_at)
+
+        process_activity_events()
+
+        self.assertEqual(Activity.objects.get(profile=self.user.profile).created_at, happened_at)
@@ -1,5 +1,5 @@
 from django.test import TestCase
-from users.models import MoogtMedaUser
+from users.models import MoogtMedaUser, Blocking
 
 from users.tests.factories import MoogtMedaUserFactory, BlockingFactory
 
@@ -56,6 +56,27 @@ class MoogtMedaUserManagerTest(TestCase):
         """Should not include users that have blocked you."""
         self.assertEqual(MoogtMedaUser.objects.filter_blocked_users(self.users[1]).count(), 1)
         
+    def test_filter_blocked_users_is_updated_when_unblocking(self):
+        """Should include a user again once they are unblocked."""
+        self.assertEqual(MoogtMedaUser.objects.filter_blocked_users(self.users[0]).count(), 2)
+
+        Blocking.objects.get(user=self.users[0], blocked_user=self.users[1]).delete()
+
+        self.assertEqual(MoogtMedaUser.objects.filter_blocked_users(self.users[0]).count(), 3)
+
+    def test_filter_blocked_users_reads_the_blocks_of_the_moment(self):
+        """Should hide a user as soon as the block is stored, however it was written."""
+        Blocking.objects.bulk_create([Blocking(user=self.users[0], blocked_user=self.users[2])])
+
+        self.assertEqual(MoogtMedaUser.objects.filter_blocked_users(self.users[0]).count(), 1)
+
+    def test_filter_blocked_users_is_a_single_query(self):
+        """Should filter the blocked users in the same query that lists the users."""
+        MoogtMedaUser.objects.filter_blocked_users(self.users[1]).count()
+
+        with self.assertNumQueries(1):
+            list(MoogtMedaUser.objects.filter_blocked_users(self.users[1]))
+
     def test_annotate_following_exists_check_if_following_exists(self):
         """Should indicate if following another user or not."""
         follower = self.users[0]
@@ -68,3 +89,19 @@ class MoogtMedaUserManagerTest(TestCase):
         user_not_being_followed = MoogtMedaUser.objects.annotate_following_exists(follower).get(pk=self.users[2].id)
         self.assertTrue(getattr(user_being_followed, 'is_following', False))
         self.assertFalse(getattr(user_not_being_followed, 'is_following', True))
+
+    def test_get_following_ids_returns_the_users_you_follow(self):
+        """Should return the ids of the users you are following as a subquery."""
+        self.users[0].followings.add(self.users[1], self.users[2])
+        self.users[1].followings.add(self.users[0])
+
+        following_ids = MoogtMedaUser.objects.get_following_ids(self.users[0])
+        self.assertEqual(set(MoogtMedaUser.objects.filter(pk__in=following_ids).values_list('pk', flat=True)),
+                         {self.users[1].pk, self.users[2].pk})
+
+    def test_is_following(self):
+        """Should indicate if a user is following another user."""
+        self.users[0].followings.add(self.users[1])
+
+        self.assertTrue(MoogtMedaUser.objects.is_following(self.users[0], self.users[1]))
+        self.assertFalse(MoogtMedaUser.objects.is_following(self.users[1], self.users[0]))
@@ -1,10 +1,15 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.forms import ValidationError
 from django.test import TestCase
 from django.urls import reverse
 from django_comments.forms import CommentForm
+from api.tests.utility import create_user
 from meda.tests.test_models import create_moogt
 
-from users.models import Activity, ActivityType, Blocking, Profile, MoogtMedaUser
+from users.events import process_all_activity_events
+from users.models import Activity, ActivityType, Blocking, Profile, MoogtMedaUser, Follow
 from users.models import CreditPoint
 
 
@@ -70,6 +75,50 @@ class ProfileModelTests(TestCase):
             elif type_count['type'] == 'make_comment':
                 self.assertEqual(type_count['type__count'], 1)
 
+    def test_points_are_added_to_the_stored_totals(self):
+        """
+        The totals should add up the activities and credit points as they are awarded.
+        """
+        user = self.create_user()
+        activity = Activity.record_activity(user.profile, ActivityType.create_argument.name, 1)
+        CreditPoint.create(activity, ActivityType.make_comment.name, user.profile)
+        CreditPoint.create(activity, ActivityType.view_proposition_moogt.name, user.profile)
+
+        profile = Profile.objects.get(pk=user.pk)
+        self.assertEqual(profile.activity_pts(), 20)
+        self.assertEqual(profile.credit_pts(), 90)
+        self.assertEqual(profile.xp(), 110)
+
+    def test_switching_an_upvote_to_a_downvote_updates_the_credit_points(self):
+        """
+        The total should follow the credit point when it changes from an upvote to a downvote.
+        """
+        user = self.create_user()
+        argument = create_moogt(has_opening_argument=True).arguments.first()
+        argument.user = user
+        activity = Activity.record_activity(user.profile, ActivityType.upvote_argument.name, argument.id)
+
+        CreditPoint.create_upvote_downvote_credit_point(ActivityType.upvote_argument, activity, argument)
+        self.assertEqual(Profile.objects.get(pk=user.pk).credit_pts(), 60)
+
+        CreditPoint.create_upvote_downvote_credit_point(ActivityType.downvote_argument, activity, argument)
+        self.assertEqual(Profile.objects.get(pk=user.pk).credit_pts(), 70)
+
+    def test_rebuild_profile_points(self):
+        """
+        The command should recompute the totals from the ledger.
+        """
+        user = self.create_user()
+        Activity.record_activity(user.profile, ActivityType.follow_user.name, 1)
+        CreditPoint.create(None, ActivityType.upvote_argument.name, user.profile)
+        Profile.objects.filter(pk=user.pk).update(activity_pts_total=0, credit_pts_total=0)
+
+        call_command('rebuild_profile_points', batch_size=1, stdout=StringIO())
+
+        profile = Profile.objects.get(pk=user.pk)
+        self.assertEqual(profile.activity_pts(), 30)
+        self.assertEqual(profile.credit_pts(), 60)
+
 
 def create_activity(activity_type, object_id):
 
@@ -172,6 +221,7 @@ class ActivityModelTests(TestCase):
         url = reverse('comments-post-comment')
         self.client.login(username="username", password="password")
         response = self.client.post(url, {**comment_detail_dict, **security_dict})
+        process_all_activity_events()
 
         self.assertEqual(Activity.objects.all().count(), 1)
         activity = Activity.objects.first()
@@ -184,4 +234,54 @@ class BlockingModelTests(TestCase):
         """
         user_1 = create_user('user1', 'pass123')
         blocking = Blocking(user=user_1, blocked_user=user_1)
-        self.assertRaises(ValidationError, blocking.full_clean)
\ No newline at end of file
+        self.assertRaises(ValidationError, blocking.full_clean)
+
+class FollowModelTests(TestCase):
+    def test_following_is_a_single_edge(self):
+        """
+        Following a user should write one edge, visible from both sides of the relation.
+        """
+        follower = create_user('follower', 'pass123')
+        followee = create_user('followee', 'pass123')
+
+        follower.followings.add(followee)
+        followee.followers.add(follower)
+
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertIn(followee, follower.followings.all())
+        self.assertIn(follower, followee.followers.all())
+        self.assertEqual(followee.followings.count(), 0)
+
+    def test_unfollowing_removes_the_edge(self):
+        """
+        Unfollowing a user should remove the edge.
+        """
+        follower = create_user('follower', 'pass123')
+        followee = create_user('followee', 'pass123')
+        follower.followings.add(followee)
+
+        follower.followings.remove(followee)
+
+        self.assertFalse(Follow.objects.exists())
+
+    def test_follower_count_follows_the_edges(self):
+        """
+        The stored follower count should be kept in step from both sides of the relation.
+        """
+        follower = create_user('follower', 'pass123')
+        followee = create_user('followee', 'pass123')
+        other_follower = create_user('other_follower', 'pass123')
+
+        def get_follower_count():
+            return MoogtMedaUser.objects.values_list('follower_count', flat=True).get(pk=followee.pk)
+
+        follower.followings.add(followee)
+        followee.followers.add(follower, other_follower)
+        self.assertEqual(get_follower_count(), 2)
+
+        follower.followings.remove(followee)
+        follower.followings.remove(followee)
+        self.assertEqual(get_follower_count(), 1)
+
+        other_follower.followings.clear()
+        self.assertEqual(get_follower_count(), 0)
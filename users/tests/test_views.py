@@ -3,6 +3,7 @@ import os
 from unittest.mock import ANY, MagicMock, patch
 
 from avatar.models import Avatar
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.utils import timezone
 from rest_framework import status
@@ -22,7 +23,9 @@ from notifications.models import Notification, NOTIFICATION_TYPES
 from polls.models import Poll, PollOption
 from users.models import AccountReport, Blocking, MoogtMedaUser, ActivityType
 from api.tests.utility import generate_photo_file
+from api.trending import refresh_trending_snapshots
 from users.tests.factories import BlockingFactory, MoogtMedaUserFactory
+from users.typeahead import username_search
 
 
 def create_user(username, password, first_name=None):
@@ -399,6 +402,7 @@ class UserProfileApiViewTests(APITestCase):
         view_2.score.score_last_updated_at = timezone.now(
         ) - datetime.timedelta(hours=Score.TRENDING_DURATION_HOURS)
         view_2.score.maybe_update_score()
+        refresh_trending_snapshots()
 
         response = self.get(user.pk, sort_by="trending", item_type="view")
         self.assertEqual(response.data['items']
@@ -424,6 +428,7 @@ class UserProfileApiViewTests(APITestCase):
         poll_2.score.score_last_updated_at = timezone.now(
         ) - datetime.timedelta(hours=Score.TRENDING_DURATION_HOURS)
         poll_2.score.maybe_update_score()
+        refresh_trending_snapshots()
         response = self.get(user.pk, sort_by="popularity", item_type="poll")
         self.assertEqual(response.data['items']
                          ['results'][0].get('id'), poll_2.id)
@@ -1043,6 +1048,7 @@ class RemoveProfileImagesApiViewTests(APITestCase):
 
 class GetUsernamesApiViewTests(APITestCase):
     def setUp(self) -> None:
+        cache.clear()
         create_user_and_login(self, 'account1', 'pass123')
         self.user1 = create_user('user1', 'pass123', first_name='testname')
         self.user2 = create_user('user2', 'pass123')
@@ -1116,6 +1122,31 @@ class GetUsernamesApiViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['count'], 3)
 
+    def test_longer_term_is_refined_from_a_cached_prefix(self):
+        """A longer term should be answered from the cached candidates of its prefix."""
+        self.get('us')
+
+        with patch.object(username_search, 'fetch_candidates') as fetch_candidates:
+            response = self.get('User2')
+
+        fetch_candidates.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['id'], self.user2.id)
+
+    def test_at_sign_alone_returns_all_users(self):
+        """An empty term after the @ sign should match every user, up to the five that are returned."""
+        response = self.get('@')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 5)
+
+    @patch('meda.typeahead.TYPEAHEAD_MAX_CANDIDATES', 1)
+    def test_matches_beyond_the_cached_candidates_are_returned(self):
+        """A term with more matches than are cached should still return all of them."""
+        response = self.get('user')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 3)
+
 
 class RecommendedAccountsApiViewTest(APITestCase):
     def get(self):
@@ -1237,7 +1268,6 @@ class GetSubscriptionInfoTests(APITestCase):
         If a requested user has followers response should include the followers
         """
         self.user.followers.add(self.follower)
-        self.follower.followings.add(self.user)
 
         response = self.get(subscribed_only='false')
 
@@ -1250,7 +1280,6 @@ class GetSubscriptionInfoTests(APITestCase):
         If the logged in user has subscriptions response should include the subscribed accounts
         """
         self.user.followings.add(self.followed)
-        self.followed.followers.add(self.user)
 
         response = self.get(subscribed_only='true')
 
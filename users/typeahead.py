@@ -0,0 +1,27 @@
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from meda.typeahead import PrefixSearch
+from .managers import MoogtMedaUserQuerySet
+
+
+def get_username_filter(term):
+    return Q(first_name__istartswith=term) | Q(username__istartswith=term)
+
+
+def fetch_username_candidates(term, limit):
+    from .models import MoogtMedaUser
+
+    return MoogtMedaUserQuerySet(MoogtMedaUser) \
+        .filter(get_username_filter(term)) \
+        .order_by('pk') \
+        .values_list('pk', Lower('username'), Lower('first_name'))[:limit]
+
+
+def username_matches(candidate, term):
+    _, username, first_name = candidate
+    return username.startswith(term) or first_name.startswith(term)
+
+
+# The users whose username or first name starts with the term, e.g. for mentions and invitations.
+username_search = PrefixSearch('usernames', fetch_username_candidates, username_matches)
@@ -7,7 +7,6 @@ from avatar.models import Avatar
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.exceptions import ValidationError, SuspiciousOperation, NON_FIELD_ERRORS
 from django.db import transaction
-from django.db.models import Q, Count
 from django.http import JsonResponse
 from django.shortcuts import redirect, get_object_or_404
 from django.urls import reverse_lazy
@@ -41,8 +40,10 @@ from polls.models import Poll
 from polls.serializers import PollSerializer
 from views.models import View
 from views.serializers import ViewSerializer
-from .models import Blocking, PhoneNumber, Profile, MoogtMedaUser, Activity, ActivityType
+from .events import record_event
+from .models import Blocking, PhoneNumber, Profile, MoogtMedaUser, ActivityType
 from .serializers import AccountReportSerializer, MoogtMedaUserSerializer, ProfileModelSerializer, RefillWalletSerializer, UserProfileSerializer, PhoneNumberSignupSerializer
+from .typeahead import get_username_filter, username_search
 from users import utils as user_utils
 
 from django.contrib.auth.models import AnonymousUser
@@ -99,10 +100,7 @@ class AnonymousProfileView(ProfileView):
     def can_follow_profile_owner(user, profile_owner):
         if not user.is_authenticated:
             return False
-        for follower in profile_owner.followers.all():
-            if user == follower:
-                return False
-        return True
+        return not MoogtMedaUser.objects.is_following(user, profile_owner)
 
 
 class FollowUserView(GenericView):
@@ -114,10 +112,8 @@ class FollowUserView(GenericView):
 
         self.validate_following(request.user, followee)
 
-        followee.followers.add(request.user)
         request.user.followings.add(followee)
-        Activity.record_activity(request.user.profile,
-                                 ActivityType.follow_user.name, followee.id)
+        record_event(request.user.profile, ActivityType.follow_user.name, followee.id)
         return JsonResponse({"success": True})
 
     @staticmethod
@@ -127,9 +123,8 @@ class FollowUserView(GenericView):
             raise ValidationError("Following self is not allowed.")
 
         # No duplicate followings.
-        for existing_follower in followee.followers.all():
-            if follower == existing_follower:
-                raise ValidationError("Following already exists.")
+        if MoogtMedaUser.objects.is_following(follower, followee):
+            raise ValidationError("Following already exists.")
 
 
 class GetUsernamesAjaxView(GenericView):
@@ -168,11 +163,16 @@ class GetUsernamesApiView(generics.ListAPIView):
         elif query[0] == '@':
             query = query[1:]
             
-        if isinstance(self.request.user, AnonymousUser):
-            users = MoogtMedaUser.objects.filter(Q(first_name__istartswith=query) | Q(username__istartswith=query))
+        # The matches are looked up through the typeahead cache, the query below only narrows them down.
+        # Terms whose matches aren't all cached (e.g. an empty one) are matched in the database.
+        candidate_ids = username_search.get_candidate_ids(query)
+        if candidate_ids is None:
+            users = MoogtMedaUser.objects.filter(get_username_filter(query))
         else:
-            users = MoogtMedaUser.objects.filter(Q(first_name__istartswith=query) | Q(username__istartswith=query)) .exclude(
-                username=self.request.user.username).exclude(username=self.request.user.username)
+            users = MoogtMedaUser.objects.filter(pk__in=candidate_ids)
+
+        if not isinstance(self.request.user, AnonymousUser):
+            users = users.exclude(username=self.request.user.username)
 
             users = users.filter_blocked_users(self.request.user)
 
@@ -207,8 +207,7 @@ class FollowUserApiView(generics.GenericAPIView):
             request.user, followee)
         priority_conversations = request.user.priority_conversations
 
-        if followee.followers.filter(pk=request.user.pk).exists():
-            followee.followers.remove(request.user)
+        if MoogtMedaUser.objects.is_following(request.user, followee):
             request.user.followings.remove(followee)
             Notification.objects.remove_notification(
                 followee,
@@ -217,10 +216,8 @@ class FollowUserApiView(generics.GenericAPIView):
 
             if priority_conversations.filter(pk=conversation.pk).exists():
                 priority_conversations.remove(conversation)
-            Activity.record_activity(
-                request.user.profile, ActivityType.unfollow_user.name, followee.id)
+            record_event(request.user.profile, ActivityType.unfollow_user.name, followee.id)
         else:
-            followee.followers.add(request.user)
             request.user.followings.add(followee)
 
             priority_conversations.add(conversation)
@@ -236,8 +233,7 @@ class FollowUserApiView(generics.GenericAPIView):
                 push_notification_title=f'{request.user} subscribed to you',
             )
 
-            Activity.record_activity(
-                request.user.profile, ActivityType.follow_user.name, followee.id)
+            record_event(request.user.profile, ActivityType.follow_user.name, followee.id)
 
         followee = MoogtMedaUser.objects.annotate_follower_count(
         ).annotate_following_exists(request.user).get(pk=followee.id)
@@ -540,8 +536,8 @@ class RecommendedAccountsApiView(generics.ListAPIView):
         else:
             users = MoogtMedaUser.objects \
                 .filter_blocked_users(self.request.user) \
-                .annotate(followers_count=Count('follower')) \
-                .exclude(pk__in=self.request.user.followings.values_list('pk', flat=True)) \
+                .annotate_follower_count() \
+                .exclude(pk__in=MoogtMedaUser.objects.get_following_ids(self.request.user)) \
                 .exclude(pk=self.request.user.pk) \
                 .exclude(is_staff=True) \
                 .order_by('-followers_count')
@@ -558,8 +554,8 @@ class RefillWalletApiView(generics.GenericAPIView):
         if serializer.is_valid(raise_exception=True):
             amount = serializer.get_amount()
             wallet = self.request.user.wallet
-            wallet.credit = wallet.credit + amount
-            wallet.save()
+            with transaction.atomic():
+                wallet.refill(amount)
 
             return Response({'wallet': wallet.credit})
 
@@ -593,8 +589,6 @@ class BlockUserApiView(generics.GenericAPIView):
             blocking.save()
 
             user.followings.remove(blocked_user)
-            blocked_user.followers.remove(user)
-            blocked_user.followings.remove(user)
             user.followers.remove(blocked_user)
 
             chat_utils.lock_conversation(user, blocked_user)
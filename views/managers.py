@@ -1,11 +1,12 @@
 from django.db.models import Q, QuerySet, Prefetch, F, Subquery, OuterRef, Exists, Count
 from django.db.models.functions import Length
-from queryset_sequence import QuerySetSequence
 
 from api.enums import ReactionType, ViewType
 from arguments.enums import ArgumentReactionType
 from arguments.models import Argument
 from meda.managers import BaseManager
+from meda.search import filter_by_full_text
+from users.blocking import get_hidden_users_filter
 
 
 class ViewQuerySet(QuerySet):
@@ -15,12 +16,9 @@ class ViewQuerySet(QuerySet):
     def get_all_views(self):
         return self.filter(is_draft=False)
 
-    def get_feed_views(self, user):
+    def annotate_top_reactions(self, user):
         from api.mixins import TrendingMixin
 
-        following_ids = [
-            following.pk for following in user.followings.all()] + [user.pk]
-
         trending_mixin = TrendingMixin()
 
         top_reactions = trending_mixin.sort_queryset_by_popularity(
@@ -46,15 +44,28 @@ class ViewQuerySet(QuerySet):
                 top_my_reactions.values('reaction_type')[:1]),
             total_reactions=Count('view_reactions', filter=Q(
                 view_reactions__content__isnull=False))
-        ).filter(
-            user__pk__in=following_ids, is_draft=False
+        )
+
+    def get_feed_visible_views(self):
+        # Reactions without a statement on your own view or on your own moogt are left out of the feed.
+        return self.filter(
+            is_draft=False
         ).exclude(
             user=F('parent_view__user'), parent_view__isnull=False, content=None
         ).exclude(
             Q(user=F('parent_argument__moogt__proposition')) | Q(
                 user=F('parent_argument__moogt__opposition')),
             parent_argument__isnull=False, content=None
-        ).order_by('-created_at')
+        )
+
+    def get_feed_views(self, user):
+        from users.models import MoogtMedaUser
+
+        following_ids = MoogtMedaUser.objects.get_following_ids(user)
+
+        return self.annotate_top_reactions(user).filter(
+            Q(user__in=following_ids) | Q(user=user)
+        ).get_feed_visible_views().order_by('-created_at')
 
     def get_normal_views(self):
         return self.filter(Q(parent_view__isnull=True) & Q(parent_argument__isnull=True))
@@ -72,19 +83,11 @@ class ViewQuerySet(QuerySet):
         )
 
     def filter_using_search_term(self, search_term):
-        return self.filter(content__icontains=search_term, is_draft=False)
+        return filter_by_full_text(self.filter(is_draft=False), search_term,
+                                   fallback_lookups=['content__icontains'])
 
     def filter_views_by_blocked_users(self, user):
-        blocked_user_ids = user.blockings.annotate(
-            block_user_id=F('blocked_user'))
-        blocker_user_ids = user.blockers.annotate(block_user_id=F('user'))
-
-        user_ids = QuerySetSequence(blocked_user_ids, blocker_user_ids).values_list(
-            'block_user_id', flat=True)
-
-        return self.exclude(
-            user__pk__in=user_ids
-        )
+        return self.exclude(get_hidden_users_filter(user, 'user'))
 
 
 class ViewManager(BaseManager):
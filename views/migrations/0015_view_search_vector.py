@@ -0,0 +1,41 @@
+# Generated by Django 4.2.5 on 2026-10-19 05:56
+
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import migrations
+
+from meda.search import SEARCH_CONFIG
+
+
+def build_search_vectors(apps, schema_editor):
+    # Full text search is postgres only, the other databases fall back to `icontains` lookups.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('CREATE INDEX view_search_vector_idx ON views_view USING gin (search_vector);')
+
+    View = apps.get_model('views', 'View')
+    View.objects.using(schema_editor.connection.alias).update(
+        search_vector=SearchVector('content', weight='A', config=SEARCH_CONFIG))
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('DROP INDEX view_search_vector_idx;')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('views', '0014_alter_view_id_alter_viewimage_id_alter_viewreport_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='view',
+            name='search_vector',
+            field=SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(build_search_vectors, drop_search_index),
+    ]
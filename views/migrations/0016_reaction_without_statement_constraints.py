@@ -0,0 +1,41 @@
+# Generated by Django 4.2.5 on 2026-10-19 07:15
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_reactions(apps, schema_editor):
+    # Keep the first of the reactions without a statement that a user made of a type, the
+    # constraints can't be added with the duplicates around.
+    View = apps.get_model('views', 'View')
+    views = View.objects.using(schema_editor.connection.alias)
+    for parent_field in ['parent_view', 'parent_argument']:
+        duplicates = views.filter(content__isnull=True, is_removed=False, **{f'{parent_field}__isnull': False}) \
+            .order_by() \
+            .values('user', parent_field, 'reaction_type') \
+            .annotate(first_id=Min('id'), count=models.Count('id')).filter(count__gt=1)
+        for duplicate in duplicates:
+            views.filter(content__isnull=True, is_removed=False,
+                         user=duplicate['user'],
+                         reaction_type=duplicate['reaction_type'],
+                         **{parent_field: duplicate[parent_field]}) \
+                .exclude(id=duplicate['first_id']).update(is_removed=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('views', '0015_view_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_reactions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='view',
+            constraint=models.UniqueConstraint(condition=models.Q(('content__isnull', True), ('is_removed', False), ('parent_view__isnull', False)), fields=('user', 'parent_view', 'reaction_type'), name='view_unique_view_reaction_without_statement'),
+        ),
+        migrations.AddConstraint(
+            model_name='view',
+            constraint=models.UniqueConstraint(condition=models.Q(('content__isnull', True), ('is_removed', False), ('parent_argument__isnull', False)), fields=('user', 'parent_argument', 'reaction_type'), name='view_unique_argument_reaction_without_statement'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.5 on 2026-10-19 07:45
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_relation(stats, relation, count_field):
+    through = stats.model._meta.get_field(relation).remote_field.through
+    source_field = f'{stats.model._meta.model_name}_id'
+    counts = through.objects.filter(**{source_field: OuterRef('pk')}).order_by() \
+        .values(source_field).annotate(count=Count('pk')).values('count')
+    stats.update(**{count_field: Coalesce(Subquery(counts), 0)})
+
+
+def count_applauds(apps, schema_editor):
+    ViewStats = apps.get_model('views', 'ViewStats')
+    count_relation(ViewStats.objects.using(schema_editor.connection.alias), 'applauds', 'applaud_count')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('views', '0016_reaction_without_statement_constraints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='viewstats',
+            name='applaud_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_applauds, migrations.RunPython.noop),
+    ]
@@ -3,17 +3,19 @@ from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericRelation
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Q
 from django_comments_xtd.models import XtdComment
 
 from api.enums import ViewType, ReactionType
 from arguments.models import Argument
+from meda.behaviors import Searchable
 from meda.models import BaseReport, Score, Stats, BaseModel
 from users.models import MoogtMedaUser
 from views.managers import ViewManager, ViewQuerySet
 from notifications.models import Notification
 
 
-class View(BaseModel):
+class View(Searchable, BaseModel):
     # The main content of the View supplied by the user.
     content = models.CharField(max_length=560, null=True)
 
@@ -72,6 +74,21 @@ class View(BaseModel):
     # A custom model manager for the View model.
     objects = ViewManager.from_queryset(ViewQuerySet)()
 
+    search_document_fields = (('content', 'A'),)
+
+    class Meta:
+        # A user reacts without a statement at most once per reaction type, so toggling a reaction
+        # twice at once can't leave duplicates behind.
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'parent_view', 'reaction_type'],
+                                    condition=Q(content__isnull=True, is_removed=False, parent_view__isnull=False),
+                                    name='view_unique_view_reaction_without_statement'),
+            models.UniqueConstraint(fields=['user', 'parent_argument', 'reaction_type'],
+                                    condition=Q(content__isnull=True, is_removed=False,
+                                                parent_argument__isnull=False),
+                                    name='view_unique_argument_reaction_without_statement'),
+        ]
+
     def __str__(self):
         if self.content == None:
             return ''
@@ -165,12 +182,15 @@ class ViewStats(Stats):
     # List of users that applauded this view
     applauds = models.ManyToManyField(MoogtMedaUser, related_name="+")
 
+    # The number of applauds, kept along with the relation above.
+    applaud_count = models.IntegerField(default=0)
+
     def set_view(self, value):
         self.view = value
         self.save()
 
     def applauds_count(self):
-        return self.applauds.all().count()
+        return self.applaud_count
 
     def func_update_share_count(self, provider, count):
         """
@@ -1,11 +1,12 @@
-from django.db.models import Prefetch, Q
-from django_comments_xtd.models import XtdComment, ContentType
+from django.db.models import Q
 from rest_framework import serializers
 from rest_framework.fields import SerializerMethodField
 from rest_framework_serializer_extensions.serializers import SerializerExtensionsMixin
 
 from api.enums import ReactionType, ViewType, Visibility
-from api.serializers import TagSerializer, StatsItemSerializer, ReactionStatsSerializer, BaseViewArgumentSerializer
+from api.serializers import TagSerializer, StatsItemSerializer, ReactionStatsSerializer, BaseViewArgumentSerializer, \
+    ViewerContextListSerializer
+from api.viewer import get_viewer_context
 from arguments.models import Argument
 from arguments.serializers import ArgumentSerializer
 from users.models import MoogtMedaUser
@@ -33,7 +34,7 @@ class ViewStatsSerializer(SerializerExtensionsMixin, serializers.ModelSerializer
             selected = view_stats.applauds.filter(
                 pk=self.context['request'].user.pk).exists()
 
-        return self.get_stat_dict(view_stats.applauds.all().count(),
+        return self.get_stat_dict(view_stats.applaud_count,
                                   selected,
                                   True)
 
@@ -140,11 +141,9 @@ class ViewSerializer(SerializerExtensionsMixin, serializers.ModelSerializer, Bas
         filter = Q(is_hidden=False, visibility=Visibility.PUBLIC.name)
 
         if user_id:
-            user = MoogtMedaUser.objects.prefetch_related(
-                Prefetch('followings')).get(pk=user_id)
-            following_ids = [
-                following.pk for following in user.followings.all()] + [user.pk]
-            filter = Q(visibility=Visibility.FOLLOWERS_ONLY.name, user__pk__in=following_ids, is_hidden=False) | \
+            following_ids = MoogtMedaUser.objects.get_following_ids(user_id)
+            filter = Q(Q(user__in=following_ids) | Q(user=user_id),
+                       visibility=Visibility.FOLLOWERS_ONLY.name, is_hidden=False) | \
                 Q(is_hidden=False, visibility=Visibility.PUBLIC.name)
 
         queryset = queryset.filter(filter)
@@ -157,6 +156,7 @@ class ViewSerializer(SerializerExtensionsMixin, serializers.ModelSerializer, Bas
                   'is_hidden', 'is_comment_disabled', 'is_edited', 'type', 'is_draft',
                   'reaction_type', 'parent', 'stats', 'is_comment_disabled', 'is_parent_visible',
                   'top_reaction', 'my_top_reaction', 'total_reactions']
+        list_serializer_class = ViewerContextListSerializer
         expandable_fields = dict(
             tags=dict(serializer=TagSerializer, many=True),
             images=dict(
@@ -210,12 +210,17 @@ class ViewSerializer(SerializerExtensionsMixin, serializers.ModelSerializer, Bas
         if isinstance(parent, Argument):
             parent = parent.moogt
 
-        if user == self.context['request'].user:
+        request_user = self.context['request'].user
+        if user == request_user:
             return True
 
-        return (parent.visibility == Visibility.FOLLOWERS_ONLY.name and
-                self.context['request'].user in user.followers.all()) or \
-            parent.visibility == Visibility.PUBLIC.name
+        if parent.visibility == Visibility.PUBLIC.name:
+            return True
+
+        return parent.visibility == Visibility.FOLLOWERS_ONLY.name and \
+            request_user.is_authenticated and \
+            user is not None and \
+            get_viewer_context(self.context).is_following(user)
 
     def get_parent(self, view):
         parent = view.parent
@@ -243,7 +248,6 @@ class ViewSerializer(SerializerExtensionsMixin, serializers.ModelSerializer, Bas
         users_disagreeing = self.get_users([e.user for e in disagreements])
 
         applauds = getattr(view.stats, 'view_applauds', [])
-        users_applauding = self.get_users(applauds)
 
         endorsements_count = len(users_endorsing)
         disagreements_count = len(users_disagreeing)
@@ -251,7 +255,6 @@ class ViewSerializer(SerializerExtensionsMixin, serializers.ModelSerializer, Bas
 
         comments_count = view.comment_count
 
-        ctype = ContentType.objects.get_for_model(view)
         curr_user = self.context['request'].user
 
         return {
@@ -270,15 +273,13 @@ class ViewSerializer(SerializerExtensionsMixin, serializers.ModelSerializer, Bas
                 'has_reaction_with_statement': self.has_reaction_with_statement(curr_user, disagreements)
             }).data,
             'applaud': StatsItemSerializer({
-                'count': len(users_applauding),
+                'count': view.stats.applaud_count,
                 'selected': self.has_user_applauded(curr_user, applauds),
                 'allowed': True,
             }).data,
             'comment': StatsItemSerializer({
                 'count': comments_count,
-                'selected': XtdComment.objects.filter(user_id=curr_user.id,
-                                                      content_type=ctype,
-                                                      object_pk=view.pk).exists(),
+                'selected': get_viewer_context(self.context).has_commented(view),
                 'allowed': True,
             }).data
         }
@@ -0,0 +1,11 @@
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from api.utils import recount_relation
+from .models import ViewStats
+
+
+@receiver(m2m_changed, sender=ViewStats.applauds.through)
+def applauds_changed_receiver(sender, instance, action, reverse, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear') and not reverse:
+        recount_relation(instance.applauds, 'applaud_count')
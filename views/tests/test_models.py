@@ -7,6 +7,7 @@ from rest_framework.test import APITestCase
 from api.enums import Visibility, ReactionType, ViewType
 from api.tests.utility import create_user, create_view, create_comment, create_argument
 from meda.models import Score
+from views.models import ViewStats
 
 
 class ViewModelTests(APITestCase):
@@ -115,6 +116,17 @@ class ViewModelTests(APITestCase):
 
         self.assertEqual(view.reactions_count_of_type(ReactionType.DISAGREE.name), 1)
 
+    def test_applaud_count_follows_the_applauds(self):
+        """
+        The stored applaud count should follow applauds changed through the relation.
+        """
+        view = create_view(self.user, 'test content')
+        view.stats.applauds.add(self.user)
+        self.assertEqual(ViewStats.objects.get(pk=view.stats.pk).applauds_count(), 1)
+
+        view.stats.applauds.clear()
+        self.assertEqual(ViewStats.objects.get(pk=view.stats.pk).applauds_count(), 0)
+
 
 class ViewScoreModelTests(APITestCase):
     def setUp(self) -> None:
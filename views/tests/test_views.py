@@ -4,14 +4,18 @@ from unittest import mock
 
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
+from django_comments.models import CommentFlag
+from django_comments_xtd.models import LIKEDIT_FLAG
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 
 from api.enums import Visibility, ReactionType, ViewType
+from api.mixins import CommentMixin
 from api.models import Tag
 from api.signals import reaction_was_made
 from api.tests.tests import create_image, create_user_and_login
+from api.trending import refresh_trending_snapshots
 from api.tests.utility import create_user_and_login, create_view, create_user, create_comment, catch_signal, \
     create_argument, generate_photo_file, create_moogt_with_user, create_reaction_view
 from moogtmeda.settings import MEDIA_ROOT
@@ -449,6 +453,23 @@ class BrowseViewApiViewTests(APITestCase):
         self.assertEqual(response.data.get('count'), 1)
         self.assertEqual(response.data['results'][0]['id'], view.pk)
 
+    def test_trending_views(self):
+        """
+        Trending views should be ordered by the latest trending snapshot, with unranked views last.
+        """
+        user = create_user_and_login(self)
+        view_1 = create_view(user, "view content 1", Visibility.PUBLIC.name)
+        view_2 = create_view(user, "view content 2", Visibility.PUBLIC.name)
+        view_2.score.overall_score = 10
+        view_2.score.save()
+        refresh_trending_snapshots()
+        view_3 = create_view(user, "view content 3", Visibility.PUBLIC.name)
+
+        response = self.get(trending='true')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([view['id'] for view in response.data['results']], [view_2.id, view_1.id, view_3.id])
+
     def test_two_views_exist(self):
         """
         If two views exist, they should be included in the response.
@@ -2216,6 +2237,20 @@ class ViewCommentCreateAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(view.comments_count(), 2)
 
+    def test_concurrent_comments_are_all_counted(self):
+        """
+        Comments made through stale copies of the view should all be counted.
+        """
+        user = create_user_and_login(self)
+        view = create_view(user, "test view", Visibility.PUBLIC.name)
+        stale_view = View.objects.get(pk=view.pk)
+
+        reaction_was_made.send(sender=CommentMixin, obj=view)
+        reaction_was_made.send(sender=CommentMixin, obj=stale_view)
+        view.refresh_from_db()
+
+        self.assertEqual(view.comments_count(), 2)
+
     def test_comment_disabled(self):
         """
         Test commenting if view comment is disabled
@@ -2254,9 +2289,8 @@ class ViewCommentCreateAPITests(APITestCase):
 
 
 class ListViewCommentsAPITests(APITestCase):
-    def get(self, view_id, limit=3, offset=0):
-        url = reverse('api:views:list_comment', kwargs={'version': 'v1', 'pk': view_id}) + '?limit=' + str(
-            limit) + '&offset=' + str(offset)
+    def get(self, view_id, limit=3):
+        url = reverse('api:views:list_comment', kwargs={'version': 'v1', 'pk': view_id}) + '?limit=' + str(limit)
         return self.client.get(url, format='json')
 
     def reply(self, body=None):
@@ -2280,7 +2314,7 @@ class ListViewCommentsAPITests(APITestCase):
         response = self.get(view.id, limit=5)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(len(response.data['results']), 5)
         for i in range(5):
             self.assertEqual(response.data['results'][i]['thread_id'], view.id)
 
@@ -2302,9 +2336,71 @@ class ListViewCommentsAPITests(APITestCase):
         response = self.get(view.id, limit=5)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(len(response.data['results']), 1)
         self.assertEqual(response.data['results'][0]['thread_id'], view.id)
-        self.assertEqual(response.data['results'][1]['thread_id'], view.id)
+        self.assertEqual(response.data['results'][0]['reply_count'], 1)
+
+    def test_comments_are_paged_by_cursor(self):
+        """
+        The next page should start right after the last comment of the previous one.
+        """
+        user = create_user_and_login(self)
+        view = create_view(user, "test view", Visibility.PUBLIC.name)
+        comments = [create_comment(view, user, f"test comment {i}") for i in range(5)]
+
+        response = self.get(view.id, limit=3)
+        self.assertEqual([comment['id'] for comment in response.data['results']],
+                         [comment.id for comment in reversed(comments[2:])])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([comment['id'] for comment in response.data['results']],
+                         [comment.id for comment in reversed(comments[:2])])
+        self.assertIsNone(response.data['next'])
+
+    def test_reply_counts_and_likes(self):
+        """
+        Each comment should come with its number of replies and likes, and whether the user liked it.
+        """
+        user = create_user_and_login(self)
+        view = create_view(user, "test view", Visibility.PUBLIC.name)
+        liked_comment = create_comment(view, user, "liked comment")
+        comment = create_comment(view, user, "test comment")
+        create_comment(comment, user, "test reply")
+        CommentFlag.objects.create(comment=liked_comment, user=user, flag=LIKEDIT_FLAG)
+        CommentFlag.objects.create(comment=liked_comment, user=create_user('liker', 'password'), flag=LIKEDIT_FLAG)
+
+        response = self.get(view.id, limit=5)
+
+        results = {result['id']: result for result in response.data['results']}
+        self.assertEqual(results[comment.id]['reply_count'], 1)
+        self.assertEqual(results[comment.id]['like_count'], 0)
+        self.assertFalse(results[comment.id]['liked'])
+        self.assertEqual(results[liked_comment.id]['reply_count'], 0)
+        self.assertEqual(results[liked_comment.id]['like_count'], 2)
+        self.assertTrue(results[liked_comment.id]['liked'])
+        self.assertEqual(len(results[liked_comment.id]['flags']), 2)
+
+    def test_count_and_previous_link_are_kept(self):
+        """
+        The count and the previous link of the limit/offset pagination should still be in the response.
+        """
+        user = create_user_and_login(self)
+        view = create_view(user, "test view", Visibility.PUBLIC.name)
+        comments = [create_comment(view, user, f"test comment {i}") for i in range(5)]
+
+        first_page = self.get(view.id, limit=2)
+        self.assertEqual(first_page.data['count'], 5)
+        self.assertIsNone(first_page.data['previous'])
+
+        second_page = self.client.get(first_page.data['next'])
+        third_page = self.client.get(second_page.data['next'])
+        self.assertEqual([comment['id'] for comment in third_page.data['results']], [comments[0].id])
+
+        response = self.client.get(third_page.data['previous'])
+        self.assertEqual(response.data['results'], second_page.data['results'])
+        response = self.client.get(response.data['previous'])
+        self.assertEqual(response.data['results'], first_page.data['results'])
+        self.assertIsNone(response.data['previous'])
 
 
 class ViewDetailApiViewTests(APITestCase):
@@ -2496,7 +2592,7 @@ class GetUsersReactingApiViewTests(APITestCase):
         user_2 = create_user('user_2', 'test_password')
 
         follower = create_user('follower', 'test_password')
-        user_2.follower.add(follower)
+        user_2.followers.add(follower)
 
         self.view.stats.applauds.add(user_1)
         self.view.stats.applauds.add(user_2)
@@ -2505,15 +2601,16 @@ class GetUsersReactingApiViewTests(APITestCase):
         self.assertEqual(response.data['count'], 2)
         self.assertEqual(response.data['results'][0]['id'], user_2.id)
 
-    def test_users_who_you_are_following_should_be_ranked_first(self):
+    def test_users_who_you_are_following_are_flagged(self):
         """
-        The people that you're following should be ranked highest in the response.
+        The users should be ranked by their follower count, and the ones you're following flagged.
         """
         user_1 = create_user('user_1', 'test_password')
         follower_user = create_user('follower_user', 'test_password')
-        user_1.follower.add(follower_user)
+        user_1.followers.add(follower_user)
         user_2 = create_user('user_2', 'test_password')
-        user_2.follower.add(self.user)
+        user_2.followers.add(self.user)
+        user_2.followers.add(follower_user)
 
         self.view.stats.applauds.add(user_1)
         self.view.stats.applauds.add(user_2)
@@ -2521,6 +2618,28 @@ class GetUsersReactingApiViewTests(APITestCase):
         response = self.get(self.view.id)
         self.assertEqual(response.data['count'], 2)
         self.assertEqual(response.data['results'][0]['id'], user_2.id)
+        self.assertEqual(response.data['results'][0]['followers_count'], 2)
+        self.assertTrue(response.data['results'][0]['is_following'])
+        self.assertEqual(response.data['results'][1]['followers_count'], 1)
+        self.assertFalse(response.data['results'][1]['is_following'])
+
+    def test_users_are_paged_by_cursor(self):
+        """
+        The next page should continue after the last user of the previous page.
+        """
+        users = [create_user(f'user_{i}', 'test_password') for i in range(3)]
+        for i, user in enumerate(users):
+            self.view.stats.applauds.add(user)
+            for j in range(i):
+                user.followers.add(users[j])
+
+        url = reverse('api:views:users_reacting', kwargs={'version': 'v1', 'pk': self.view.id})
+        response = self.client.get(f'{url}?limit=2')
+        self.assertEqual([result['id'] for result in response.data['results']], [users[2].id, users[1].id])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([result['id'] for result in response.data['results']], [users[0].id])
+        self.assertIsNone(response.data['next'])
 
 
 class DeleteAllViewApiViewTests(APITestCase):
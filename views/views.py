@@ -12,8 +12,9 @@ from rest_framework_serializer_extensions.views import SerializerExtensionsAPIVi
 from api.enums import ViewType, ShareProvider
 from api.mixins import ReportMixin, UpdatePublicityMixin, TrendingMixin, ViewArgumentReactionMixin, ShareMixin, ApplaudMixin, \
     BrowseReactionsMixin, HideMixin, CommentMixin, CreateImageMixin
-from api.pagination import SmallResultsSetPagination
+from api.pagination import SmallResultsSetPagination, CommentPagination, ReactingUserPagination
 from api.serializers import CommentSerializer, CreateCommentSerializer
+from arguments.models import Argument
 from notifications.models import Notification, NOTIFICATION_TYPES
 from notifications.signals import notify
 from users.serializers import MoogtMedaUserSerializer
@@ -90,6 +91,8 @@ class DeleteViewApiView(generics.DestroyAPIView):
     def perform_destroy(self, instance: View):
         super().perform_destroy(instance)
         instance.view_reactions.filter(content__isnull=True).delete()
+        if instance.parent_argument:
+            ViewArgumentReactionMixin.update_argument(instance.parent_argument)
 
 
 class DeleteAllViewApiView(generics.DestroyAPIView):
@@ -101,7 +104,10 @@ class DeleteAllViewApiView(generics.DestroyAPIView):
             raise exceptions.NotFound(
                 detail="Sorry you currently don't have any views to be deleted.")
 
+        arguments = list(Argument.objects.filter(argument_reactions__in=qs).distinct())
         qs.delete()
+        for argument in arguments:
+            ViewArgumentReactionMixin.update_argument(argument)
         return Response(True, status.HTTP_200_OK)
 
 
@@ -350,7 +356,7 @@ class ViewCommentCreateApiView(CommentMixin, generics.GenericAPIView):
 
 class ListViewCommentsApiView(SerializerExtensionsAPIViewMixin, CommentMixin, generics.ListAPIView):
     serializer_class = CommentSerializer
-    pagination_class = SmallResultsSetPagination
+    pagination_class = CommentPagination
     extensions_expand = ['user__profile']
 
     def get_queryset(self):
@@ -362,6 +368,7 @@ class ListViewCommentsApiView(SerializerExtensionsAPIViewMixin, CommentMixin, ge
 
 class GetUsersReactingApiView(generics.ListAPIView, ViewArgumentReactionMixin):
     serializer_class = MoogtMedaUserSerializer
+    pagination_class = ReactingUserPagination
 
     def get(self, request, *args, **kwargs):
         view = get_object_or_404(View, pk=kwargs.get('pk'))
@@ -370,6 +377,9 @@ class GetUsersReactingApiView(generics.ListAPIView, ViewArgumentReactionMixin):
 
         return self.list(request, *args, **kwargs)
 
+    def paginate_queryset(self, queryset):
+        return self.load_following_status(self.request, super().paginate_queryset(queryset))
+
 class ViewReportApiView(ReportMixin, generics.CreateAPIView):
     serializer_class = ViewReportSerializer
     